@@ -0,0 +1,265 @@
+# Latency and throughput of the API routes of src/main.py against canned upstream responses. The
+# upstream responses come from a ResponseArchive: record one once with --record (this is the only
+# mode that talks to YouTube), then every run replays it, so results only change with the code.
+#
+# By default the app is driven in-process through ASGI, and the calls to YouTube that each API call
+# needed (cache misses) are counted too. With --url it sends the requests to a running server instead
+# (started with the same archive, or not), and only latency and throughput are reported.
+#
+#   python benchmarks/api_load.py --record --archive /tmp/api-archive --channel vsauce1 --post-id UgkxzeM19x_He9LEoerdLOHwZJsqIwamUnTj
+#   python benchmarks/api_load.py --archive /tmp/api-archive --channel vsauce1 --post-id UgkxzeM19x_He9LEoerdLOHwZJsqIwamUnTj \
+#       [--requests 200] [--concurrency 1 8 32] [--warmup 0] [--route /post/{post_id} ...] [--json]
+#   python benchmarks/api_load.py --url http://127.0.0.1:8000 --channel vsauce1 --post-id ... [--concurrency 8]
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.adapters import HTTPAdapter
+
+from youtube_community_tab import requests_handler
+from youtube_community_tab.archive import ReplayAdapter, ResponseArchive
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+DEFAULT_ROUTES = [
+    "/find-all-posts/{channel}",
+    "/post/{post_id}",
+    "/posts/{post_id}/stats",
+    "/posts/{post_id}/comments?max_comments=20",
+    "/community/{channel}/info",
+    "/community/{channel}/posts",
+]
+
+
+class CountingAdapter(HTTPAdapter):
+    # Counts the requests that reach the transport, which are the ones requests_cache didn't answer
+    def __init__(self, adapter):
+        super().__init__()
+        self.adapter = adapter
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.calls += 1
+        return self.adapter.send(request, **kwargs)
+
+    def close(self):
+        self.adapter.close()
+
+
+def percentile(sorted_values, p):
+    # Nearest rank
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+async def call_asgi(app, path):
+    # Minimal ASGI client, so the benchmark needs nothing but the app itself
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"benchmark")],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    response = {"status": None, "size": 0}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["size"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response["status"], response["size"]
+
+
+def call_url(url):
+    try:
+        with urllib.request.urlopen(url, timeout=120) as r:
+            return r.status, len(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, len(e.read())
+
+
+def run_in_process(app, paths, concurrency):
+    # Returns [(path, seconds, status, size)]
+    results = []
+
+    async def worker(queue):
+        while not queue.empty():
+            path = queue.get_nowait()
+            start = time.perf_counter()
+            status, size = await call_asgi(app, path)
+            results.append((path, time.perf_counter() - start, status, size))
+
+    async def main():
+        queue = asyncio.Queue()
+        for path in paths:
+            queue.put_nowait(path)
+        await asyncio.gather(*[worker(queue) for _ in range(concurrency)])
+
+    asyncio.run(main())
+    return results
+
+
+def run_over_http(base_url, paths, concurrency):
+    def call(path):
+        start = time.perf_counter()
+        status, size = call_url(base_url.rstrip("/") + path)
+        return path, time.perf_counter() - start, status, size
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(call, paths))
+
+
+def summarize(results, seconds, upstream_calls=None):
+    latencies = sorted(latency for _, latency, _, _ in results)
+    summary = {
+        "requests": len(results),
+        "errors": sum(1 for _, _, status, _ in results if status is None or status >= 400),
+        "requests_per_second": len(results) / seconds if seconds else None,
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+        "p90_ms": percentile(latencies, 90) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else None,
+        "max_ms": latencies[-1] * 1000 if latencies else None,
+        "mean_response_bytes": sum(size for _, _, _, size in results) / len(results) if results else None,
+    }
+    if upstream_calls is not None:
+        summary["upstream_calls_per_request"] = upstream_calls / len(results) if results else None
+    return summary
+
+
+def print_summary(name, summary):
+    def fmt(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    print(
+        f"{name:<48} {summary['requests']:>6} {summary['errors']:>6} {fmt(summary['requests_per_second'], '>8.1f')} "
+        f"{fmt(summary['p50_ms'], '>9.1f')} {fmt(summary['p90_ms'], '>9.1f')} {fmt(summary['p99_ms'], '>9.1f')} "
+        f"{fmt(summary['mean_response_bytes'], '>10.0f')} {fmt(summary.get('upstream_calls_per_request'), '>9.2f')}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--archive", help="ResponseArchive directory with the upstream responses")
+    parser.add_argument("--record", action="store_true", help="call every route once against YouTube and archive the responses")
+    parser.add_argument("--url", help="base url of a running server, instead of driving the app in-process")
+    parser.add_argument("--channel", default="vsauce1")
+    parser.add_argument("--post-id", default="UgkxzeM19x_He9LEoerdLOHwZJsqIwamUnTj")
+    parser.add_argument("--route", action="append", help="route to call, with {channel} and {post_id} placeholders (default: every GET route)")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per concurrency level, spread over the routes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--warmup", type=int, default=0, help="unmeasured calls of every route before each run")
+    parser.add_argument("--cache-path", help="response cache file, a new empty one by default")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    routes = [route.format(channel=args.channel, post_id=args.post_id) for route in (args.route or DEFAULT_ROUTES)]
+
+    if args.url is None and args.archive is None:
+        parser.error("--archive is needed to run in-process")
+
+    counting_adapter = None
+    app = None
+    cold_calls = {}
+    if args.url is None:
+        archive = ResponseArchive(args.archive)
+        counting_adapter = CountingAdapter(HTTPAdapter() if args.record else ReplayAdapter(archive))
+
+        cache_path = args.cache_path or os.path.join(tempfile.mkdtemp(), "requests_cache.sqlite")
+        provider = requests_handler.SessionProvider(cache_path=cache_path)
+        # The same CountingAdapter on the session of every thread
+        provider.mount("https://", counting_adapter)
+        provider.mount("http://", counting_adapter)
+        requests_handler.set_provider(provider)
+
+        sys.path.insert(0, SRC_PATH)
+        import main as api
+
+        app = api.app
+
+        if args.record:
+            with archive.recording():
+                results = run_in_process(app, routes, 1)
+            for path, _, status, _ in results:
+                print(f"{status} {path}")
+            print(f"[{len(archive.index)} responses in {args.archive}]")
+            return
+
+    if app is not None:
+        # With an empty cache, one call at a time, so the upstream calls belong to the route
+        print(f"{'route':<48} {'upstream calls (cold cache)':>28}")
+        for route in routes:
+            calls = counting_adapter.calls
+            run_in_process(app, [route], 1)
+            cold_calls[route] = counting_adapter.calls - calls
+            print(f"{route[:48]:<48} {cold_calls[route]:>28}")
+        print()
+
+    print(
+        f"{'route':<48} {'calls':>6} {'errors':>6} {'req/s':>8} {'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9} "
+        f"{'bytes':>10} {'upstream':>9}"
+    )
+
+    report = []
+    for concurrency in args.concurrency:
+        paths = [routes[i % len(routes)] for i in range(args.requests)]
+        warmup_paths = routes * args.warmup
+
+        if app is not None:
+            run_in_process(app, warmup_paths, concurrency)
+            upstream_calls = counting_adapter.calls
+            start = time.perf_counter()
+            results = run_in_process(app, paths, concurrency)
+            seconds = time.perf_counter() - start
+            upstream_calls = counting_adapter.calls - upstream_calls
+        else:
+            run_over_http(args.url, warmup_paths, concurrency)
+            start = time.perf_counter()
+            results = run_over_http(args.url, paths, concurrency)
+            seconds = time.perf_counter() - start
+            upstream_calls = None
+
+        summary = {"concurrency": concurrency, **summarize(results, seconds, upstream_calls), "routes": {}}
+        print_summary(f"all routes, concurrency={concurrency}", summary)
+
+        # Throughput is only meaningful for the whole run, the routes share the workers, and the
+        # upstream calls can't be attributed to a route when the calls overlap
+        for route in routes:
+            route_summary = summarize([result for result in results if result[0] == route], None)
+            summary["routes"][route] = route_summary
+            print_summary(f"  {route}"[:48], route_summary)
+
+        report.append(summary)
+
+    if args.json:
+        print(json.dumps({"cold_upstream_calls": cold_calls, "runs": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
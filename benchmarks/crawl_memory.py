@@ -0,0 +1,117 @@
+# Peak memory of parsing N pages of posts and comments, keeping everything in memory (default)
+# vs handing every item to a sink. With a sink, the peak must not depend on the number of pages.
+#
+#   python benchmarks/crawl_memory.py [--pages 10 100 1000] [--posts-per-page 10] [--comments-per-page 20]
+
+import argparse
+import sys
+import tracemalloc
+
+from youtube_community_tab.community_tab import CommunityTab
+from youtube_community_tab.post import Post
+
+
+def make_post_item(post_id):
+    return {
+        "backstagePostThreadRenderer": {
+            "post": {
+                "backstagePostRenderer": {
+                    "postId": post_id,
+                    "authorText": {
+                        "runs": [
+                            {
+                                "text": "Vsauce",
+                                "navigationEndpoint": {
+                                    "browseEndpoint": {"browseId": "UC6nSFpj9HTCZ5t-N3Rm3-HA"},
+                                    "commandMetadata": {"webCommandMetadata": {"url": "/c/vsauce1"}},
+                                },
+                            }
+                        ]
+                    },
+                    "authorEndpoint": {
+                        "clickTrackingParams": "x" * 40,
+                        "commandMetadata": {"webCommandMetadata": {"url": "/c/vsauce1"}},
+                        "browseEndpoint": {"browseId": "UC6nSFpj9HTCZ5t-N3Rm3-HA"},
+                    },
+                    "authorThumbnail": {"thumbnails": [{"url": "https://yt3.ggpht.com/" + "a" * 80, "width": 88, "height": 88}]},
+                    "contentText": {"runs": [{"text": "Lorem ipsum dolor sit amet " * 20}]},
+                    "voteCount": {"simpleText": "1.7K"},
+                }
+            }
+        }
+    }
+
+
+def make_comment_item(comment_id):
+    return {"commentThreadRenderer": {"commentViewModel": {"commentViewModel": {"commentId": comment_id, "contentText": {"runs": [{"text": "Hey " * 50}]}}}}}
+
+
+def make_continuation_item():
+    return {"continuationItemRenderer": {"continuationEndpoint": {"continuationCommand": {"token": "t" * 100}}}}
+
+
+def make_crawlers(sink):
+    community_tab = CommunityTab("vsauce1")
+    community_tab.channel_id = "UC6nSFpj9HTCZ5t-N3Rm3-HA"
+    community_tab.sink = sink
+
+    post = Post("post", channel_id="UC6nSFpj9HTCZ5t-N3Rm3-HA")
+    post.sink = sink
+
+    return community_tab, post
+
+
+def load_page(community_tab, post, page, posts_per_page, comments_per_page):
+    items = [make_post_item(f"post-{page}-{i}") for i in range(posts_per_page)] + [make_continuation_item()]
+    community_tab.append_posts_from_items(items)
+
+    items = [make_comment_item(f"comment-{page}-{i}") for i in range(comments_per_page)] + [make_continuation_item()]
+    post.append_comments_from_items(items)
+
+
+def run(pages, posts_per_page, comments_per_page, sink):
+    # The session, the cache and the client context are created by the first page, so a warm-up
+    # page keeps them out of the measure
+    load_page(*make_crawlers(sink), -1, posts_per_page, comments_per_page)
+    community_tab, post = make_crawlers(sink)
+
+    tracemalloc.start()
+    for page in range(pages):
+        load_page(community_tab, post, page, posts_per_page, comments_per_page)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--posts-per-page", type=int, default=10)
+    parser.add_argument("--comments-per-page", type=int, default=20)
+    args = parser.parse_args()
+
+    in_memory_peaks = []
+    sink_peaks = []
+    print(f"{'pages':>8} {'in memory (KiB)':>16} {'sink (KiB)':>12}")
+    for pages in args.pages:
+        in_memory_peak = run(pages, args.posts_per_page, args.comments_per_page, None)
+        sink_peak = run(pages, args.posts_per_page, args.comments_per_page, lambda item: None)
+
+        in_memory_peaks.append(in_memory_peak)
+        sink_peaks.append(sink_peak)
+        print(f"{pages:>8} {in_memory_peak / 1024:>16.1f} {sink_peak / 1024:>12.1f}")
+
+    # Without a sink every item is kept, otherwise the benchmark isn't measuring them
+    if len(set(args.pages)) > 1 and in_memory_peaks[args.pages.index(max(args.pages))] <= in_memory_peaks[args.pages.index(min(args.pages))]:
+        print("[The peak memory without a sink doesn't grow with the number of pages]")
+        sys.exit(1)
+
+    # Allow some noise, but a growth with the number of pages means something is retained
+    if max(sink_peaks) > 2 * min(sink_peaks):
+        print("[The peak memory with a sink grows with the number of pages]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
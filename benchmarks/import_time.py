@@ -0,0 +1,60 @@
+# Import time of the package, measured with python -X importtime in a fresh interpreter. Importing
+# the package must not import requests_cache or create the cache file, those are deferred until
+# the first request.
+#
+#   python benchmarks/import_time.py [--module youtube_community_tab] [--runs 5] [--top 10]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+
+def measure(module=None):
+    # Returns {imported module: cumulative time in microseconds} of one import of module, or of the
+    # interpreter startup alone when module is None
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}" if module else "pass"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="youtube_community_tab")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    startup = measure()
+    runs = [measure(args.module) for _ in range(args.runs)]
+
+    total = statistics.median(run[args.module] for run in runs)
+    print(f"import {args.module}: {total / 1000:.1f} ms (median of {args.runs} runs)")
+
+    # Modules imported by the interpreter startup (site, ...) are left out
+    last_run = {name: cumulative for name, cumulative in runs[-1].items() if name not in startup}
+    print(f"\n{'cumulative (ms)':>16}  module")
+    for name, cumulative in sorted(last_run.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"{cumulative / 1000:>16.1f}  {name}")
+
+    if args.module == "youtube_community_tab" and "requests_cache" in last_run:
+        print("\n[Importing the package imported requests_cache]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,10 @@ setup(
     install_requires=[
         "requests_cache",
     ],
+    extras_require={
+        "api": ["fastapi", "uvicorn"],
+        "analytics": ["numpy"],
+    },
     packages=find_packages(where="src"),
     zip_safe=False,
 )
@@ -1,32 +1,136 @@
 import asyncio
-from fastapi import FastAPI, HTTPException
-from youtube_community_tab.helpers.utils import parse_count_text, safely_get_value_from_key
+import os
+import time
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Response
+from youtube_community_tab.helpers.utils import safely_get_value_from_key
+from youtube_community_tab.helpers.projection import check_fields, parse_fields, project
+from youtube_community_tab.comment import Comment
 from youtube_community_tab.post import Post
 from youtube_community_tab.community_tab import CommunityTab
+from youtube_community_tab.requests_handler import CACHE_FILE_PATH, get_metrics, is_timeout
+from youtube_community_tab.cache_warmer import CacheWarmer, get_lock_path
+from youtube_community_tab.circuit_breaker import item_circuit_breaker, upstream_circuit_breaker
+from youtube_community_tab.exceptions import CircuitOpenError, NotFoundError, UpstreamError
 
 app = FastAPI()
 
+# Segundos que las respuestas de YouTube se sirven desde la caché
+API_TTL = int(os.environ.get("YOUTUBE_COMMUNITY_TAB_API_TTL", 10 * 60))
+# Segundos que puede tardar cada petición a la API, contando todas las peticiones a YouTube que hace
+API_DEADLINE = float(os.environ.get("YOUTUBE_COMMUNITY_TAB_API_DEADLINE", 20))
+
+# Refresca los canales y posts más pedidos antes de que caduquen, con 0 peticiones por minuto no se refresca nada
+warmer = CacheWarmer(
+    ttl=API_TTL,
+    max_items=int(os.environ.get("YOUTUBE_COMMUNITY_TAB_WARMER_MAX_ITEMS", 200)),
+    refreshes_per_minute=int(os.environ.get("YOUTUBE_COMMUNITY_TAB_WARMER_REFRESHES_PER_MINUTE", 60)),
+    lock_path=get_lock_path(CACHE_FILE_PATH),
+)
+
+
+def get_deadline():
+    return time.monotonic() + API_DEADLINE
+
+
+def set_truncated(response, truncated):
+    # Los resultados parciales, cortados por el deadline, se marcan con X-Truncated
+    if truncated:
+        response.headers["X-Truncated"] = "true"
+
+
+def to_http_exception(e):
+    # 404 para canales y posts que no existen, 503 mientras el circuito está abierto, 502 si YouTube falla
+    # y 504 si se acaba el deadline
+    if isinstance(e, HTTPException):
+        return e
+    if is_timeout(e):
+        return HTTPException(status_code=504, detail=f"[YouTube no respondió en {API_DEADLINE:.0f}s]")
+    if isinstance(e, NotFoundError):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
+    if isinstance(e, UpstreamError):
+        return HTTPException(status_code=502, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
+
+
+def parse_request_fields(fields, names, kind):
+    # Se validan antes de descargar nada: un campo desconocido es un 400, y los errores al leer las
+    # respuestas de YouTube (también ValueError) no se confunden con los del cliente
+    if not fields:
+        return None
+    try:
+        return check_fields(fields, names, kind)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
 # --- RUTA PRINCIPAL ---
+@app.on_event("startup")
+def start_warmer():
+    if warmer.refreshes_per_minute > 0:
+        warmer.start()
+
+
+@app.on_event("shutdown")
+def stop_warmer():
+    warmer.stop()
+
+
 @app.get("/", tags=["General"])
 def read_root():
     return {"message": "Bienvenido a la API de la pestaña de comunidad de YouTube"}
 
+
+@app.get("/metrics", tags=["General"])
+def read_metrics():
+    # Sesiones por hilo, tamaño de los pools, tiempo de lectura/escritura de la caché y circuitos abiertos
+    return {
+        **get_metrics(),
+        "circuit_breakers": {"upstream": upstream_circuit_breaker.get_stats(), "item": item_circuit_breaker.get_stats()},
+        "cache_warmer": warmer.get_stats(),
+    }
+
 # --- RUTAS DE POSTS ---
+# Campos que necesita /find-all-posts, el resto del post no se serializa
+FIND_ALL_POSTS_FIELDS = parse_fields(
+    "post_id,channel_id,author.authorText.runs.text,backstage_attachment.backstageImageRenderer.image.thumbnails.url,content_text.runs.text"
+)
+
+# Campos de la respuesta de /find-all-posts que se pueden pedir con fields
+FIND_ALL_POSTS_OUTPUT_FIELDS = ("postId", "channelID", "authorName", "thumbnail", "contentText", "likes", "comments")
+
+
 @app.get("/find-all-posts/{channel_name}", tags=["Posts"])
-async def get_posts(channel_name: str):
+async def get_posts(channel_name: str, response: Response, fields: Optional[str] = None):
+    fields = parse_request_fields(fields, FIND_ALL_POSTS_OUTPUT_FIELDS, "/find-all-posts")
+
     try:
+        deadline = get_deadline()
+        warmer.record("channel", f'@{channel_name}')
         community_tab = CommunityTab(f'@{channel_name}')
-        await asyncio.to_thread(community_tab.load_posts)  # Ejecutar en un subproceso si es bloqueante
+        await asyncio.to_thread(community_tab.load_posts, API_TTL, deadline)  # Ejecutar en un subproceso si es bloqueante
         if not community_tab.posts:
             raise HTTPException(status_code=404, detail="No se encontraron publicaciones para este canal")
 
+        truncated = False
+
         # Función para procesar cada post de manera concurrente
         async def process_post(post):
-            post_data = post.as_json()
-
-            # Obtener estadísticas (likes y comments) de manera asíncrona
-            post_stats = await asyncio.to_thread(get_post_stats, post_data["post_id"])
+            nonlocal truncated
+            post_data = post.as_json(fields=FIND_ALL_POSTS_FIELDS)
+
+            # Obtener estadísticas (likes y comments) de manera asíncrona, sin ellas si se acaba el deadline.
+            # Los likes vienen en el listado y el token de comentarios se construye con el channel_id,
+            # así que no se descarga la página de cada post
+            try:
+                post_stats = await asyncio.to_thread(post.load_stats, API_TTL, deadline)
+            except Exception as e:
+                if not is_timeout(e):
+                    raise e
+                post_stats = {"likes": None, "comments": None}
+                truncated = True
 
             # Extraer datos requeridos
             author_name = safely_get_value_from_key(
@@ -41,7 +145,7 @@ async def get_posts(channel_name: str):
             content_text = "".join(run.get("text", "") for run in content_runs)
 
             # Formatear datos finales
-            return {
+            return project({
                 "postId": post_data["post_id"],
                 "channelID": post_data["channel_id"],
                 "authorName": author_name,
@@ -49,66 +153,48 @@ async def get_posts(channel_name: str):
                 "contentText": content_text,
                 "likes": post_stats["likes"],
                 "comments": post_stats["comments"]
-            }
+            }, fields)
 
         # Ejecutar la función para cada post de manera concurrente
         tasks = [process_post(post) for post in community_tab.posts]
         posts = await asyncio.gather(*tasks)
 
+        set_truncated(response, truncated)
         return posts
 
-    except SystemExit:
-        raise HTTPException(status_code=400, detail=f"No se pudo obtener datos del canal: {channel_name}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
 
 
 @app.get("/post/{post_id}", tags=["Posts"])
-def get_post(post_id: str):
+def get_post(post_id: str, fields: Optional[str] = None):
+    # fields=post_id,author.authorText,content_text.runs.text devuelve solo esos campos
+    fields = parse_request_fields(fields, Post.JSON_FIELDS, "Post")
+
     try:
-        post = Post.from_post_id(post_id)
-        return post.as_json()
+        warmer.record("post", post_id)
+        post = Post.from_post_id(post_id, expire_after=API_TTL, deadline=get_deadline())
+        return post.as_json(fields=fields)
 
-    except SystemExit:
-        raise HTTPException(status_code=400, detail=f"No se pudo obtener el post: {post_id}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
 
 
-@app.get("/posts/{post_id}/stats", tags=["Posts"])
-def get_post_stats(post_id: str):
-    try:
-        post = Post.from_post_id(post_id)
-        post_data = post.as_json()
-
-        # Convertir el texto de likes a número
-        likes_text = post_data.get("vote_count", {}).get("simpleText", "0")
-        likes = parse_count_text(likes_text)
-
-        # Procesar comentarios
-        post_data_comments = post.load_comments()
-        comments = 0
+def load_post_stats(post_id, deadline):
+    warmer.record("post", post_id)
+    post = Post.from_post_id(post_id, expire_after=API_TTL, deadline=deadline)
 
-        runs = safely_get_value_from_key(post_data_comments, "onResponseReceivedEndpoints", 0,
-                                         "reloadContinuationItemsCommand", "continuationItems", 0,
-                                         "commentsHeaderRenderer", "countText", "runs", default=[])
+    # Convertir el texto de likes y comentarios a número
+    return post.load_stats(expire_after=API_TTL, deadline=deadline)
 
-        if runs:
-            comments_text = runs[0].get("text", "0")
-            comments = parse_count_text(comments_text)
 
-        return {
-            "post_id": post_id,
-            "likes": likes,
-            "comments": comments
-        }
+@app.get("/posts/{post_id}/stats", tags=["Posts"])
+def get_post_stats(post_id: str):
+    try:
+        return load_post_stats(post_id, get_deadline())
 
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=f"Error al convertir valores: {str(e)}")
-    except SystemExit:
-        raise HTTPException(status_code=400, detail=f"No se pudo obtener estadísticas del post: {post_id}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
 
 
 @app.post("/posts/{post_id}/comments", tags=["Comments"])
@@ -118,36 +204,40 @@ def create_comment(post_id: str, comment: str):
         post.create_comment(comment)
         return {"message": "Comentario creado exitosamente"}
 
-    except SystemExit:
-        raise HTTPException(status_code=400, detail=f"No se pudo crear el comentario en el post: {post_id}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
 
 
 @app.get("/posts/{post_id}/comments", tags=["Comments"])
-def get_comments(post_id: str):
+def get_comments(post_id: str, response: Response, max_comments: int = 100, max_pages: Optional[int] = None, fields: Optional[str] = None):
+    fields = parse_request_fields(fields, Comment.JSON_FIELDS, "Comment")
+
     try:
-        post = Post.from_post_id(post_id)
-        post.load_comments()
-        comments = [comment.as_json() for comment in getattr(post, "comments", [])]
+        deadline = get_deadline()
+        warmer.record("post", post_id)
+        post = Post.from_post_id(post_id, expire_after=API_TTL, deadline=deadline)
+        post.load_comments(expire_after=API_TTL, internal=False, max_comments=max_comments, max_pages=max_pages, deadline=deadline)
+        comments = [comment.as_json(fields=fields) for comment in getattr(post, "comments", [])]
 
         if not comments:
+            if post.truncated:
+                raise HTTPException(status_code=504, detail=f"[YouTube no respondió en {API_DEADLINE:.0f}s]")
             raise HTTPException(status_code=404, detail=f"No se encontraron comentarios para el post: {post_id}")
 
+        set_truncated(response, post.truncated)
         return comments
 
-    except SystemExit:
-        raise HTTPException(status_code=400, detail=f"No se pudieron obtener comentarios del post: {post_id}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
 
 
 # --- RUTAS DE COMUNIDAD ---
 @app.get("/community/{channel_name}/info", tags=["Community"])
 def get_community_info(channel_name: str):
     try:
+        warmer.record("channel", channel_name)
         community_tab = CommunityTab(channel_name)
-        community_tab.load_posts()
+        community_tab.load_posts(expire_after=API_TTL, deadline=get_deadline())
 
         return {
             "channel_id": community_tab.channel_id,
@@ -155,25 +245,40 @@ def get_community_info(channel_name: str):
             "visitor_data": community_tab.visitor_data,
         }
 
-    except SystemExit:
-        raise HTTPException(status_code=400, detail=f"No se pudo obtener la información del canal: {channel_name}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
 
 
 @app.get("/community/{channel_name}/posts", tags=["Community"])
-def get_paginated_posts(channel_name: str, page: int = 1, per_page: int = 10):
+def get_paginated_posts(channel_name: str, page: int = 1, per_page: int = 10, fields: Optional[str] = None):
+    fields = parse_request_fields(fields, Post.JSON_FIELDS, "Post")
+
     try:
+        warmer.record("channel", channel_name)
         community_tab = CommunityTab(channel_name)
-        community_tab.load_posts()
+        community_tab.load_posts(expire_after=API_TTL, deadline=get_deadline())
 
         start = (page - 1) * per_page
         end = start + per_page
 
-        return [post.as_json() for post in community_tab.posts[start:end]]
+        return [post.as_json(fields=fields) for post in community_tab.posts[start:end]]
 
-    except SystemExit:
-        raise HTTPException(status_code=400, detail=f"No se pudieron obtener publicaciones del canal: {channel_name}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
+
+
+
+# --- SERVIDOR ---
+if __name__ == "__main__":
+    import uvicorn
 
+    # Todos los workers comparten la caché de respuestas (SQLite en modo WAL): una respuesta
+    # descargada por un worker la sirven los demás durante YOUTUBE_COMMUNITY_TAB_API_TTL segundos.
+    # Con un TTL de 0 no se reutiliza nada y cada worker hace sus propias peticiones a YouTube
+    uvicorn.run(
+        "main:app",
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", 8000)),
+        workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+    )
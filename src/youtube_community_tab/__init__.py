@@ -1,18 +1,58 @@
-from . import (
-    helpers,
-)
-
-from .comment import Comment
-from .community_tab import CommunityTab
-from .post import Post
-from .reply import Reply
-from .requests_handler import requests_cache
-
-__all__ = [
-    "helpers",
-    "Comment",
-    "CommunityTab",
-    "Post",
-    "Reply",
-    "requests_cache",
-]
+import importlib
+
+# Submodules are only imported when one of their names is first used, so importing the package
+# stays cheap for scripts that only need part of it
+_SUBMODULES = ("helpers",)
+_LAZY_IMPORTS = {
+    "helpers": ".helpers",
+    "ResponseArchive": ".archive",
+    "BoundedSQLiteCache": ".cache_backend",
+    "CacheWarmer": ".cache_warmer",
+    "CircuitBreaker": ".circuit_breaker",
+    "ClientContext": ".client_context",
+    "Comment": ".comment",
+    "CommentStore": ".comment_store",
+    "CommunityTab": ".community_tab",
+    "DataStore": ".datastore",
+    "ChannelNotFoundError": ".exceptions",
+    "CircuitOpenError": ".exceptions",
+    "DeadlineExceededError": ".exceptions",
+    "NotFoundError": ".exceptions",
+    "PostNotFoundError": ".exceptions",
+    "UpstreamError": ".exceptions",
+    "YouTubeCommunityTabError": ".exceptions",
+    "JobRunner": ".jobs",
+    "Post": ".post",
+    "Reply": ".reply",
+    "get_session": ".requests_handler",
+    "requests_cache": ".requests_handler",
+    "set_session": ".requests_handler",
+    "ResolutionCache": ".resolution_cache",
+    "resolution_cache": ".resolution_cache",
+    "SearchIndex": ".search_index",
+    "Account": ".session_pool",
+    "SessionPool": ".session_pool",
+    "JsonLinesSink": ".sinks",
+    "QueueSink": ".sinks",
+    "crawl_community_tab": ".sinks",
+    "StatsRecorder": ".stats_store",
+    "StatsStore": ".stats_store",
+    "ThumbnailDownloader": ".thumbnails",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+    value = module if name in _SUBMODULES else getattr(module, name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
@@ -0,0 +1,212 @@
+import io
+import json
+import mmap
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from hashlib import sha1
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError
+from urllib3 import HTTPResponse
+
+from .helpers.paths import get_data_path
+from .requests_handler import mounted, requests_cache
+
+ARCHIVE_DIR_PATH = get_data_path("archive")
+
+# Headers that describe the body as it was sent, not as it's stored
+HEADERS_TO_DROP = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class ResponseArchive(object):
+    # Append-only archive of responses. Every response is compressed with zlib and appended to the
+    # current segment, segment-000000.log, segment-000001.log, ..., and then a line with its key,
+    # segment, offset and length is appended to index.jsonl. Since the index is written last, it
+    # never points to a record that was only partially written.
+    #
+    # Responses are read back through memory-mapped segments, either one by one with get() or
+    # iter_records(), or by replaying them to CommunityTab, Post and Comment with replaying().
+
+    def __init__(self, path=ARCHIVE_DIR_PATH, segment_size=256 * 1024 * 1024, compression_level=6):
+        self.path = path
+        self.segment_size = segment_size
+        self.compression_level = compression_level
+
+        self._index_path = os.path.join(self.path, "index.jsonl")
+        self._maps = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(self.path, exist_ok=True)
+        # key -> (segment, offset, length), the latest record wins
+        self.index = self._load_index()
+
+        self._segment = max([segment for segment, _, _ in self.index.values()], default=0)
+
+    def _load_index(self):
+        index = {}
+        if not os.path.exists(self._index_path):
+            return index
+
+        valid_size = 0
+        with open(self._index_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.decoder.JSONDecodeError:
+                    # Last line of an interrupted run
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                valid_size += len(line)
+
+                index[entry["key"]] = (entry["segment"], entry["offset"], entry["length"])
+
+        # Drop the partially written line, if any, so new entries start on a line of their own
+        if valid_size < os.path.getsize(self._index_path):
+            with open(self._index_path, "r+b") as f:
+                f.truncate(valid_size)
+
+        return index
+
+    def _get_segment_path(self, segment):
+        return os.path.join(self.path, f"segment-{segment:06d}.log")
+
+    @staticmethod
+    def get_key(method, url, body=None):
+        # POST bodies carry a context with the client version, visitor data, ... which changes between
+        # runs, so only the rest of the body (the continuation token, mostly) identifies the request
+        key = f"{method.upper()} {url}"
+
+        if body:
+            if isinstance(body, bytes):
+                body = body.decode("utf-8", errors="replace")
+            try:
+                payload = json.loads(body)
+                payload.pop("context", None)
+                body = json.dumps(payload, sort_keys=True)
+            except (ValueError, AttributeError):
+                pass
+            key += " " + sha1(body.encode()).hexdigest()
+
+        return key
+
+    def add(self, response):
+        # Appends a requests.Response and returns its key
+        request = response.request
+        key = ResponseArchive.get_key(request.method, request.url, request.body)
+
+        meta = {
+            "key": key,
+            "url": response.url,
+            "status_code": response.status_code,
+            "headers": {name: value for name, value in response.headers.items() if name.lower() not in HEADERS_TO_DROP},
+            "encoding": response.encoding,
+        }
+        record = zlib.compress(json.dumps(meta).encode() + b"\n" + response.content, self.compression_level)
+
+        with self._lock:
+            segment_path = self._get_segment_path(self._segment)
+            if os.path.exists(segment_path) and os.path.getsize(segment_path) + len(record) > self.segment_size:
+                self._segment += 1
+                segment_path = self._get_segment_path(self._segment)
+
+            with open(segment_path, "ab") as f:
+                offset = f.tell()
+                f.write(record)
+
+            with open(self._index_path, "a") as f:
+                f.write(json.dumps({"key": key, "segment": self._segment, "offset": offset, "length": len(record)}) + "\n")
+
+            self.index[key] = (self._segment, offset, len(record))
+
+        return key
+
+    def _response_hook(self, response, *args, **kwargs):
+        # Responses served by requests_cache were archived when they were first fetched
+        if not getattr(response, "from_cache", False):
+            self.add(response)
+        return response
+
+    @contextmanager
+    def recording(self, session=requests_cache):
+        # Archives every response received by the session inside the with block
+        session.hooks["response"].append(self._response_hook)
+        try:
+            yield self
+        finally:
+            session.hooks["response"].remove(self._response_hook)
+
+    def _read(self, segment, offset, length):
+        with self._lock:
+            m = self._maps.get(segment)
+
+            # The current segment keeps growing, so it's mapped again when the record is past its end
+            if m is None or offset + length > len(m):
+                if m is not None:
+                    m.close()
+                with open(self._get_segment_path(segment), "rb") as f:
+                    m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment] = m
+
+            return zlib.decompress(m[offset : offset + length])
+
+    def get_record(self, key):
+        # Returns (meta, content) or None
+        if key not in self.index:
+            return None
+
+        meta, content = self._read(*self.index[key]).split(b"\n", 1)
+        return json.loads(meta), content
+
+    def get(self, method, url, body=None):
+        return self.get_record(ResponseArchive.get_key(method, url, body))
+
+    def iter_records(self):
+        # Yields (meta, content) in segment order, which is the order they were archived
+        for key, _ in sorted(self.index.items(), key=lambda item: item[1]):
+            yield self.get_record(key)
+
+    @contextmanager
+    def replaying(self, session=requests_cache):
+        # Inside the with block, the session gets its responses from the archive instead of the
+        # network, on every thread. A request that is not in the archive raises
+        # requests.exceptions.ConnectionError.
+        with mounted(ReplayAdapter(self), session=session):
+            yield self
+
+    def close(self):
+        with self._lock:
+            for m in self._maps.values():
+                m.close()
+            self._maps = {}
+
+
+class ReplayAdapter(HTTPAdapter):
+    # Builds the responses from the archive the same way HTTPAdapter builds them from the network,
+    # so requests_cache can still cache them
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        record = self.archive.get(request.method, request.url, request.body)
+        if record is None:
+            raise ConnectionError(f"[{request.method} {request.url} is not in the archive]", request=request)
+
+        meta, content = record
+
+        raw = HTTPResponse(
+            body=io.BytesIO(content),
+            headers=meta["headers"],
+            status=meta["status_code"],
+            preload_content=False,
+            decode_content=False,
+            request_url=meta["url"],
+        )
+        response = self.build_response(request, raw)
+        if meta["encoding"] is not None:
+            response.encoding = meta["encoding"]
+
+        return response
@@ -0,0 +1,191 @@
+import os
+import pickle
+import threading
+import time
+import zlib
+
+from requests_cache import SQLiteCache
+from requests_cache.serializers import SerializerPipeline, Stage
+from requests_cache.serializers.preconf import base_stage
+
+
+def get_compressed_serializer(compression_level=6):
+    # The pickle serializer of requests_cache with a zlib stage at the end
+    return SerializerPipeline(
+        [base_stage, Stage(pickle), Stage(dumps=lambda value: zlib.compress(value, compression_level), loads=zlib.decompress)],
+        name="pickle_zlib",
+        is_binary=True,
+    )
+
+
+class CacheState(object):
+    # Total size and metrics shared by every BoundedSQLiteCache of the same file in this process,
+    # there can be one per thread
+
+    _states = {}
+    _states_lock = threading.Lock()
+
+    def __init__(self):
+        self.total_size = None
+        # The schema and the lru backfill only run for the first cache of the file
+        self.initialized = False
+        self.lock = threading.Lock()
+        # Time spent in reads and writes grows with the contention on the file
+        self.metrics = {"reads": 0, "read_seconds": 0.0, "writes": 0, "write_seconds": 0.0, "max_write_seconds": 0.0, "evicted": 0}
+
+    @staticmethod
+    def get(db_path):
+        with CacheState._states_lock:
+            return CacheState._states.setdefault(os.path.abspath(str(db_path)), CacheState())
+
+    def add_metric(self, name, seconds):
+        with self.lock:
+            self.metrics[f"{name}s"] += 1
+            self.metrics[f"{name}_seconds"] += seconds
+            if name == "write":
+                self.metrics["max_write_seconds"] = max(self.metrics["max_write_seconds"], seconds)
+
+
+class BoundedSQLiteCache(SQLiteCache):
+    # SQLite backend for requests_cache that compresses every response and keeps the total size of
+    # the stored responses under max_size bytes. When a save goes over it, the least recently used
+    # responses are deleted until the total is back under max_size * eviction_ratio, and the freed
+    # pages are given back to the file system with an incremental vacuum.
+    #
+    # Reads only update the access times in memory; they are written along with the next save.
+    #
+    # The total size is kept in the database too (lru_total), so several processes sharing the file,
+    # like the workers of the API, keep it under max_size together.
+
+    def __init__(self, db_path, max_size=512 * 1024 * 1024, eviction_ratio=0.8, compression_level=6, **kwargs):
+        self.max_size = max_size
+        self.eviction_ratio = eviction_ratio
+
+        super().__init__(db_path, serializer=get_compressed_serializer(compression_level), **kwargs)
+
+        self.state = CacheState.get(self.responses.db_path)
+        self._accessed = {}
+        self._accessed_lock = threading.Lock()
+
+        with self.state.lock:
+            if not self.state.initialized:
+                self._init_db()
+                self.state.total_size = self._get_total_size()
+                self.state.initialized = True
+
+    def _init_db(self):
+        with self.responses.connection() as con:
+            # auto_vacuum can only be changed before the first table is created, or with a full VACUUM
+            if con.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                con.execute("VACUUM")
+
+        with self.responses.connection(commit=True) as con:
+            con.execute("CREATE TABLE IF NOT EXISTS lru (key TEXT PRIMARY KEY, size INTEGER, accessed REAL)")
+            con.execute("CREATE INDEX IF NOT EXISTS lru_accessed_idx ON lru(accessed)")
+            con.execute("CREATE TABLE IF NOT EXISTS lru_total (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER)")
+            # Responses saved before the cache was bounded are the first to go
+            con.execute(f"INSERT OR IGNORE INTO lru (key, size, accessed) SELECT key, length(value), 0 FROM {self.responses.table_name}")
+            con.execute("INSERT OR REPLACE INTO lru_total (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM lru")
+
+    def _get_total_size(self):
+        with self.responses.connection() as con:
+            return con.execute("SELECT COALESCE(SUM(size), 0) FROM lru_total").fetchone()[0]
+
+    def get_response(self, key, default=None):
+        start = time.perf_counter()
+        response = super().get_response(key, default=default)
+        self.state.add_metric("read", time.perf_counter() - start)
+
+        if response is not default:
+            with self._accessed_lock:
+                self._accessed[key] = time.time()
+        return response
+
+    def save_response(self, response, cache_key=None, expires=None):
+        start = time.perf_counter()
+        cache_key = cache_key or self.create_key(response.request)
+        super().save_response(response, cache_key=cache_key, expires=expires)
+
+        with self._accessed_lock:
+            accessed, self._accessed = self._accessed, {}
+        accessed[cache_key] = time.time()
+
+        table_name = self.responses.table_name
+        with self.responses.connection(commit=True) as con:
+            old_size = con.execute("SELECT COALESCE(SUM(size), 0) FROM lru WHERE key = ?", (cache_key,)).fetchone()[0]
+            con.execute(
+                f"INSERT OR REPLACE INTO lru (key, size, accessed) SELECT key, length(value), ? FROM {table_name} WHERE key = ?",
+                (accessed.pop(cache_key), cache_key),
+            )
+            size = con.execute("SELECT COALESCE(SUM(size), 0) FROM lru WHERE key = ?", (cache_key,)).fetchone()[0]
+            con.executemany("UPDATE lru SET accessed = ? WHERE key = ?", [(timestamp, key) for key, timestamp in accessed.items()])
+            # Includes the responses saved by the other processes
+            con.execute("UPDATE lru_total SET size = size + ?", (size - old_size,))
+            total_size = con.execute("SELECT size FROM lru_total").fetchone()[0]
+
+        with self.state.lock:
+            self.state.total_size = total_size
+            over_max_size = self.state.total_size > self.max_size
+
+        if over_max_size:
+            self.evict()
+
+        self.state.add_metric("write", time.perf_counter() - start)
+
+    def evict(self, max_size=None):
+        # Deletes the least recently used responses until their total size is under max_size
+        # (max_size * eviction_ratio by default) and returns the number of deleted responses
+        target_size = self.max_size * self.eviction_ratio if max_size is None else max_size
+        table_name = self.responses.table_name
+
+        with self.responses.connection(commit=True) as con:
+            # Responses deleted by requests_cache itself (expired, revalidated, ...)
+            con.execute(f"DELETE FROM lru WHERE key NOT IN (SELECT key FROM {table_name})")
+            total_size = con.execute("SELECT COALESCE(SUM(size), 0) FROM lru").fetchone()[0]
+
+            keys = []
+            for key, size in con.execute("SELECT key, size FROM lru ORDER BY accessed"):
+                if total_size <= target_size:
+                    break
+                keys.append(key)
+                total_size -= size
+
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                marks = ", ".join("?" * len(chunk))
+                con.execute(f"DELETE FROM {table_name} WHERE key IN ({marks})", chunk)
+                con.execute(f"DELETE FROM lru WHERE key IN ({marks})", chunk)
+
+            con.execute("UPDATE lru_total SET size = ?", (total_size,))
+
+        self._prune_redirects()
+
+        # Outside of the transaction, since it can't run inside one
+        with self.responses.connection() as con:
+            con.execute("PRAGMA incremental_vacuum")
+
+        with self.state.lock:
+            self.state.total_size = total_size
+            self.state.metrics["evicted"] += len(keys)
+
+        return len(keys)
+
+    def get_total_size(self):
+        # Total size in bytes of the stored (compressed) responses
+        total_size = self._get_total_size()
+        with self.state.lock:
+            self.state.total_size = total_size
+        return total_size
+
+    def get_metrics(self):
+        with self.state.lock:
+            return {**self.state.metrics, "total_size": self.state.total_size}
+
+    def clear(self):
+        super().clear()
+        with self.responses.connection(commit=True) as con:
+            con.execute("DELETE FROM lru")
+            con.execute("INSERT OR REPLACE INTO lru_total (id, size) VALUES (0, 0)")
+        with self.state.lock:
+            self.state.total_size = 0
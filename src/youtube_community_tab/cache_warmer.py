@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+
+from .community_tab import CommunityTab
+from .exceptions import CircuitOpenError, NotFoundError
+from .post import Post
+from .requests_handler import requests_cache
+
+
+class RefreshSession(object):
+    # Session for the warmer: every request goes to YouTube even when the cached response is still
+    # fresh, and the new response replaces it in the cache
+    def __init__(self, session=requests_cache):
+        self.session = session
+
+    @property
+    def cookies(self):
+        return self.session.cookies
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, force_refresh=True, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.session.post(url, force_refresh=True, **kwargs)
+
+
+def warm_channel(channel_name, expire_after, session):
+    # The first page of posts, which is what the API loads
+    CommunityTab(channel_name, session=session).load_posts(expire_after=expire_after)
+
+
+def warm_post(post_id, expire_after, session):
+    # The post page and the first comments page, with the likes and comment count
+    post = Post.from_post_id(post_id, expire_after=expire_after, session=session)
+    post.load_comment_count(expire_after=expire_after)
+
+
+class CacheWarmer(object):
+    # Counts how often every channel and post is requested, with a score that halves every
+    # half_life seconds, and refreshes the max_items hottest ones once refresh_ahead of their ttl is
+    # left, so the requests for them keep finding a fresh response in the cache. At most
+    # refreshes_per_minute refreshes are made, the hottest items first.
+    #
+    # The API runs one per worker, but only the worker that holds lock_path refreshes; the requests
+    # it sees are a sample of the traffic of every worker.
+
+    WARMERS = {"channel": warm_channel, "post": warm_post}
+
+    def __init__(
+        self,
+        ttl=10 * 60,
+        refresh_ahead=0.2,
+        max_items=200,
+        refreshes_per_minute=60,
+        half_life=60 * 60,
+        interval=5,
+        max_tracked_items=10000,
+        lock_path=None,
+        session=None,
+    ):
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.max_items = max_items
+        self.refreshes_per_minute = refreshes_per_minute
+        self.half_life = half_life
+        self.interval = interval
+        self.max_tracked_items = max_tracked_items
+        self.lock_path = lock_path
+        self.session = RefreshSession() if session is None else session
+
+        # (kind, key) -> [score, scored_at, fetched_at]
+        self._items = {}
+        self._lock = threading.Lock()
+        self._budget = refreshes_per_minute
+        self._budget_updated_at = time.monotonic()
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.stats = {"refreshes": 0, "failures": 0, "skipped_for_budget": 0}
+
+    def _get_score(self, item, now):
+        score, scored_at, _ = item
+        return score * 0.5 ** ((now - scored_at) / self.half_life)
+
+    def record(self, kind, key):
+        # Called for every request of the API. The first request of an item fetched it, so it's due
+        # a ttl later.
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get((kind, key))
+            if item is None:
+                self._items[(kind, key)] = [1.0, now, now]
+                if len(self._items) > self.max_tracked_items:
+                    self._prune(now)
+            else:
+                item[0] = self._get_score(item, now) + 1
+                item[1] = now
+
+    def _prune(self, now):
+        # Keeps the hottest half of max_tracked_items
+        items = sorted(self._items.items(), key=lambda entry: -self._get_score(entry[1], now))
+        self._items = dict(items[: self.max_tracked_items // 2])
+
+    def get_hot_items(self, n=None):
+        # [((kind, key), score)] of the n hottest items, hottest first
+        now = time.monotonic()
+        with self._lock:
+            scores = [(item_key, self._get_score(item, now)) for item_key, item in self._items.items()]
+        scores.sort(key=lambda entry: -entry[1])
+        return scores[: self.max_items if n is None else n]
+
+    def get_due_items(self):
+        # Hot items whose cached responses expire in less than refresh_ahead * ttl, hottest first
+        now = time.monotonic()
+        refresh_after = self.ttl * (1 - self.refresh_ahead)
+        with self._lock:
+            fetched_at = {item_key: item[2] for item_key, item in self._items.items()}
+        return [item_key for item_key, _ in self.get_hot_items() if now - fetched_at.get(item_key, now) >= refresh_after]
+
+    def _take_budget(self):
+        now = time.monotonic()
+        self._budget = min(self.refreshes_per_minute, self._budget + (now - self._budget_updated_at) * self.refreshes_per_minute / 60)
+        self._budget_updated_at = now
+        if self._budget < 1:
+            return False
+        self._budget -= 1
+        return True
+
+    def refresh(self, kind, key):
+        self.WARMERS[kind](key, self.ttl, self.session)
+        with self._lock:
+            item = self._items.get((kind, key))
+            if item is not None:
+                item[2] = time.monotonic()
+
+    def run_once(self):
+        # Refreshes the due items that fit in the budget and returns how many were refreshed
+        refreshed = 0
+
+        for kind, key in self.get_due_items():
+            if not self._take_budget():
+                self.stats["skipped_for_budget"] += 1
+                break
+
+            try:
+                self.refresh(kind, key)
+                refreshed += 1
+                self.stats["refreshes"] += 1
+            except NotFoundError:
+                with self._lock:
+                    self._items.pop((kind, key), None)
+            except CircuitOpenError:
+                # YouTube is failing, there's no point in trying the next ones now
+                self.stats["failures"] += 1
+                break
+            except Exception as e:
+                print(f"[Can't refresh {kind}={key}: {e}]")
+                self.stats["failures"] += 1
+
+        return refreshed
+
+    def _is_leader(self):
+        if self.lock_path is None:
+            return True
+        if self._lock_file is not None:
+            return True
+
+        try:
+            import fcntl
+        except ImportError:
+            return True
+
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        # Kept open, the lock is released when the process exits
+        self._lock_file = lock_file
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self._is_leader():
+                self.run_once()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            "leader": self._lock_file is not None or self.lock_path is None,
+            "tracked_items": len(self._items),
+            "hot_items": [{"kind": kind, "key": key, "score": score} for (kind, key), score in self.get_hot_items(10)],
+        }
+
+
+def get_lock_path(cache_path):
+    # Next to the cache file shared by the workers
+    return os.path.abspath(cache_path) + ".warmer.lock"
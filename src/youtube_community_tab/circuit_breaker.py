@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from .exceptions import CircuitOpenError
+from .requests_handler import get_timeout, is_deadline_timeout
+
+
+class CircuitBreaker(object):
+    # Fails fast for a key (a channel name, a post id, or None for everything) after failure_threshold
+    # consecutive failures: the circuit opens for cooldown seconds, doubling with every reopening up to
+    # max_cooldown, and before_call raises CircuitOpenError meanwhile. Once the cooldown is over one
+    # call is let through; its success closes the circuit and its failure opens it again.
+    #
+    # Only the max_keys most recently failing keys are remembered.
+
+    def __init__(self, name, failure_threshold=5, cooldown=30, max_cooldown=10 * 60, max_keys=10000):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_keys = max_keys
+
+        # key -> {"failures", "opens", "open_until"}
+        self._circuits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def before_call(self, key=None):
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit["open_until"] is None:
+                return
+
+            now = time.monotonic()
+            if now < circuit["open_until"]:
+                raise CircuitOpenError(self.name, key, circuit["open_until"] - now)
+
+            # Half-open: this call goes through, the others keep failing fast until it's recorded
+            circuit["open_until"] = now + self.cooldown
+
+    def record_success(self, key=None):
+        with self._lock:
+            self._circuits.pop(key, None)
+
+    def record_failure(self, key=None):
+        with self._lock:
+            circuit = self._circuits.pop(key, None) or {"failures": 0, "opens": 0, "open_until": None}
+            self._circuits[key] = circuit
+            if len(self._circuits) > self.max_keys:
+                self._circuits.popitem(last=False)
+
+            circuit["failures"] += 1
+            if circuit["failures"] >= self.failure_threshold:
+                circuit["opens"] += 1
+                circuit["open_until"] = time.monotonic() + min(self.cooldown * 2 ** (circuit["opens"] - 1), self.max_cooldown)
+
+    def is_open(self, key=None):
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return circuit is not None and circuit["open_until"] is not None and time.monotonic() < circuit["open_until"]
+
+    def get_stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "failing": len(self._circuits),
+                "open": {str(key): circuit["open_until"] - now for key, circuit in self._circuits.items() if circuit["open_until"] and now < circuit["open_until"]},
+            }
+
+
+class NegativeCache(object):
+    # Remembers the keys that don't exist (the error raised for them) for ttl seconds, at most max_size of them
+
+    def __init__(self, ttl=60 * 60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class CircuitBreakerAdapter(HTTPAdapter):
+    # HTTPAdapter that counts 429, 5xx and connection errors as failures of the circuit breaker, and
+    # fails fast while it's open. Responses served from the cache never get here, so they keep
+    # working during an outage.
+
+    def __init__(self, circuit_breaker=None, **kwargs):
+        super().__init__(**kwargs)
+        self.circuit_breaker = upstream_circuit_breaker if circuit_breaker is None else circuit_breaker
+
+    def send(self, request, **kwargs):
+        self.circuit_breaker.before_call()
+
+        # A request without a timeout could hang forever
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = get_timeout()
+
+        try:
+            r = super().send(request, **kwargs)
+        except RequestException as e:
+            if not is_deadline_timeout(e, kwargs["timeout"]):
+                self.circuit_breaker.record_failure()
+            raise e
+
+        if r.status_code == 429 or r.status_code >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+        return r
+
+
+# Every request to YouTube, through CircuitBreakerAdapter
+upstream_circuit_breaker = CircuitBreaker("upstream", failure_threshold=10, cooldown=30)
+# Channels and posts whose pages keep failing
+item_circuit_breaker = CircuitBreaker("item", failure_threshold=3, cooldown=60)
+# Posts that don't exist, channels are kept in the ResolutionCache
+post_negative_cache = NegativeCache(ttl=60 * 60)
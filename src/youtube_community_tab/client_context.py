@@ -0,0 +1,72 @@
+import json
+import re
+import threading
+import time
+
+from .helpers.utils import safely_get_value_from_key
+from .requests_handler import LazySession, get_timeout, is_timeout
+
+
+class ClientContext(object):
+    # visitor_data and session_index are the same for every request of a session, so they are kept
+    # here instead of being scraped again for every CommunityTab and Post. They are updated from every
+    # page and browse response that goes through the session, and the home page is only downloaded
+    # when there is no visitor_data yet or it's older than ttl.
+
+    BOOTSTRAP_URL = "https://www.youtube.com/"
+    YT_INITIAL_DATA_REGEX = "ytInitialData = ({(?:(?:.|\n)*)?});</script>"
+
+    def __init__(self, visitor_data=None, session_index="0", ttl=6 * 60 * 60):
+        self.visitor_data = visitor_data
+        self.session_index = session_index
+        self.ttl = ttl
+        self.updated_at = time.monotonic() if visitor_data is not None else None
+        self.bootstraps = 0
+        self._lock = threading.Lock()
+
+    def is_expired(self):
+        return self.updated_at is None or time.monotonic() - self.updated_at > self.ttl
+
+    def update_from_data(self, data):
+        # data is the ytInitialData of a page or the json of a browse response
+        visitor_data = safely_get_value_from_key(data, "responseContext", "webResponseContextExtensionData", "ytConfigData", "visitorData")
+        if visitor_data is None:
+            visitor_data = safely_get_value_from_key(data, "responseContext", "visitorData")
+        session_index = safely_get_value_from_key(data, "responseContext", "webResponseContextExtensionData", "ytConfigData", "sessionIndex")
+
+        with self._lock:
+            if visitor_data is not None:
+                self.visitor_data = visitor_data
+                self.updated_at = time.monotonic()
+            if session_index not in (None, ""):
+                self.session_index = str(session_index)
+
+    def bootstrap(self, session, expire_after=0, deadline=None):
+        r = session.get(ClientContext.BOOTSTRAP_URL, expire_after=expire_after, timeout=get_timeout(deadline))
+        m = re.findall(ClientContext.YT_INITIAL_DATA_REGEX, r.text)
+        self.update_from_data(json.loads(m[0]))
+        self.bootstraps += 1
+
+    def get_visitor_data(self, session, deadline=None):
+        if self.is_expired():
+            try:
+                self.bootstrap(session, deadline=deadline)
+            except Exception as e:
+                # The caller stops or truncates at its deadline
+                if deadline is not None and is_timeout(e):
+                    raise e
+                # Browse requests also work without visitorData
+                print(f"[Can't bootstrap the client context: {e}]")
+        return self.visitor_data
+
+
+# Context of the default session, shared by every thread since they share the cookies
+client_context = ClientContext()
+
+
+def get_client_context(session):
+    # Accounts of a SessionPool carry their own context, everything else uses the default one
+    if session is None or isinstance(session, LazySession):
+        return client_context
+    context = getattr(session, "client_context", None)
+    return client_context if context is None else context
@@ -1,13 +1,25 @@
 import json
+import time
 from requests.utils import dict_from_cookiejar
 from base64 import urlsafe_b64encode
 
-from .requests_handler import requests_cache
+from .requests_handler import requests_cache, get_timeout, is_timeout
+from .client_context import get_client_context
 from .helpers.utils import safely_get_value_from_key, get_auth_header, CLIENT_VERSION
+from .helpers.lazy import lazy_attribute, deferred_or_value
+from .helpers.prefetch import read_ahead
+from .helpers.projection import get_json_fields
 from .reply import Reply
 
 
 class Comment(object):
+    author = lazy_attribute()
+    content_text = lazy_attribute()
+    vote_count = lazy_attribute()
+
+    # Keys of as_json()
+    JSON_FIELDS = ("comment_id", "post_id", "channel_id", "author", "content_text", "vote_count")
+
     FORMAT_URLS = {
         "POST": "https://www.youtube.com/post/{}",
         # HARD_CODED: This key seems to be constant to everyone, IDK
@@ -29,6 +41,7 @@ class Comment(object):
         click_tracking_params=None,
         visitor_data=None,
         session_index="0",
+        session=None,
     ):
         self.post_id = post_id
         self.comment_id = comment_id
@@ -41,8 +54,22 @@ class Comment(object):
         self.visitor_data = visitor_data
         self.session_index = session_index
         self.replies = []
+        # True when the last iter_reply_pages stopped at its deadline with replies left
+        self.truncated = False
+        self.search_index = None
+        self.sink = None
+        self.lazy = False
+        self.session = requests_cache if session is None else session
+
+    @property
+    def client_context(self):
+        return get_client_context(self.session)
+
+    def as_json(self, fields=None):
+        # Same fields as Post.as_json
+        if fields is not None:
+            return get_json_fields(self, Comment.JSON_FIELDS, fields)
 
-    def as_json(self):
         return {
             "comment_id": self.comment_id,
             "post_id": self.post_id,
@@ -63,17 +90,19 @@ class Comment(object):
             return "".join([run["text"] for run in self.content_text["runs"]])
         return None
 
-    def load_replies(self, expire_after=0):
+    def load_replies(self, expire_after=0, deadline=None):
         headers = {
             "x-origin": "https://www.youtube.com",
             "Referer": Comment.FORMAT_URLS["POST"].format(self.post_id),
         }
 
         # Add authorization header
-        current_cookies = dict_from_cookiejar(requests_cache.cookies)
+        current_cookies = dict_from_cookiejar(self.session.cookies)
         if "SAPISID" in current_cookies:
             headers["Authorization"] = get_auth_header(current_cookies["SAPISID"])
 
+        replies = []
+
         if self.replies_continuation_token:
             headers.update(
                 {
@@ -90,29 +119,68 @@ class Comment(object):
                         "clientName": "WEB",
                         "clientVersion": CLIENT_VERSION,
                         "originalUrl": Comment.FORMAT_URLS["POST"].format(self.post_id),
-                        "visitorData": self.visitor_data,
+                        "visitorData": self.visitor_data or self.client_context.get_visitor_data(self.session, deadline=deadline),
                     }
                 },
                 "continuation": self.replies_continuation_token,
                 "clickTracking": {"clickTrackingParams": self.click_tracking_params},
             }
 
-            r = requests_cache.post(Comment.FORMAT_URLS["BROWSE_ENDPOINT"], json=json_body, expire_after=expire_after, headers=headers)
+            r = self.session.post(
+                Comment.FORMAT_URLS["BROWSE_ENDPOINT"], json=json_body, expire_after=expire_after, headers=headers, timeout=get_timeout(deadline)
+            )
 
             data = r.json()
+            self.client_context.update_from_data(data)
             append = safely_get_value_from_key(data, "onResponseReceivedEndpoints", 0, "appendContinuationItemsAction", default=[])
             self.click_tracking_params = data["trackingParams"]
             continuation_items = safely_get_value_from_key(append, "continuationItems", default=[])
 
-            self.append_replies_from_items(continuation_items)
+            replies = self.append_replies_from_items(continuation_items)
+
+        return replies
+
+    def iter_reply_pages(self, expire_after=0, max_replies=None, max_pages=None, deadline=None, prefetch=0):
+        # Yields the replies parsed from each page, with the same limits and prefetch as Post.iter_comment_pages
+        # Most comments have no replies, there is no need for a thread then
+        if prefetch and self.replies_continuation_token:
+            yield from read_ahead(self.iter_reply_pages(expire_after=expire_after, max_replies=max_replies, max_pages=max_pages, deadline=deadline), prefetch)
+            return
+
+        loaded_replies = 0
+        loaded_pages = 0
+        self.truncated = False
+
+        while self.replies_continuation_token:
+            if max_replies is not None and loaded_replies >= max_replies:
+                break
+            if max_pages is not None and loaded_pages >= max_pages:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                self.truncated = True
+                break
+
+            try:
+                replies = self.load_replies(expire_after=expire_after, deadline=deadline)
+            except Exception as e:
+                # The pages loaded so far are kept
+                if deadline is None or not is_timeout(e):
+                    raise e
+                self.truncated = True
+                break
+            loaded_replies += len(replies)
+            loaded_pages += 1
+
+            yield replies
 
     def append_replies_from_items(self, items):
+        replies = []
         there_is_no_continuation_token = True
         for item in items:
             kind = list(item.keys())[0]
 
             if kind == "commentRenderer":
-                self.replies.append(Reply.from_data(item[kind]))
+                replies.append(Reply.from_data(item[kind], lazy=self.lazy))
             elif kind == "continuationItemRenderer":
                 if "continuationEndpoint" in item[kind]:
                     self.replies_continuation_token = item[kind]["continuationEndpoint"]["continuationCommand"]["token"]
@@ -124,25 +192,33 @@ class Comment(object):
         if there_is_no_continuation_token:
             self.replies_continuation_token = False
 
+        # With a sink, replies are handed over instead of being kept in self.replies
+        if self.sink is None:
+            self.replies += replies
+        else:
+            for reply in replies:
+                self.sink(reply)
+
+        if self.search_index is not None:
+            self.search_index.add_replies(replies, post_id=self.post_id, channel_id=self.channel_id)
+
+        return replies
+
     @staticmethod
-    def from_data(data, post_id, channel_id, replies_continuation_token, click_tracking_params, visitor_data, session_index):
+    def from_data(data, post_id, channel_id, replies_continuation_token, click_tracking_params, visitor_data, session_index, lazy=False, session=None):
+        # lazy=True reads author, content_text and vote_count from data the first time they're accessed
         comment = Comment(
             post_id,
             data["commentId"],
             channel_id=channel_id,
-            content_text=safely_get_value_from_key(data, "contentText"),
-            author={
-                "authorText": safely_get_value_from_key(data, "authorText"),
-                "authorThumbnail": safely_get_value_from_key(data, "authorThumbnail"),
-                "authorEndpoint": safely_get_value_from_key(data, "authorEndpoint", "browseEndpoint"),
-                "authorIsChannelOwner": safely_get_value_from_key(data, "authorIsChannelOwner"),
-                "sponsorCommentBadge": safely_get_value_from_key(data, "sponsorCommentBadge"),
-            },
-            vote_count=safely_get_value_from_key(data, "voteCount"),
+            content_text=deferred_or_value(lambda: safely_get_value_from_key(data, "contentText"), lazy),
+            author=deferred_or_value(lambda: Reply.get_author_from_data(data), lazy),
+            vote_count=deferred_or_value(lambda: safely_get_value_from_key(data, "voteCount"), lazy),
             replies_continuation_token=replies_continuation_token,
             click_tracking_params=click_tracking_params,
             visitor_data=visitor_data,
             session_index=session_index,
+            session=session,
         )
 
         comment.raw_data = data
@@ -195,7 +271,8 @@ class Comment(object):
         return params
 
     @staticmethod
-    def from_ids(comment_id, post_id, channel_id, expire_after=0):
+    def from_ids(comment_id, post_id, channel_id, expire_after=0, session=None, deadline=None):
+        session = requests_cache if session is None else session
         fixed_comment_url = Comment.FORMAT_URLS["FIXED_COMMENT"].format(channel_id, comment_id, post_id)
         headers = {
             "x-origin": "https://www.youtube.com",
@@ -203,7 +280,7 @@ class Comment(object):
         }
 
         # Add authorization header
-        current_cookies = dict_from_cookiejar(requests_cache.cookies)
+        current_cookies = dict_from_cookiejar(session.cookies)
         if "SAPISID" in current_cookies:
             headers["Authorization"] = get_auth_header(current_cookies["SAPISID"])
 
@@ -220,7 +297,7 @@ class Comment(object):
             "continuation": c,
         }
 
-        r = requests_cache.post(Comment.FORMAT_URLS["BROWSE_ENDPOINT"], json=json_body, expire_after=expire_after, headers=headers)
+        r = session.post(Comment.FORMAT_URLS["BROWSE_ENDPOINT"], json=json_body, expire_after=expire_after, headers=headers, timeout=get_timeout(deadline))
 
         comment_data = safely_get_value_from_key(
             r.json(), "onResponseReceivedEndpoints", 1, "reloadContinuationItemsCommand", "continuationItems", 0, "commentThreadRenderer"
@@ -254,6 +331,7 @@ class Comment(object):
                 ),
                 None,
                 None,
+                session=session,
             )
 
     @staticmethod
@@ -275,18 +353,19 @@ class Comment(object):
         return params
 
     def update_comment(self, comment_text):
-        return Comment._update_comment(comment_text, comment_id=self.comment_id, post_id=self.post_id, channel_id=self.channel_id)
+        return Comment._update_comment(comment_text, comment_id=self.comment_id, post_id=self.post_id, channel_id=self.channel_id, session=self.session)
 
     @staticmethod
-    def _update_comment(comment_text, update_comment_params=None, comment_id=None, post_id=None, channel_id=None):
+    def _update_comment(comment_text, update_comment_params=None, comment_id=None, post_id=None, channel_id=None, session=None):
         if update_comment_params is None:
             update_comment_params = Comment.get_update_comment_params(comment_id, post_id, channel_id)
+        session = requests_cache if session is None else session
 
         headers = {
             "x-origin": "https://www.youtube.com",
         }
 
-        current_cookies = dict_from_cookiejar(requests_cache.cookies)
+        current_cookies = dict_from_cookiejar(session.cookies)
         if "SAPISID" in current_cookies:
             headers["Authorization"] = get_auth_header(current_cookies["SAPISID"])
 
@@ -301,10 +380,13 @@ class Comment(object):
             "commentText": comment_text,
         }
 
-        r = requests_cache.post(
+        r = session.post(
             Comment.FORMAT_URLS["UPDATE_COMMENT_ENDPOINT"],
             json=json_body,
             headers=headers,
+            # Actions must never be answered from the cache
+            expire_after=0,
+            timeout=get_timeout(),
         )
 
         return r.json()
@@ -329,14 +411,14 @@ class Comment(object):
         return params
 
     def delete_comment(self):
-        return Comment._delete_comment(comment_id=self.comment_id, post_id=self.post_id, channel_id=self.channel_id)
+        return Comment._delete_comment(comment_id=self.comment_id, post_id=self.post_id, channel_id=self.channel_id, session=self.session)
 
     @staticmethod
-    def _delete_comment(delete_comment_params=None, comment_id=None, post_id=None, channel_id=None):
+    def _delete_comment(delete_comment_params=None, comment_id=None, post_id=None, channel_id=None, session=None):
         if delete_comment_params is None:
             delete_comment_params = Comment.get_delete_comment_params(comment_id, post_id, channel_id)
 
-        return Comment.perform_action(delete_comment_params)
+        return Comment.perform_action(delete_comment_params, session=session)
 
     @staticmethod
     def get_dislike_comment_params(value, comment_id, post_id, channel_id):
@@ -360,14 +442,14 @@ class Comment(object):
         return params
 
     def set_dislike_comment(self, value=True):
-        return Comment._set_dislike_comment(value, comment_id=self.comment_id, post_id=self.post_id, channel_id=self.channel_id)
+        return Comment._set_dislike_comment(value, comment_id=self.comment_id, post_id=self.post_id, channel_id=self.channel_id, session=self.session)
 
     @staticmethod
-    def _set_dislike_comment(value, dislike_comment_params=None, comment_id=None, post_id=None, channel_id=None):
+    def _set_dislike_comment(value, dislike_comment_params=None, comment_id=None, post_id=None, channel_id=None, session=None):
         if dislike_comment_params is None:
             dislike_comment_params = Comment.get_dislike_comment_params(value, comment_id, post_id, channel_id)
 
-        return Comment.perform_action(dislike_comment_params)
+        return Comment.perform_action(dislike_comment_params, session=session)
 
     @staticmethod
     def get_like_comment_params(value, comment_id, post_id, channel_id):
@@ -391,22 +473,23 @@ class Comment(object):
         return params
 
     def set_like_comment(self, value=True):
-        return Comment._set_like_comment(value, comment_id=self.comment_id, post_id=self.post_id, channel_id=self.channel_id)
+        return Comment._set_like_comment(value, comment_id=self.comment_id, post_id=self.post_id, channel_id=self.channel_id, session=self.session)
 
     @staticmethod
-    def _set_like_comment(value, like_comment_params=None, comment_id=None, post_id=None, channel_id=None):
+    def _set_like_comment(value, like_comment_params=None, comment_id=None, post_id=None, channel_id=None, session=None):
         if like_comment_params is None:
             like_comment_params = Comment.get_like_comment_params(value, comment_id, post_id, channel_id)
 
-        return Comment.perform_action(like_comment_params)
+        return Comment.perform_action(like_comment_params, session=session)
 
     @staticmethod
-    def perform_action(action_params):
+    def perform_action(action_params, session=None):
+        session = requests_cache if session is None else session
         headers = {
             "x-origin": "https://www.youtube.com",
         }
 
-        current_cookies = dict_from_cookiejar(requests_cache.cookies)
+        current_cookies = dict_from_cookiejar(session.cookies)
         if "SAPISID" in current_cookies:
             headers["Authorization"] = get_auth_header(current_cookies["SAPISID"])
 
@@ -422,10 +505,13 @@ class Comment(object):
             ],
         }
 
-        r = requests_cache.post(
+        r = session.post(
             Comment.FORMAT_URLS["PERFORM_COMMENT_ACTION_ENDPOINT"],
             json=json_body,
             headers=headers,
+            # Actions must never be answered from the cache
+            expire_after=0,
+            timeout=get_timeout(),
         )
 
         return r.json()
@@ -0,0 +1,228 @@
+import heapq
+from array import array
+
+from .helpers.utils import safely_get_value_from_key, parse_count_texts
+
+
+def get_numpy():
+    # numpy is optional, the queries fall back to plain python without it
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class CommentStore(object):
+    # Columnar store of comments and replies for analytics, filled straight from the browse responses
+    # of the comment and reply pages, without creating a Comment or Reply per item. Every column is an
+    # array with one row per comment:
+    #
+    #   comment_ids   list of str
+    #   author_ids    index in authors (the interned channel ids of the authors), -1 when unknown
+    #   vote_counts   parsed vote count
+    #   reply_counts  parsed reply count, 0 for replies
+    #   parents       row of the parent comment for replies, -1 for comments and -2 for replies
+    #                 whose comment is not in the store
+    #
+    # The counts of a page are parsed together with parse_count_texts. With numpy installed,
+    # to_numpy() returns the columns without copying them, and the queries use it.
+
+    COLUMNS = ("author_ids", "vote_counts", "reply_counts", "parents")
+
+    def __init__(self):
+        self.comment_ids = []
+        self.authors = []
+        self.author_ids = array("q")
+        self.vote_counts = array("q")
+        self.reply_counts = array("q")
+        self.parents = array("q")
+
+        self._rows = {}
+        self._author_indices = {}
+
+    def __len__(self):
+        return len(self.comment_ids)
+
+    def _get_author_index(self, author):
+        if author is None:
+            return -1
+        index = self._author_indices.get(author)
+        if index is None:
+            index = self._author_indices[author] = len(self.authors)
+            self.authors.append(author)
+        return index
+
+    @staticmethod
+    def get_rows_from_data(data):
+        # Returns ([(comment_id, parent_id, author, vote_count_text, reply_count_text)], continuation_token)
+        # from a browse response of comments or replies
+        rows = []
+        continuation_token = None
+
+        continuation_items = []
+        for endpoint in safely_get_value_from_key(data, "onResponseReceivedEndpoints", default=[]):
+            for action in endpoint.values():
+                if isinstance(action, dict):
+                    continuation_items += safely_get_value_from_key(action, "continuationItems", default=[])
+
+        for item in continuation_items:
+            kind = list(item.keys())[0]
+
+            if kind == "continuationItemRenderer":
+                continuation_token = safely_get_value_from_key(item[kind], "continuationEndpoint", "continuationCommand", "token", default=continuation_token)
+            elif kind in ("commentThreadRenderer", "commentRenderer"):
+                if kind == "commentThreadRenderer":
+                    comment = safely_get_value_from_key(item[kind], "commentViewModel", "commentViewModel") or safely_get_value_from_key(
+                        item[kind], "comment", "commentRenderer"
+                    )
+                else:
+                    comment = item[kind]
+
+                comment_id = safely_get_value_from_key(comment, "commentId")
+                if comment_id is None:
+                    continue
+
+                rows.append(
+                    (
+                        comment_id,
+                        comment_id.split(".")[0] if "." in comment_id else None,
+                        safely_get_value_from_key(comment, "authorEndpoint", "browseEndpoint", "browseId"),
+                        safely_get_value_from_key(comment, "voteCount", "simpleText"),
+                        safely_get_value_from_key(comment, "replyCount"),
+                    )
+                )
+
+        # Newer responses only have a commentKey in the items, the comments come as entity mutations
+        for mutation in safely_get_value_from_key(data, "frameworkUpdates", "entityBatchUpdate", "mutations", default=[]):
+            payload = safely_get_value_from_key(mutation, "payload", "commentEntityPayload")
+            comment_id = safely_get_value_from_key(payload, "properties", "commentId")
+            if comment_id is None:
+                continue
+
+            rows.append(
+                (
+                    comment_id,
+                    comment_id.split(".")[0] if "." in comment_id else None,
+                    safely_get_value_from_key(payload, "author", "channelId"),
+                    safely_get_value_from_key(payload, "toolbar", "likeCountNotliked"),
+                    safely_get_value_from_key(payload, "toolbar", "replyCount"),
+                )
+            )
+
+        return rows, continuation_token
+
+    def add_page(self, data):
+        # Adds the comments of a browse response and returns its continuation token (None on the last page).
+        # Comments that are already in the store are updated.
+        rows, continuation_token = CommentStore.get_rows_from_data(data)
+
+        vote_counts = parse_count_texts([row[3] for row in rows])
+        reply_counts = parse_count_texts([row[4] for row in rows])
+
+        for (comment_id, parent_id, author, _, _), vote_count, reply_count in zip(rows, vote_counts, reply_counts):
+            author_id = self._get_author_index(author)
+            parent = -1 if parent_id is None else self._rows.get(parent_id, -2)
+
+            row = self._rows.get(comment_id)
+            if row is None:
+                self._rows[comment_id] = len(self.comment_ids)
+                self.comment_ids.append(comment_id)
+                self.author_ids.append(author_id)
+                self.vote_counts.append(vote_count)
+                self.reply_counts.append(reply_count)
+                self.parents.append(parent)
+            else:
+                self.author_ids[row] = author_id
+                self.vote_counts[row] = vote_count
+                self.reply_counts[row] = reply_count
+                self.parents[row] = parent
+
+        return continuation_token
+
+    def load_post_comments(self, post, expire_after=0, max_pages=None):
+        # Loads the comment pages of a Post into the store and returns the number of pages. The
+        # continuation token of the post is left where it stopped, so it can be called again.
+        loaded_pages = 0
+
+        if post.comments_continuation_token is None:
+            post.load_first_comments_data(expire_after=expire_after)
+
+        while post.comments_continuation_token and (max_pages is None or loaded_pages < max_pages):
+            data = post.fetch_next_comments_data(expire_after=expire_after)
+            post.comments_continuation_token = self.add_page(data) or False
+            post.first = False
+            loaded_pages += 1
+
+        return loaded_pages
+
+    def get_row(self, comment_id):
+        row = self._rows[comment_id]
+        author_id = self.author_ids[row]
+        parent = self.parents[row]
+
+        return {
+            "comment_id": comment_id,
+            "author": self.authors[author_id] if author_id >= 0 else None,
+            "vote_count": self.vote_counts[row],
+            "reply_count": self.reply_counts[row],
+            "parent_id": comment_id.split(".")[0] if parent != -1 else None,
+        }
+
+    def to_numpy(self):
+        # {column: numpy array} sharing the memory of the store. The arrays can't grow while they're
+        # referenced, so drop them (or copy them) before the next add_page.
+        numpy = get_numpy()
+        if numpy is None:
+            raise Exception("[CommentStore.to_numpy needs numpy, pip install numpy]")
+        return {column: numpy.frombuffer(getattr(self, column), dtype=numpy.int64) for column in CommentStore.COLUMNS}
+
+    def group_by_author(self):
+        # {author: (number of comments and replies, total votes)}
+        numpy = get_numpy()
+
+        if numpy is not None and len(self):
+            columns = self.to_numpy()
+            known = columns["author_ids"] >= 0
+            author_ids = columns["author_ids"][known]
+            counts = numpy.bincount(author_ids, minlength=len(self.authors))
+            votes = numpy.bincount(author_ids, weights=columns["vote_counts"][known], minlength=len(self.authors))
+            return {author: (int(counts[i]), int(votes[i])) for i, author in enumerate(self.authors) if counts[i]}
+
+        counts = [0] * len(self.authors)
+        votes = [0] * len(self.authors)
+        for author_id, vote_count in zip(self.author_ids, self.vote_counts):
+            if author_id >= 0:
+                counts[author_id] += 1
+                votes[author_id] += vote_count
+        return {author: (counts[i], votes[i]) for i, author in enumerate(self.authors) if counts[i]}
+
+    def top_k(self, k, column="vote_counts", replies=True):
+        # comment_ids of the k rows with the highest values of column, highest first
+        if column not in ("vote_counts", "reply_counts"):
+            raise ValueError(f"[Can't rank by {column}, only by vote_counts or reply_counts]")
+        if k <= 0:
+            return []
+
+        values = getattr(self, column)
+        numpy = get_numpy()
+
+        if numpy is not None:
+            columns = self.to_numpy()
+            rows = numpy.arange(len(self)) if replies else numpy.flatnonzero(columns["parents"] == -1)
+            if len(rows) > k:
+                # Only the candidates are sorted in python: the rows with at least the k-th highest
+                # value, ties included, so they are broken by row like without numpy
+                row_values = columns[column][rows]
+                rows = rows[row_values >= numpy.partition(row_values, len(rows) - k)[len(rows) - k]]
+            rows = rows.tolist()
+        else:
+            rows = range(len(self)) if replies else [row for row, parent in enumerate(self.parents) if parent == -1]
+
+        return [self.comment_ids[row] for row in heapq.nsmallest(k, rows, key=lambda row: (-values[row], row))]
+
+    def top_authors(self, k, by="votes"):
+        # [(author, comments, votes)] of the k authors with the most votes (by="votes") or comments (by="comments")
+        groups = self.group_by_author()
+        index = 1 if by == "votes" else 0
+        return [(author, *groups[author]) for author in heapq.nlargest(k, groups, key=lambda author: groups[author][index])]
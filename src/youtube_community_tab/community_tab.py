@@ -1,9 +1,15 @@
 import json
 import re
+import time
 from requests.utils import dict_from_cookiejar
 
 from .helpers.utils import safely_get_value_from_key, get_auth_header, CLIENT_VERSION, search_key
-from .requests_handler import requests_cache
+from .helpers.prefetch import read_ahead
+from .requests_handler import requests_cache, get_timeout, is_deadline_timeout, is_timeout
+from .client_context import get_client_context
+from .resolution_cache import resolution_cache
+from .circuit_breaker import item_circuit_breaker
+from .exceptions import ChannelNotFoundError, CircuitOpenError, DeadlineExceededError, NotFoundError, UpstreamError
 from .post import Post
 
 
@@ -18,39 +24,78 @@ class CommunityTab(object):
         "YT_INITIAL_DATA": "ytInitialData = ({(?:(?:.|\n)*)?});</script>",
     }
 
-    def __init__(self, channel_name):
+    def __init__(self, channel_name, session=None):
         self.channel_name = channel_name
+        # Any object with get, post and cookies, like an Account of a SessionPool
+        self.session = requests_cache if session is None else session
 
         self.posts_continuation_token = None
         self.click_tracking_params = None
-        self.visitor_data = None
-        self.session_index = "0"
+        self.visitor_data = self.client_context.visitor_data
+        self.session_index = self.client_context.session_index
         self.posts = []
+        # True when the last iter_post_pages stopped at its deadline with pages left
+        self.truncated = False
         self.community_url = None
         self.channel_id = None
+        self.resolution_cache = resolution_cache
+        self.circuit_breaker = item_circuit_breaker
+        self.search_index = None
+        self.sink = None
+        self.clean = True
+        self.lazy = False
 
-    def load_posts(self, expire_after=0):
+    @property
+    def client_context(self):
+        return get_client_context(self.session)
+
+    def load_posts(self, expire_after=0, deadline=None):
+        # deadline (a time.monotonic() timestamp) bounds the timeouts of the request, see get_timeout
         headers = {"Referer": self.community_url}
 
         # Add authorization header
-        current_cookies = dict_from_cookiejar(requests_cache.cookies)
+        current_cookies = dict_from_cookiejar(self.session.cookies)
         if "SAPISID" in current_cookies:
             headers["Authorization"] = get_auth_header(current_cookies["SAPISID"])
 
+        posts = []
+
         if self.posts_continuation_token is None:
+            timeout = None
             try:
-                # Get posts from community tab enpoint
-                self.community_url = CommunityTab.FORMAT_URLS["COMMUNITY_TAB"].format("c", self.channel_name)
-                r = requests_cache.get(self.community_url, expire_after=expire_after, headers=headers)
-                if r.status_code != 200:
-                    self.community_url = CommunityTab.FORMAT_URLS["COMMUNITY_TAB"].format("channel", self.channel_name)
-                    r = requests_cache.get(self.community_url, expire_after=expire_after, headers=headers)
+                resolution = self.resolution_cache.get(self.channel_name) if self.resolution_cache is not None else None
 
-                if r.status_code != 200:
-                    import sys
+                if resolution is not None and resolution["community_url"] is None:
+                    raise ChannelNotFoundError(self.channel_name, cached=True)
+
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.before_call(self.channel_name)
+
+                # Get posts from community tab enpoint, starting with the url that worked last time
+                community_urls = [
+                    CommunityTab.FORMAT_URLS["COMMUNITY_TAB"].format("c", self.channel_name),
+                    CommunityTab.FORMAT_URLS["COMMUNITY_TAB"].format("channel", self.channel_name),
+                ]
+                if resolution is not None:
+                    if self.channel_id is None:
+                        self.channel_id = resolution["channel_id"]
+                    if resolution["community_url"] in community_urls:
+                        community_urls.remove(resolution["community_url"])
+                    community_urls.insert(0, resolution["community_url"])
+
+                for community_url in community_urls:
+                    self.community_url = community_url
+                    timeout = get_timeout(deadline)
+                    r = self.session.get(self.community_url, expire_after=expire_after, headers=headers, timeout=timeout)
+                    # The other url would fail the same way when YouTube is down
+                    if r.status_code == 200 or r.status_code == 429 or r.status_code >= 500:
+                        break
+
+                if r.status_code == 429 or r.status_code >= 500:
+                    raise UpstreamError(f"[YouTube answered {r.status_code} for the channel_name: {self.channel_name}]", status_code=r.status_code)
 
-                    print(f"[Can't get data from the channel_name: {self.channel_name}]")
-                    sys.exit()
+                if r.status_code != 200:
+                    raise ChannelNotFoundError(self.channel_name)
 
                 m = re.findall(CommunityTab.REGEX["YT_INITIAL_DATA"], r.text)
                 data = json.loads(m[0])
@@ -58,26 +103,52 @@ class CommunityTab(object):
                 if self.channel_id is None:
                     self.channel_id = data["metadata"]["channelMetadataRenderer"]["externalId"]
 
-            except IndexError as e:
-                print("[Can't find yt_initial_data using the regex]")
+                tabs = data["contents"]["twoColumnBrowseResultsRenderer"]["tabs"]
+                try:
+                    community_tab = CommunityTab.get_community_tab(tabs)
+                except NotFoundError:
+                    raise ChannelNotFoundError(self.channel_name)
+
+                if self.resolution_cache is not None:
+                    self.resolution_cache.set(self.channel_name, self.channel_id, self.community_url)
+
+            except ChannelNotFoundError as e:
+                # Not a failure of the circuit breaker, the answer is cached instead
+                if not e.cached:
+                    if self.resolution_cache is not None:
+                        self.resolution_cache.set_not_found(self.channel_name)
+                    if self.circuit_breaker is not None:
+                        self.circuit_breaker.record_success(self.channel_name)
+                print(e)
                 raise e
-            except json.decoder.JSONDecodeError as e:
-                print("[Can't parse yt_initial_data from the regex]")
+            except (CircuitOpenError, DeadlineExceededError) as e:
+                # Raised before calling YouTube, so it's not another failure
+                print(e)
                 raise e
             except Exception as e:
-                print("[Some non-expected exception, probably caused by requests...]")
+                if isinstance(e, IndexError):
+                    print("[Can't find yt_initial_data using the regex]")
+                elif isinstance(e, json.decoder.JSONDecodeError):
+                    print("[Can't parse yt_initial_data from the regex]")
+                else:
+                    print("[Some non-expected exception, probably caused by requests...]")
+
+                if self.circuit_breaker is not None and not is_deadline_timeout(e, timeout):
+                    self.circuit_breaker.record_failure(self.channel_name)
                 raise e
 
-            tabs = data["contents"]["twoColumnBrowseResultsRenderer"]["tabs"]
-            community_tab = CommunityTab.get_community_tab(tabs)
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_success(self.channel_name)
+
             community_tab_items = CommunityTab.get_items_from_community_tab(community_tab)
 
             self.click_tracking_params = CommunityTab.get_click_tracking_params_from_community_tab(community_tab)
+            self.client_context.update_from_data(data)
             self.visitor_data = data["responseContext"]["webResponseContextExtensionData"]["ytConfigData"]["visitorData"]
             self.session_index = str(
                 safely_get_value_from_key(data["responseContext"]["webResponseContextExtensionData"]["ytConfigData"], "sessionIndex", default="")
             )
-            self.append_posts_from_items(community_tab_items)
+            posts = self.append_posts_from_items(community_tab_items)
         elif self.posts_continuation_token is not False:
             headers.update(
                 {
@@ -96,14 +167,52 @@ class CommunityTab(object):
                 "clickTracking": {"clickTrackingParams": self.click_tracking_params},
             }
 
-            r = requests_cache.post(CommunityTab.FORMAT_URLS["BROWSE_ENDPOINT"], json=json_body, expire_after=expire_after, headers=headers)
+            r = self.session.post(
+                CommunityTab.FORMAT_URLS["BROWSE_ENDPOINT"], json=json_body, expire_after=expire_after, headers=headers, timeout=get_timeout(deadline)
+            )
 
             data = r.json()
+            self.client_context.update_from_data(data)
             append = data["onResponseReceivedEndpoints"][0]["appendContinuationItemsAction"]
             self.click_tracking_params = data["onResponseReceivedEndpoints"][0]["clickTrackingParams"]
-            self.append_posts_from_items(safely_get_value_from_key(append, "continuationItems", default=[]))
+            posts = self.append_posts_from_items(safely_get_value_from_key(append, "continuationItems", default=[]))
+
+        return posts
+
+    def iter_post_pages(self, expire_after=0, max_posts=None, max_pages=None, deadline=None, prefetch=0):
+        # Yields the posts parsed from each page, with the same limits and prefetch as Post.iter_comment_pages
+        if prefetch:
+            yield from read_ahead(self.iter_post_pages(expire_after=expire_after, max_posts=max_posts, max_pages=max_pages, deadline=deadline), prefetch)
+            return
+
+        loaded_posts = 0
+        loaded_pages = 0
+        self.truncated = False
+
+        while self.posts_continuation_token is not False:
+            if max_posts is not None and loaded_posts >= max_posts:
+                break
+            if max_pages is not None and loaded_pages >= max_pages:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                self.truncated = True
+                break
+
+            try:
+                posts = self.load_posts(expire_after=expire_after, deadline=deadline)
+            except Exception as e:
+                # The pages loaded so far are kept
+                if deadline is None or not is_timeout(e):
+                    raise e
+                self.truncated = True
+                break
+            loaded_posts += len(posts)
+            loaded_pages += 1
+
+            yield posts
 
     def append_posts_from_items(self, items):
+        posts = []
         there_is_no_continuation_token = True
         for item in items:
             kind = list(item.keys())[0]
@@ -113,7 +222,7 @@ class CommunityTab(object):
                 if post_kind == "backstagePostRenderer":
                     post_data = item[kind]["post"]["backstagePostRenderer"]
                     post_data["channelId"] = self.channel_id
-                    self.posts.append(Post.from_data(post_data))
+                    posts.append(Post.from_data(post_data, clean=self.clean, lazy=self.lazy))
                 elif post_kind == "sharedPostRenderer":
                     # TODO: parse data from item[kind]["post"]["sharedPostRenderer"]["originalPost"]["backstagePostRenderer"]
                     post_data = item[kind]["post"]["sharedPostRenderer"]
@@ -122,7 +231,7 @@ class CommunityTab(object):
                     post_data["authorEndpoint"] = post_data["endpoint"]
                     post_data.pop("displayName")
                     post_data.pop("endpoint")
-                    self.posts.append(Post.from_data(post_data))
+                    posts.append(Post.from_data(post_data, clean=self.clean, lazy=self.lazy))
                 else:
                     raise Exception(f"[post_kind={post_kind} is not implemented yet!]")
             elif kind == "continuationItemRenderer":
@@ -132,6 +241,26 @@ class CommunityTab(object):
         if there_is_no_continuation_token:
             self.posts_continuation_token = False
 
+        for post in posts:
+            post.search_index = self.search_index
+            post.sink = self.sink
+            post.lazy = self.lazy
+            post.session = self.session
+            post.session_index = self.session_index
+            post.visitor_data = self.visitor_data
+
+        # With a sink, posts are handed over instead of being kept in self.posts
+        if self.sink is None:
+            self.posts += posts
+        else:
+            for post in posts:
+                self.sink(post)
+
+        if self.search_index is not None:
+            self.search_index.add_posts(posts)
+
+        return posts
+
     @staticmethod
     def get_community_tab(tabs):
         COMMUNITY_TAB_INDEX = 0
@@ -142,7 +271,7 @@ class CommunityTab(object):
         if len(tabs) >= COMMUNITY_TAB_INDEX + 1:
             return tabs[COMMUNITY_TAB_INDEX]
         else:
-            raise Exception(f"[The community tab is expected to have index equal to {COMMUNITY_TAB_INDEX}, but len(tabs) = {len(tabs)}]")
+            raise NotFoundError(f"[The community tab is expected to have index equal to {COMMUNITY_TAB_INDEX}, but len(tabs) = {len(tabs)}]")
 
     @staticmethod
     def get_items_from_community_tab(tab):
@@ -0,0 +1,228 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .helpers.paths import get_data_path, make_parent_dirs
+from .sinks import get_item_kind
+
+DATASTORE_FILE_PATH = get_data_path("datastore.sqlite")
+
+
+class DataStore(object):
+    # Local copy of everything that was crawled. Posts, comments and replies are upserted as their
+    # as_json() representation, next to the ids needed to query them back.
+    #
+    # It's also a sink (see sinks.py): crawl_community_tab(community_tab, store) or post.sink = store
+    # buffers every item and upserts them batch_size at a time. flush() or close() writes the rest.
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS posts (post_id TEXT PRIMARY KEY, channel_id TEXT, data TEXT NOT NULL, updated REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS comments (comment_id TEXT PRIMARY KEY, post_id TEXT, channel_id TEXT, data TEXT NOT NULL, updated REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS replies ("
+        "reply_id TEXT PRIMARY KEY, comment_id TEXT, post_id TEXT, channel_id TEXT, data TEXT NOT NULL, updated REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS posts_channel_id ON posts (channel_id)",
+        "CREATE INDEX IF NOT EXISTS comments_post_id ON comments (post_id)",
+        "CREATE INDEX IF NOT EXISTS comments_channel_id ON comments (channel_id)",
+        "CREATE INDEX IF NOT EXISTS replies_comment_id ON replies (comment_id)",
+        "CREATE INDEX IF NOT EXISTS replies_post_id ON replies (post_id)",
+    ]
+
+    def __init__(self, path=DATASTORE_FILE_PATH, batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+
+        self._connection = None
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._pending = {"post": [], "comment": [], "reply": []}
+        self._pending_count = 0
+
+    def _get_connection(self):
+        if self._connection is None:
+            make_parent_dirs(self.path)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in DataStore.SCHEMA:
+                self._connection.execute(statement)
+        return self._connection
+
+    @contextmanager
+    def batch(self):
+        # Groups every upsert made inside the block in a single transaction
+        with self._lock:
+            connection = self._get_connection()
+            if self._batch_depth == 0:
+                connection.execute("BEGIN")
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    connection.execute("ROLLBACK")
+                raise
+            else:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    connection.execute("COMMIT")
+
+    def __call__(self, item):
+        kind = get_item_kind(item)
+
+        with self._lock:
+            self._pending[kind].append(item)
+            self._pending_count += 1
+            if self._pending_count >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        # Upserts the items buffered by the sink in one transaction. Comments go before replies, so
+        # replies get the post_id and channel_id of their comment.
+        with self._lock:
+            pending = self._pending
+            self._pending = {"post": [], "comment": [], "reply": []}
+            self._pending_count = 0
+
+            with self.batch():
+                self.upsert_posts(pending["post"])
+                self.upsert_comments(pending["comment"])
+                self.upsert_replies(pending["reply"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _upsert(self, statement, rows):
+        with self.batch() as store:
+            connection = store._get_connection()
+            for i in range(0, len(rows), self.batch_size):
+                connection.executemany(statement, rows[i : i + self.batch_size])
+
+    def upsert_posts(self, posts):
+        now = time.time()
+        rows = [(post.post_id, post.channel_id, json.dumps(post.as_json()), now) for post in posts]
+
+        self._upsert(
+            "INSERT INTO posts (post_id, channel_id, data, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (post_id) DO UPDATE SET channel_id = excluded.channel_id, data = excluded.data, updated = excluded.updated",
+            rows,
+        )
+
+    def upsert_comments(self, comments):
+        now = time.time()
+        rows = [(comment.comment_id, comment.post_id, comment.channel_id, json.dumps(comment.as_json()), now) for comment in comments]
+
+        self._upsert(
+            "INSERT INTO comments (comment_id, post_id, channel_id, data, updated) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (comment_id) DO UPDATE SET post_id = excluded.post_id, channel_id = excluded.channel_id, data = excluded.data, updated = excluded.updated",
+            rows,
+        )
+
+    def upsert_replies(self, replies, comment_id=None, post_id=None, channel_id=None):
+        # Replies don't know their parents, reply ids look like "{comment_id}.{id}" though. Without
+        # post_id and channel_id, the ones of the stored comment are used.
+        now = time.time()
+        rows = []
+        for reply in replies:
+            reply_comment_id = comment_id or reply.reply_id.split(".")[0]
+            rows.append((reply.reply_id, reply_comment_id, post_id, reply_comment_id, channel_id, reply_comment_id, json.dumps(reply.as_json()), now))
+
+        self._upsert(
+            "INSERT INTO replies (reply_id, comment_id, post_id, channel_id, data, updated) VALUES (?, ?, "
+            "COALESCE(?, (SELECT post_id FROM comments WHERE comment_id = ?)), COALESCE(?, (SELECT channel_id FROM comments WHERE comment_id = ?)), ?, ?) "
+            "ON CONFLICT (reply_id) DO UPDATE SET comment_id = excluded.comment_id, post_id = COALESCE(excluded.post_id, replies.post_id), "
+            "channel_id = COALESCE(excluded.channel_id, replies.channel_id), data = excluded.data, updated = excluded.updated",
+            rows,
+        )
+
+    def save_comment(self, comment):
+        with self.batch():
+            self.upsert_comments([comment])
+            self.upsert_replies(comment.replies, comment_id=comment.comment_id, post_id=comment.post_id, channel_id=comment.channel_id)
+
+    def save_post(self, post):
+        with self.batch():
+            self.upsert_posts([post])
+            self.upsert_comments(post.comments)
+            for comment in post.comments:
+                self.upsert_replies(comment.replies, comment_id=comment.comment_id, post_id=comment.post_id, channel_id=comment.channel_id)
+
+    def save_community_tab(self, community_tab):
+        with self.batch():
+            for post in community_tab.posts:
+                self.save_post(post)
+
+    def _fetch(self, statement, params):
+        with self._lock:
+            return self._get_connection().execute(statement, params).fetchall()
+
+    @staticmethod
+    def _paginate(statement, params, limit, offset):
+        if limit is not None:
+            statement += " LIMIT ? OFFSET ?"
+            params += (limit, offset)
+        elif offset:
+            statement += " LIMIT -1 OFFSET ?"
+            params += (offset,)
+        return statement, params
+
+    def get_post(self, post_id):
+        rows = self._fetch("SELECT data FROM posts WHERE post_id = ?", (post_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_posts(self, channel_id=None, limit=None, offset=0):
+        if channel_id is None:
+            statement, params = "SELECT data FROM posts ORDER BY rowid", ()
+        else:
+            statement, params = "SELECT data FROM posts WHERE channel_id = ? ORDER BY rowid", (channel_id,)
+
+        statement, params = DataStore._paginate(statement, params, limit, offset)
+        return [json.loads(row[0]) for row in self._fetch(statement, params)]
+
+    def get_post_ids(self, channel_id):
+        # Handy to only crawl posts that are not known yet
+        return set(row[0] for row in self._fetch("SELECT post_id FROM posts WHERE channel_id = ?", (channel_id,)))
+
+    def get_comment(self, comment_id):
+        rows = self._fetch("SELECT data FROM comments WHERE comment_id = ?", (comment_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_comments(self, post_id=None, channel_id=None, limit=None, offset=0):
+        conditions = []
+        params = ()
+        if post_id is not None:
+            conditions.append("post_id = ?")
+            params += (post_id,)
+        if channel_id is not None:
+            conditions.append("channel_id = ?")
+            params += (channel_id,)
+
+        statement = "SELECT data FROM comments"
+        if conditions:
+            statement += " WHERE " + " AND ".join(conditions)
+        statement += " ORDER BY rowid"
+
+        statement, params = DataStore._paginate(statement, params, limit, offset)
+        return [json.loads(row[0]) for row in self._fetch(statement, params)]
+
+    def get_replies(self, comment_id, limit=None, offset=0):
+        statement, params = DataStore._paginate("SELECT data FROM replies WHERE comment_id = ? ORDER BY rowid", (comment_id,), limit, offset)
+        return [json.loads(row[0]) for row in self._fetch(statement, params)]
+
+    def get_updated(self, post_id):
+        # Last time the post was stored, or None if it never was
+        rows = self._fetch("SELECT updated FROM posts WHERE post_id = ?", (post_id,))
+        return rows[0][0] if rows else None
+
+    def close(self):
+        with self._lock:
+            if self._pending_count:
+                self.flush()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
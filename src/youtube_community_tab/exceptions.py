@@ -0,0 +1,49 @@
+import time
+
+
+class YouTubeCommunityTabError(Exception):
+    # Base of the errors raised by the package
+    pass
+
+
+class NotFoundError(YouTubeCommunityTabError):
+    # The channel, community tab or post doesn't exist. These answers are cached for a while.
+    pass
+
+
+class ChannelNotFoundError(NotFoundError):
+    def __init__(self, channel_name, cached=False):
+        self.channel_name = channel_name
+        self.cached = cached
+        super().__init__(f"[Can't get data from the channel_name: {channel_name}{' (cached)' if cached else ''}]")
+
+
+class PostNotFoundError(NotFoundError):
+    def __init__(self, post_id, cached=False):
+        self.post_id = post_id
+        self.cached = cached
+        super().__init__(f"[Can't get data from the post_id: {post_id}{' (cached)' if cached else ''}]")
+
+
+class UpstreamError(YouTubeCommunityTabError):
+    # YouTube answered with 429 or 5xx, or couldn't be reached
+    def __init__(self, message, status_code=None):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+class DeadlineExceededError(YouTubeCommunityTabError):
+    # The deadline passed before the request could be made. Loops over pages stop instead, with
+    # truncated set on the object.
+    def __init__(self, deadline):
+        self.deadline = deadline
+        super().__init__(f"[The deadline passed {time.monotonic() - deadline:.1f}s ago]")
+
+
+class CircuitOpenError(UpstreamError):
+    # Raised without calling YouTube, after too many consecutive failures
+    def __init__(self, name, key, retry_after):
+        self.name = name
+        self.key = key
+        self.retry_after = retry_after
+        super().__init__(f"[The {name} circuit is open{f' for {key}' if key is not None else ''}, retry in {retry_after:.1f}s]")
@@ -4,11 +4,26 @@ from .utils import (
     safely_pop_value_from_key,
     search_key,
     get_auth_header,
+    encode_varint,
     CLIENT_VERSION,
 )
 from .clean_items import (
     clean_content_text,
     clean_backstage_attachement,
+    decode_redirect_url,
+)
+from .lazy import (
+    Deferred,
+    lazy_attribute,
+    deferred_or_value,
+)
+from .prefetch import read_ahead
+from .paths import get_data_dir, get_data_path
+from .projection import (
+    parse_fields,
+    project,
+    check_fields,
+    get_json_fields,
 )
 
 __all__ = [
@@ -17,7 +32,19 @@ __all__ = [
     "save_object_to_file",
     "search_key",
     "get_auth_header",
+    "encode_varint",
     "clean_content_text",
     "clean_backstage_attachement",
+    "decode_redirect_url",
+    "Deferred",
+    "lazy_attribute",
+    "deferred_or_value",
+    "read_ahead",
+    "get_data_dir",
+    "get_data_path",
+    "parse_fields",
+    "project",
+    "check_fields",
+    "get_json_fields",
     "CLIENT_VERSION",
 ]
@@ -1,28 +1,59 @@
+from functools import lru_cache
 from urllib.parse import parse_qs, unquote, urlparse
-from .utils import safely_get_value_from_key as safe
-from .utils import safely_pop_value_from_key as safe_pop
+
+REDIRECT_URL_PREFIX = "https://www.youtube.com/redirect"
+
+POLL_CHOICE_KEYS_TO_REMOVE = (
+    "selectServiceEndpoint",
+    "deselectServiceEndpoint",
+    "voteRatioIfSelected",
+    "votePercentageIfSelected",
+    "voteRatioIfNotSelected",
+    "votePercentageIfNotSelected",
+)
+
+VIDEO_RENDERER_KEYS_TO_REMOVE = (
+    "publishedTimeText",
+    "navigationEndpoint",
+    "trackingParams",
+    "showActionMenu",
+    "menu",
+    "channelThumbnailSupportedRenderers",
+    "thumbnailOverlays",
+)
+
+
+@lru_cache(maxsize=4096)
+def decode_redirect_url(url):
+    # The same links show up in lots of posts and comments, so they are only decoded once
+    return unquote(parse_qs(urlparse(url).query)["q"][0])
 
 
 # lots of returned objects are full of tracking params, client data, duplicate info, etc. this sorta trims the fat.
 def clean_content_text(content):
-    for item in safe(content, "runs", default=[]):
-        if "navigationEndpoint" in item:
-            # traditional links
-            if "urlEndpoint" in item["navigationEndpoint"]:
-                url = item["navigationEndpoint"]["urlEndpoint"]["url"]
-                # replace redirects with direct links
-                if url.startswith("https://www.youtube.com/redirect"):
-                    parsed_url = urlparse(item["navigationEndpoint"]["urlEndpoint"]["url"])
-                    redirect_url = parse_qs(parsed_url.query)["q"][0]
-                    item["urlEndpoint"] = {"url": unquote(redirect_url)}
-                item.pop("navigationEndpoint")
-            # hashtags
-            elif "browseEndpoint" in item["navigationEndpoint"]:
-                item.pop("loggingDirectives")
-                safe_pop(item, "navigationEndpoint", "browseEndpoint", "params")
-                item["browseEndpoint"] = item["navigationEndpoint"]["browseEndpoint"]
-                item["browseEndpoint"]["url"] = item["navigationEndpoint"]["commandMetadata"]["webCommandMetadata"]["url"]
-                item.pop("navigationEndpoint")
+    if not content:
+        return content
+
+    for item in content.get("runs", ()):
+        endpoint = item.get("navigationEndpoint")
+        if endpoint is None:
+            continue
+
+        # traditional links
+        if "urlEndpoint" in endpoint:
+            url = endpoint["urlEndpoint"]["url"]
+            del item["navigationEndpoint"]
+            # replace redirects with direct links
+            if url.startswith(REDIRECT_URL_PREFIX):
+                item["urlEndpoint"] = {"url": decode_redirect_url(url)}
+        # hashtags
+        elif "browseEndpoint" in endpoint:
+            del item["navigationEndpoint"]
+            item.pop("loggingDirectives", None)
+            browse_endpoint = endpoint["browseEndpoint"]
+            browse_endpoint.pop("params", None)
+            browse_endpoint["url"] = endpoint["commandMetadata"]["webCommandMetadata"]["url"]
+            item["browseEndpoint"] = browse_endpoint
     return content
 
 
@@ -30,42 +61,27 @@ def clean_backstage_attachement(attachment):
     if attachment:
         if "pollRenderer" in attachment:
             for choice in attachment["pollRenderer"]["choices"]:
-                for value in [
-                    "selectServiceEndpoint",
-                    "deselectServiceEndpoint",
-                    "voteRatioIfSelected",
-                    "votePercentageIfSelected",
-                    "voteRatioIfNotSelected",
-                    "votePercentageIfNotSelected",
-                ]:
-                    safe_pop(choice, value)
+                for key in POLL_CHOICE_KEYS_TO_REMOVE:
+                    choice.pop(key, None)
         elif "videoRenderer" in attachment:
-            safe_pop(attachment, "videoRenderer", "navigationEndpoint", "watchEndpoint", "watchEndpointSupportedOnesieConfig")
-            attachment["videoRenderer"]["watchEndpoint"] = safe(attachment, "videoRenderer", "navigationEndpoint", "watchEndpoint", default={})
-            attachment["videoRenderer"]["watchEndpoint"]["url"] = safe(
-                attachment, "videoRenderer", "navigationEndpoint", "commandMetadata", "webCommandMetadata", "url"
-            )
-
-            for long_by_line in safe(attachment, "videoRenderer", "longBylineText", "runs", default=[]):
-                long_by_line["browseEndpoint"] = long_by_line["navigationEndpoint"]["browseEndpoint"]
-                long_by_line.pop("navigationEndpoint")
+            video = attachment["videoRenderer"]
+            endpoint = video.get("navigationEndpoint") or {}
 
-            for short_by_line in safe(attachment, "videoRenderer", "shortBylineText", "runs", default=[]):
-                short_by_line["browseEndpoint"] = short_by_line["navigationEndpoint"]["browseEndpoint"]
-                short_by_line.pop("navigationEndpoint")
+            watch_endpoint = endpoint.get("watchEndpoint")
+            if watch_endpoint is None:
+                watch_endpoint = {}
+            watch_endpoint.pop("watchEndpointSupportedOnesieConfig", None)
+            watch_endpoint["url"] = endpoint.get("commandMetadata", {}).get("webCommandMetadata", {}).get("url")
+            video["watchEndpoint"] = watch_endpoint
 
-            for author in safe(attachment, "videoRenderer", "ownerText", "runs", default=[]):
-                author["browseEndpoint"] = author["navigationEndpoint"]["browseEndpoint"]
+            for by_line_key in ("longBylineText", "shortBylineText", "ownerText"):
+                for run in (video.get(by_line_key) or {}).get("runs", ()):
+                    run["browseEndpoint"] = run["navigationEndpoint"]["browseEndpoint"]
+                    # the owner keeps its navigationEndpoint
+                    if by_line_key != "ownerText":
+                        del run["navigationEndpoint"]
 
-            for value in [
-                "publishedTimeText",
-                "navigationEndpoint",
-                "trackingParams",
-                "showActionMenu",
-                "menu",
-                "channelThumbnailSupportedRenderers",
-                "thumbnailOverlays",
-            ]:
-                safe_pop(attachment, "videoRenderer", value)
+            for key in VIDEO_RENDERER_KEYS_TO_REMOVE:
+                video.pop(key, None)
         return attachment
     return None
@@ -0,0 +1,36 @@
+class Deferred(object):
+    # Wraps a function whose result is the value of a lazy_attribute
+    __slots__ = ("function",)
+
+    def __init__(self, function):
+        self.function = function
+
+
+class lazy_attribute(object):
+    # Attribute that can be assigned a Deferred instead of its value. The function is called on
+    # the first read and its result replaces it, so every later read is a plain lookup.
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+
+        try:
+            value = obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name)
+
+        if isinstance(value, Deferred):
+            value = value.function()
+            obj.__dict__[self.name] = value
+        return value
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+
+def deferred_or_value(function, lazy):
+    # Deferred(function) when lazy, the result of function() otherwise
+    return Deferred(function) if lazy else function()
@@ -0,0 +1,28 @@
+import os
+import sys
+
+
+def get_data_dir():
+    # Base directory of every file the package writes by default: YOUTUBE_COMMUNITY_TAB_DATA_DIR, or
+    # the user data directory of the platform. Never the package directory, which may be read-only.
+    data_dir = os.environ.get("YOUTUBE_COMMUNITY_TAB_DATA_DIR")
+    if data_dir:
+        return data_dir
+
+    if sys.platform == "win32":
+        base_dir = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    elif sys.platform == "darwin":
+        base_dir = os.path.join(os.path.expanduser("~"), "Library", "Application Support")
+    else:
+        base_dir = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+
+    return os.path.join(base_dir, "youtube_community_tab")
+
+
+def get_data_path(name):
+    return os.path.join(get_data_dir(), name)
+
+
+def make_parent_dirs(file_path):
+    # The default files live in a directory that may not exist yet
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
@@ -0,0 +1,54 @@
+import queue
+import threading
+
+_DONE = object()
+
+
+def read_ahead(pages, depth=1):
+    # Iterates pages in a background thread, at most depth pages ahead of the consumer, so the next
+    # request is already on its way while the current page is being processed. Exceptions are raised
+    # in the consumer. Pages that were read ahead when the consumer stops are still loaded, so the
+    # continuation tokens stay consistent with what was fetched.
+    slots = threading.Semaphore(depth)
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def produce():
+        iterator = iter(pages)
+        try:
+            while True:
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+
+                try:
+                    page = next(iterator)
+                except StopIteration:
+                    break
+                results.put((page, None))
+        except Exception as e:
+            results.put((None, e))
+        finally:
+            results.put((_DONE, None))
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            page, error = results.get()
+            if page is _DONE:
+                break
+            if error is not None:
+                raise error
+
+            slots.release()
+            yield page
+    finally:
+        stop.set()
+        # Wait for the page in flight, so the object is not modified after the loop is left
+        thread.join()
@@ -0,0 +1,56 @@
+def parse_fields(fields):
+    # "post_id,author.authorText" or ["post_id", "author.authorText"] -> {"post_id": None, "author": {"authorText": None}},
+    # where None selects the whole value. Parsed fields are returned as they are.
+    if isinstance(fields, dict):
+        return fields
+    if isinstance(fields, str):
+        fields = fields.split(",")
+
+    tree = {}
+    for field in fields:
+        names = field.strip().split(".")
+        if not names[0]:
+            continue
+
+        node = tree
+        for name in names[:-1]:
+            if name in node and node[name] is None:
+                # The parent is already selected whole
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = None
+
+    return tree
+
+
+def project(value, tree):
+    # Keeps only the keys of tree in value, recursively. Lists are projected item by item, so
+    # "content_text.runs.text" keeps the text of every run. Keys that are not in value are skipped.
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {name: project(value[name], subtree) for name, subtree in tree.items() if name in value}
+    return value
+
+
+def check_fields(fields, names, kind):
+    # parse_fields(fields), raising ValueError when a top level field is not in names. It needs no
+    # object, so callers can validate fields before downloading anything.
+    tree = parse_fields(fields)
+
+    for name in tree:
+        if name not in names:
+            raise ValueError(f"[Unknown field: {name}, the fields of {kind} are {', '.join(names)}]")
+
+    return tree
+
+
+def get_json_fields(obj, names, fields):
+    # as_json(fields) of obj, whose as_json() has the attributes in names. Only the selected
+    # attributes are read, so lazy attributes that are not selected are never parsed.
+    tree = check_fields(fields, names, type(obj).__name__)
+
+    return {name: project(getattr(obj, name), subtree) for name, subtree in tree.items()}
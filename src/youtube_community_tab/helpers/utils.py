@@ -27,7 +27,7 @@ def parse_count_text(text: str) -> int:
     Returns:
         int: El valor numérico convertido.
     """
-    text = text.replace("\xa0", "").strip()  # Eliminar caracteres especiales como '\xa0'
+    text = text.replace("\xa0", "").replace(",", "").strip()  # Eliminar caracteres especiales como '\xa0' y separadores de miles
 
     if 'K' in text:  # Miles
         return int(float(text.replace('K', '')) * 1000)
@@ -39,6 +39,18 @@ def parse_count_text(text: str) -> int:
         return int(text)  # Si es un número entero normal
 
 
+def parse_count_texts(texts, default=0):
+    # parse_count_text of many texts at once. The same counts ("1", "2", "1.2K") come up again and
+    # again, so every distinct text is only parsed once. Missing and unparseable texts are default.
+    parsed = {}
+    for text in set(texts):
+        try:
+            parsed[text] = text if isinstance(text, int) else parse_count_text(text)
+        except (AttributeError, ValueError):
+            parsed[text] = default
+    return [parsed[text] for text in texts]
+
+
 def safely_pop_value_from_key(*args):
     obj = args[0]
     keys = args[1:-1]
@@ -55,6 +67,18 @@ def safely_pop_value_from_key(*args):
         obj.pop(pop_key)
 
 
+def encode_varint(value):
+    # protobuf base 128 varint, used for the lengths of the hand built params
+    encoded = bytearray()
+
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+
+    return bytes(encoded)
+
+
 def search_key(key, data, current_key=[]):
     found = []
 
@@ -0,0 +1,269 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha1
+
+import requests
+
+from .comment import Comment
+from .helpers.paths import get_data_path, make_parent_dirs
+from .helpers.utils import search_key
+from .post import Post
+from .rate_limiter import RateLimiter
+
+JOBS_JOURNAL_FILE_PATH = get_data_path("jobs.jsonl")
+
+
+def _create_comment(post_id, channel_id, comment_text, session=None):
+    # Only the create request: a follow-up request to load the comment could fail after it was
+    # created, and the job would be retried into a duplicate
+    data = Post(post_id, channel_id=channel_id, session=session)._create_comment(comment_text)
+
+    statuses = search_key("status", data)
+    if len(statuses) > 0 and statuses[0][1] != "STATUS_SUCCEEDED":
+        raise Exception(f"[The action failed with status={statuses[0][1]}]")
+
+    try:
+        comment_id = Post.get_created_comment_id(data)
+    except Exception:
+        comment_id = None
+
+    return {"comment_id": comment_id}
+
+
+def _update_comment(comment_id, post_id, channel_id, comment_text, session=None):
+    return Comment._update_comment(comment_text, comment_id=comment_id, post_id=post_id, channel_id=channel_id, session=session)
+
+
+def _delete_comment(comment_id, post_id, channel_id, session=None):
+    return Comment._delete_comment(comment_id=comment_id, post_id=post_id, channel_id=channel_id, session=session)
+
+
+def _set_like_comment(comment_id, post_id, channel_id, value=True, session=None):
+    return Comment._set_like_comment(value, comment_id=comment_id, post_id=post_id, channel_id=channel_id, session=session)
+
+
+def _set_dislike_comment(comment_id, post_id, channel_id, value=True, session=None):
+    return Comment._set_dislike_comment(value, comment_id=comment_id, post_id=post_id, channel_id=channel_id, session=session)
+
+
+class TransientJobError(Exception):
+    pass
+
+
+class UnknownJobError(Exception):
+    # The request was sent but its outcome can't be told
+    pass
+
+
+class JobRunner(object):
+    # Runs write actions in bulk. Every job and every change of its state is appended to a journal
+    # on disk before anything else happens, so a run that was interrupted can be resumed by creating
+    # a new JobRunner with the same journal and calling run() again.
+    #
+    # Idempotent actions are retried on transient errors and re-run if they were interrupted.
+    # create_comment is not idempotent: it's only retried when the connection could not be opened.
+    # One that was interrupted, or whose response never arrived or couldn't be read, is marked as
+    # "unknown" instead of "failed", so run(retry_failed=True) never risks a duplicated comment.
+    #
+    # With a session_pool, every job runs with an account acquired from it.
+    #
+    # Adding an action that is already pending or running with the same arguments returns that job.
+    # Once it has finished, the same action is a new job, so liking a comment again after unliking it
+    # works. An idempotency_key makes it return the same job whatever its state, also after the
+    # journal is loaded again, for scripts that may be re-run.
+
+    ACTIONS = {
+        "create_comment": (_create_comment, False),
+        "update_comment": (_update_comment, True),
+        "delete_comment": (_delete_comment, True),
+        "set_like_comment": (_set_like_comment, True),
+        "set_dislike_comment": (_set_dislike_comment, True),
+    }
+
+    def __init__(self, journal_path=JOBS_JOURNAL_FILE_PATH, max_workers=4, requests_per_second=2, max_retries=3, retry_delay=1, session_pool=None):
+        self.journal_path = journal_path
+        self.session_pool = session_pool
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.actions = dict(JobRunner.ACTIONS)
+
+        # job_id -> {"action", "kwargs", "state", "result", "error"}
+        self.jobs = {}
+        # get_job_id(action, kwargs) -> job_id of the pending or running job
+        self._unfinished = {}
+        self._lock = threading.Lock()
+
+        make_parent_dirs(self.journal_path)
+        self._load_journal()
+
+    def _load_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+
+        valid_size = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.decoder.JSONDecodeError:
+                    # Last line of an interrupted run
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                valid_size += len(line)
+
+                if event["event"] == "added":
+                    self.jobs[event["job_id"]] = {"action": event["action"], "kwargs": event["kwargs"], "state": "pending", "result": None, "error": None}
+                elif event["job_id"] in self.jobs:
+                    job = self.jobs[event["job_id"]]
+                    job["state"] = event["event"]
+                    job["result"] = event.get("result")
+                    job["error"] = event.get("error")
+
+        # Drop the partially written line, if any, so new events start on a line of their own
+        if valid_size < os.path.getsize(self.journal_path):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(valid_size)
+
+        for job_id, job in self.jobs.items():
+            if job["state"] in ("pending", "started"):
+                self._unfinished[JobRunner.get_job_id(job["action"], job["kwargs"])] = job_id
+
+    def _write_event(self, event):
+        with self._lock:
+            with open(self.journal_path, "a") as f:
+                f.write(json.dumps(event) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            if event["event"] != "added":
+                job = self.jobs[event["job_id"]]
+                job["state"] = event["event"]
+                job["result"] = event.get("result")
+                job["error"] = event.get("error")
+
+                if event["event"] not in ("pending", "started"):
+                    key = JobRunner.get_job_id(job["action"], job["kwargs"])
+                    if self._unfinished.get(key) == event["job_id"]:
+                        del self._unfinished[key]
+
+    @staticmethod
+    def get_job_id(action, kwargs):
+        return sha1(json.dumps([action, kwargs], sort_keys=True).encode()).hexdigest()
+
+    def add(self, action, idempotency_key=None, **kwargs):
+        if action not in self.actions:
+            raise ValueError(f"[action={action} is not implemented, use one of {list(self.actions)}]")
+
+        key = JobRunner.get_job_id(action, kwargs)
+        if idempotency_key is not None:
+            job_id = JobRunner.get_job_id(action, {"kwargs": kwargs, "idempotency_key": idempotency_key})
+            if job_id in self.jobs:
+                return job_id
+        else:
+            job_id = self._unfinished.get(key)
+            if job_id is not None:
+                return job_id
+            job_id = uuid.uuid4().hex
+
+        self._unfinished.setdefault(key, job_id)
+        self.jobs[job_id] = {"action": action, "kwargs": kwargs, "state": "pending", "result": None, "error": None}
+        self._write_event({"event": "added", "job_id": job_id, "action": action, "kwargs": kwargs})
+
+        return job_id
+
+    def create_comment(self, post_id, channel_id, comment_text, idempotency_key=None):
+        return self.add("create_comment", idempotency_key=idempotency_key, post_id=post_id, channel_id=channel_id, comment_text=comment_text)
+
+    def update_comment(self, comment_id, post_id, channel_id, comment_text, idempotency_key=None):
+        return self.add("update_comment", idempotency_key=idempotency_key, comment_id=comment_id, post_id=post_id, channel_id=channel_id, comment_text=comment_text)
+
+    def delete_comment(self, comment_id, post_id, channel_id, idempotency_key=None):
+        return self.add("delete_comment", idempotency_key=idempotency_key, comment_id=comment_id, post_id=post_id, channel_id=channel_id)
+
+    def set_like_comment(self, comment_id, post_id, channel_id, value=True, idempotency_key=None):
+        return self.add("set_like_comment", idempotency_key=idempotency_key, comment_id=comment_id, post_id=post_id, channel_id=channel_id, value=value)
+
+    def set_dislike_comment(self, comment_id, post_id, channel_id, value=True, idempotency_key=None):
+        return self.add("set_dislike_comment", idempotency_key=idempotency_key, comment_id=comment_id, post_id=post_id, channel_id=channel_id, value=value)
+
+    def _execute(self, action, kwargs):
+        function, idempotent = self.actions[action]
+        if self.session_pool is not None:
+            kwargs = {**kwargs, "session": self.session_pool.acquire()}
+
+        try:
+            result = function(**kwargs)
+        except requests.exceptions.ConnectTimeout as e:
+            raise TransientJobError(str(e))
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, ValueError) as e:
+            # ValueError: the response wasn't json, which happens with 429 and 5xx pages
+            if idempotent:
+                raise TransientJobError(str(e))
+            raise UnknownJobError(str(e))
+
+        statuses = search_key("status", result)
+        if len(statuses) > 0 and statuses[0][1] != "STATUS_SUCCEEDED":
+            raise Exception(f"[The action failed with status={statuses[0][1]}]")
+
+        return result
+
+    def _run_job(self, job_id):
+        job = self.jobs[job_id]
+        self._write_event({"event": "started", "job_id": job_id})
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+
+            try:
+                result = self._execute(job["action"], job["kwargs"])
+            except TransientJobError as e:
+                if attempt < self.max_retries:
+                    time.sleep(self.retry_delay * 2**attempt)
+                    continue
+                self._write_event({"event": "failed", "job_id": job_id, "error": str(e)})
+                return
+            except UnknownJobError as e:
+                self._write_event({"event": "unknown", "job_id": job_id, "error": str(e)})
+                return
+            except Exception as e:
+                self._write_event({"event": "failed", "job_id": job_id, "error": str(e)})
+                return
+
+            self._write_event({"event": "done", "job_id": job_id, "result": result})
+            return
+
+    def run(self, retry_failed=False):
+        # Runs every job that is not finished yet and returns the number of jobs in each state
+        to_run = []
+        for job_id, job in list(self.jobs.items()):
+            idempotent = self.actions[job["action"]][1]
+
+            if job["state"] == "pending" or (retry_failed and job["state"] == "failed"):
+                to_run.append(job_id)
+            elif job["state"] == "started":
+                # It was running when the previous run was interrupted
+                if idempotent:
+                    to_run.append(job_id)
+                else:
+                    self._write_event({"event": "unknown", "job_id": job_id, "error": "[Interrupted, it may or may not have been done]"})
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(self._run_job, to_run))
+
+        return self.get_summary()
+
+    def get_summary(self):
+        summary = {}
+        for job in self.jobs.values():
+            summary[job["state"]] = summary.get(job["state"], 0) + 1
+        return summary
+
+    def get_jobs(self, state=None):
+        return {job_id: job for job_id, job in self.jobs.items() if state is None or job["state"] == state}
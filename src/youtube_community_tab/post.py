@@ -1,15 +1,31 @@
 import json
 import re
+import time
 from requests.utils import dict_from_cookiejar
 from base64 import urlsafe_b64encode
 
 from .helpers.clean_items import clean_content_text, clean_backstage_attachement
-from .helpers.utils import safely_get_value_from_key, get_auth_header, CLIENT_VERSION, search_key
-from .requests_handler import requests_cache
+from .helpers.lazy import lazy_attribute, deferred_or_value
+from .helpers.prefetch import read_ahead
+from .helpers.projection import get_json_fields
+from .helpers.utils import safely_get_value_from_key, get_auth_header, encode_varint, parse_count_text, CLIENT_VERSION, search_key
+from .requests_handler import requests_cache, get_timeout, is_deadline_timeout, is_timeout
+from .client_context import get_client_context
+from .circuit_breaker import item_circuit_breaker, post_negative_cache
+from .exceptions import CircuitOpenError, PostNotFoundError, UpstreamError
 from .comment import Comment
 
 
 class Post(object):
+    author = lazy_attribute()
+    content_text = lazy_attribute()
+    backstage_attachment = lazy_attribute()
+    vote_count = lazy_attribute()
+    sponsor_only_badge = lazy_attribute()
+
+    # Keys of as_json()
+    JSON_FIELDS = ("post_id", "channel_id", "author", "content_text", "backstage_attachment", "vote_count", "sponsor_only_badge")
+
     FORMAT_URLS = {
         "POST": "https://www.youtube.com/post/{}",
         # HARD_CODED: This key seems to be constant to everyone, IDK
@@ -21,7 +37,7 @@ class Post(object):
         "YT_INITIAL_DATA": "ytInitialData = ({(?:(?:.|\n)*)?});</script>",
     }
 
-    def __init__(self, post_id, channel_id=None, author=None, content_text=None, backstage_attachment=None, vote_count=None, sponsor_only_badge=None):
+    def __init__(self, post_id, channel_id=None, author=None, content_text=None, backstage_attachment=None, vote_count=None, sponsor_only_badge=None, session=None):
         self.post_id = post_id
         self.channel_id = channel_id
         self.author = author
@@ -33,11 +49,27 @@ class Post(object):
         self.first = True
         self.comments = []
         self.comments_continuation_token = None
+        self.built_comments_continuation_token = False
+        # True when the last iter_comment_pages stopped at its deadline with comments or replies left
+        self.truncated = False
+        self.search_index = None
+        self.sink = None
+        self.lazy = False
         self.click_tracking_params = None
-        self.visitor_data = None
-        self.session_index = "0"
+        # Any object with get, post and cookies, like an Account of a SessionPool
+        self.session = requests_cache if session is None else session
+        self.visitor_data = self.client_context.visitor_data
+        self.session_index = self.client_context.session_index
+
+    @property
+    def client_context(self):
+        return get_client_context(self.session)
+
+    def as_json(self, fields=None):
+        # fields selects what to keep, with dotted paths for nested keys: "post_id,author.authorText"
+        if fields is not None:
+            return get_json_fields(self, Post.JSON_FIELDS, fields)
 
-    def as_json(self):
         return {
             "post_id": self.post_id,
             "channel_id": self.channel_id,
@@ -49,28 +81,61 @@ class Post(object):
         }
 
     @staticmethod
-    def from_post_id(post_id, expire_after=0):
+    def from_post_id(post_id, expire_after=0, clean=True, lazy=False, session=None, deadline=None):
+        session = requests_cache if session is None else session
         headers = {"Referer": Post.FORMAT_URLS["POST"].format(post_id)}
         # Add authorization header
-        current_cookies = dict_from_cookiejar(requests_cache.cookies)
+        current_cookies = dict_from_cookiejar(session.cookies)
         if "SAPISID" in current_cookies:
             headers["Authorization"] = get_auth_header(current_cookies["SAPISID"])
 
-        post_url = Post.FORMAT_URLS["POST"].format(post_id)
-        r = requests_cache.get(post_url, expire_after=expire_after, headers=headers)
+        # Posts that don't exist fail without any request for a while, and so do the ones that keep failing
+        if post_negative_cache.get(post_id) is not None:
+            raise PostNotFoundError(post_id, cached=True)
+        timeout = get_timeout(deadline)
+        item_circuit_breaker.before_call(post_id)
 
-        m = re.findall(Post.REGEX["YT_INITIAL_DATA"], r.text)
-        data = json.loads(m[0])
-
-        community_tab = data["contents"]["twoColumnBrowseResultsRenderer"]["tabs"][0]
-        community_tab_items = Post.get_items_from_community_tab(community_tab)
+        try:
+            post_url = Post.FORMAT_URLS["POST"].format(post_id)
+            r = session.get(post_url, expire_after=expire_after, headers=headers, timeout=timeout)
+
+            if r.status_code == 429 or r.status_code >= 500:
+                raise UpstreamError(f"[YouTube answered {r.status_code} for the post_id: {post_id}]", status_code=r.status_code)
+            if r.status_code == 404:
+                raise PostNotFoundError(post_id)
+
+            m = re.findall(Post.REGEX["YT_INITIAL_DATA"], r.text)
+            data = json.loads(m[0])
+
+            try:
+                community_tab = data["contents"]["twoColumnBrowseResultsRenderer"]["tabs"][0]
+                community_tab_items = Post.get_items_from_community_tab(community_tab)
+
+                post_data = community_tab_items[0]["backstagePostThreadRenderer"]["post"]["backstagePostRenderer"]
+                post_data["channelId"] = data["metadata"]["channelMetadataRenderer"]["externalId"]
+            except (KeyError, IndexError, TypeError) as e:
+                # Removed posts come with an alert ("This post isn't available") instead of the post
+                if "alerts" in data:
+                    raise PostNotFoundError(post_id)
+                raise e
+        except PostNotFoundError as e:
+            post_negative_cache.set(post_id, e)
+            item_circuit_breaker.record_success(post_id)
+            raise e
+        except CircuitOpenError as e:
+            raise e
+        except Exception as e:
+            if not is_deadline_timeout(e, timeout):
+                item_circuit_breaker.record_failure(post_id)
+            raise e
 
-        post_data = community_tab_items[0]["backstagePostThreadRenderer"]["post"]["backstagePostRenderer"]
-        post_data["channelId"] = data["metadata"]["channelMetadataRenderer"]["externalId"]
+        item_circuit_breaker.record_success(post_id)
 
-        post = Post.from_data(post_data)
+        post = Post.from_data(post_data, clean=clean, lazy=lazy)
+        post.session = session
         post.get_first_continuation_token(data)
         post.get_click_tracking_params(data)
+        post.client_context.update_from_data(data)
         post.visitor_data = data["responseContext"]["webResponseContextExtensionData"]["ytConfigData"]["visitorData"]
         post.session_index = str(
             safely_get_value_from_key(data, "responseContext", "webResponseContextExtensionData", "ytConfigData", "sessionIndex", default="")
@@ -116,84 +181,172 @@ class Post(object):
             1
         ]["itemSectionRenderer"]["contents"][0]["continuationItemRenderer"]["continuationEndpoint"]["clickTrackingParams"]
 
-    def load_comments(self, expire_after=0, internal=True):
+    def load_first_comments_data(self, expire_after=0, from_post_page=False, deadline=None):
+        if self.channel_id is not None and not from_post_page:
+            # The first token can be built locally, so there is no need to download the post page
+            self.comments_continuation_token = Post.get_comments_continuation_token(self.post_id, self.channel_id)
+            self.built_comments_continuation_token = True
+            return
+
+        self.built_comments_continuation_token = False
         headers = {"Referer": Post.FORMAT_URLS["POST"].format(self.post_id)}
 
         # Agregar autorización
-        current_cookies = dict_from_cookiejar(requests_cache.cookies)
+        current_cookies = dict_from_cookiejar(self.session.cookies)
         if "SAPISID" in current_cookies:
             headers["Authorization"] = get_auth_header(current_cookies["SAPISID"])
 
-        while self.comments_continuation_token is not False:
-            if self.comments_continuation_token is None:
-                try:
-                    r = requests_cache.get(Post.FORMAT_URLS["POST"].format(self.post_id), expire_after=expire_after, headers=headers)
-                    m = re.findall(Post.REGEX["YT_INITIAL_DATA"], r.text)
-                    data = json.loads(m[0])
+        try:
+            r = self.session.get(Post.FORMAT_URLS["POST"].format(self.post_id), expire_after=expire_after, headers=headers, timeout=get_timeout(deadline))
+            m = re.findall(Post.REGEX["YT_INITIAL_DATA"], r.text)
+            data = json.loads(m[0])
 
-                    self.get_first_continuation_token(data)
-                    self.get_click_tracking_params(data)
-                    self.visitor_data = data["responseContext"]["webResponseContextExtensionData"]["ytConfigData"]["visitorData"]
-                    self.session_index = str(safely_get_value_from_key(data, "responseContext", "webResponseContextExtensionData", "ytConfigData", "sessionIndex"))
+            self.get_first_continuation_token(data)
+            self.get_click_tracking_params(data)
+            self.client_context.update_from_data(data)
+            self.visitor_data = data["responseContext"]["webResponseContextExtensionData"]["ytConfigData"]["visitorData"]
+            self.session_index = str(safely_get_value_from_key(data, "responseContext", "webResponseContextExtensionData", "ytConfigData", "sessionIndex"))
 
-                except Exception as e:
-                    print(f"[Error inesperado: {str(e)}]")
-                    raise e
-            else:
-                headers.update(
-                    {
-                        "X-Goog-AuthUser": self.session_index,
-                        "X-Origin": "https://www.youtube.com",
-                        "X-Youtube-Client-Name": "1",
-                        "X-Youtube-Client-Version": CLIENT_VERSION,
-                    }
-                )
+        except Exception as e:
+            print(f"[Error inesperado: {str(e)}]")
+            raise e
+
+    def fetch_comments_data(self, continuation_token, expire_after=0, deadline=None):
+        headers = {
+            "Referer": Post.FORMAT_URLS["POST"].format(self.post_id),
+            "X-Goog-AuthUser": self.session_index,
+            "X-Origin": "https://www.youtube.com",
+            "X-Youtube-Client-Name": "1",
+            "X-Youtube-Client-Version": CLIENT_VERSION,
+        }
+
+        current_cookies = dict_from_cookiejar(self.session.cookies)
+        if "SAPISID" in current_cookies:
+            headers["Authorization"] = get_auth_header(current_cookies["SAPISID"])
 
-                json_body = {
-                    "context": {
-                        "client": {
-                            "clientName": "WEB",
-                            "clientVersion": CLIENT_VERSION,
-                            "originalUrl": Post.FORMAT_URLS["POST"].format(self.post_id),
-                            "visitorData": self.visitor_data,
-                        }
-                    },
-                    "continuation": self.comments_continuation_token,
-                    "clickTracking": {"clickTrackingParams": self.click_tracking_params},
+        json_body = {
+            "context": {
+                "client": {
+                    "clientName": "WEB",
+                    "clientVersion": CLIENT_VERSION,
+                    "originalUrl": Post.FORMAT_URLS["POST"].format(self.post_id),
+                    # Posts from a community tab, or built from their ids, reuse the context of the session
+                    "visitorData": self.visitor_data or self.client_context.get_visitor_data(self.session, deadline=deadline),
                 }
+            },
+            "continuation": continuation_token,
+            "clickTracking": {"clickTrackingParams": self.click_tracking_params},
+        }
 
-                r = requests_cache.post(Post.FORMAT_URLS["BROWSE_ENDPOINT"], json=json_body, expire_after=expire_after, headers=headers)
-                data = r.json()
+        r = self.session.post(Post.FORMAT_URLS["BROWSE_ENDPOINT"], json=json_body, expire_after=expire_after, headers=headers, timeout=get_timeout(deadline))
 
-                if internal: 
-                    return data
+        data = r.json()
+        self.client_context.update_from_data(data)
 
-                if "onResponseReceivedEndpoints" in data:
-                    if self.first:
-                        reload_data = safely_get_value_from_key(data, "onResponseReceivedEndpoints", 1, "reloadContinuationItemsCommand", default={})
-                        continuation_items = safely_get_value_from_key(reload_data, "continuationItems", default=[])
-                        self.first = False
-                    else:
-                        append_data = safely_get_value_from_key(data, "onResponseReceivedEndpoints", 0, "appendContinuationItemsAction", default={})
-                        continuation_items = safely_get_value_from_key(append_data, "continuationItems", default=[])
+        return data
 
-                    self.click_tracking_params = data.get("trackingParams", "")
-                    print(f"Continuations cargadas: {len(continuation_items)}")
-                    self.append_comments_from_items(continuation_items)
-                else:
-                    print("[Error] Respuesta inesperada de la API")
-                    break
+    def fetch_next_comments_data(self, expire_after=0, deadline=None):
+        # Browse response of the page of comments_continuation_token
+        data = self.fetch_comments_data(self.comments_continuation_token, expire_after=expire_after, deadline=deadline)
 
-    def append_comments_from_items(self, items):
-        if not items:
-            print("[Debug] No se encontraron elementos")
+        if "onResponseReceivedEndpoints" not in data and self.first and self.built_comments_continuation_token:
+            # The locally built token was not accepted, retry with the one from the post page
+            self.load_first_comments_data(expire_after=expire_after, from_post_page=True, deadline=deadline)
+            data = self.fetch_comments_data(self.comments_continuation_token, expire_after=expire_after, deadline=deadline)
+
+        return data
+
+    def get_continuation_items_from_data(self, data):
+        if "onResponseReceivedEndpoints" not in data:
+            return None
+
+        if self.first:
+            reload_data = safely_get_value_from_key(data, "onResponseReceivedEndpoints", 1, "reloadContinuationItemsCommand", default={})
+            continuation_items = safely_get_value_from_key(reload_data, "continuationItems", default=[])
+            self.first = False
+        else:
+            append_data = safely_get_value_from_key(data, "onResponseReceivedEndpoints", 0, "appendContinuationItemsAction", default={})
+            continuation_items = safely_get_value_from_key(append_data, "continuationItems", default=[])
+
+        self.click_tracking_params = data.get("trackingParams", "")
+
+        return continuation_items
+
+    def load_comments(self, expire_after=0, internal=True, max_comments=None, max_pages=None, deadline=None, prefetch=0):
+        # internal=True returns the raw browse response of the next page without parsing it
+        if internal:
+            if self.comments_continuation_token is None:
+                self.load_first_comments_data(expire_after=expire_after, deadline=deadline)
+
+            if self.comments_continuation_token is False:
+                return None
+
+            return self.fetch_next_comments_data(expire_after=expire_after, deadline=deadline)
+
+        for _ in self.iter_comment_pages(expire_after=expire_after, max_comments=max_comments, max_pages=max_pages, deadline=deadline, prefetch=prefetch):
+            pass
+
+    def iter_comment_pages(self, expire_after=0, max_comments=None, max_pages=None, deadline=None, prefetch=0):
+        # Yields the comments parsed from each continuation page. It stops once max_comments
+        # comments or max_pages pages were loaded, or when deadline (a time.monotonic()
+        # timestamp) has passed. Pages are never cut, so the continuation token stays valid.
+        # The deadline also bounds the timeouts of every request; when it stops the loop with
+        # comments left, or some replies couldn't be loaded, truncated is set.
+        #
+        # With prefetch > 0, up to prefetch pages are loaded in a background thread ahead of the
+        # loop, so the next request overlaps with the processing of the current page.
+        if prefetch:
+            yield from read_ahead(self.iter_comment_pages(expire_after=expire_after, max_comments=max_comments, max_pages=max_pages, deadline=deadline), prefetch)
             return
 
+        loaded_comments = 0
+        loaded_pages = 0
+        self.truncated = False
+
+        while self.comments_continuation_token is not False:
+            if max_comments is not None and loaded_comments >= max_comments:
+                break
+            if max_pages is not None and loaded_pages >= max_pages:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                self.truncated = True
+                break
+
+            try:
+                if self.comments_continuation_token is None:
+                    self.load_first_comments_data(expire_after=expire_after, deadline=deadline)
+                    continue
+
+                data = self.fetch_next_comments_data(expire_after=expire_after, deadline=deadline)
+                continuation_items = self.get_continuation_items_from_data(data)
+            except Exception as e:
+                # The pages loaded so far are kept
+                if deadline is None or not is_timeout(e):
+                    raise e
+                self.truncated = True
+                break
+
+            if continuation_items is None:
+                print("[Error] Respuesta inesperada de la API")
+                break
+
+            comments = self.append_comments_from_items(continuation_items, deadline=deadline)
+            loaded_comments += len(comments)
+            loaded_pages += 1
+
+            yield comments
+
+    def append_comments_from_items(self, items, deadline=None):
+        comments = []
+
+        if not items:
+            self.comments_continuation_token = False
+            return comments
+
         there_is_no_continuation_token = True
 
         for item in items:
             kind = list(item.keys())[0]
-            print(f"[Debug] Tipo de elemento encontrado: {kind}")
 
             if kind == "commentThreadRenderer":
                 # Procesar comentario principal
@@ -214,23 +367,91 @@ class Post(object):
                     None,
                     self.visitor_data,
                     self.session_index,
+                    lazy=self.lazy,
+                    session=self.session,
                 )
-                self.comments.append(comment)
-                print(f"[Debug] Comentario principal agregado: {comment.comment_id}")
+                comment.search_index = self.search_index
+                comment.sink = self.sink
+                comment.lazy = self.lazy
+                comments.append(comment)
+
+                # With a sink, comments are handed over instead of being kept in self.comments
+                if self.sink is None:
+                    self.comments.append(comment)
+                else:
+                    self.sink(comment)
 
                 # Cargar respuestas del comentario
-                comment.load_replies()  # Utiliza la función definida en comment.py
+                try:
+                    comment.load_replies(deadline=deadline)  # Utiliza la función definida en comment.py
+                except Exception as e:
+                    # The comment is kept without its replies
+                    if deadline is None or not is_timeout(e):
+                        raise e
+                    comment.truncated = True
+                    self.truncated = True
 
             elif kind == "continuationItemRenderer":
                 self.comments_continuation_token = safely_get_value_from_key(
                     item[kind], "continuationEndpoint", "continuationCommand", "token"
                 )
                 there_is_no_continuation_token = False
-                print(f"[Debug] Nueva continuación detectada: {self.comments_continuation_token}")
 
         if there_is_no_continuation_token:
             self.comments_continuation_token = False
-            print("[Info] No se encontró ningún token de continuación")
+
+        if self.search_index is not None:
+            self.search_index.add_comments(comments)
+
+        return comments
+
+    def get_vote_count(self):
+        return parse_count_text(safely_get_value_from_key(self.vote_count, "simpleText", default="0") or "0")
+
+    @staticmethod
+    def get_comment_count_from_data(data):
+        runs = safely_get_value_from_key(
+            data,
+            "onResponseReceivedEndpoints",
+            0,
+            "reloadContinuationItemsCommand",
+            "continuationItems",
+            0,
+            "commentsHeaderRenderer",
+            "countText",
+            "runs",
+            default=[],
+        )
+
+        if runs:
+            return parse_count_text(runs[0].get("text", "0"))
+        return 0
+
+    def load_comment_count(self, expire_after=0, deadline=None):
+        # The count comes with the header of the first comments page
+        if self.first and self.comments_continuation_token is not False:
+            data = self.load_comments(expire_after=expire_after, deadline=deadline)
+        else:
+            # The first page again, with the same fallback to the token of the post page. The
+            # comments loaded so far keep their token.
+            state = (self.first, self.comments_continuation_token, self.built_comments_continuation_token)
+            try:
+                self.first = True
+                self.comments_continuation_token = None
+                data = self.load_comments(expire_after=expire_after, deadline=deadline)
+            finally:
+                self.first, self.comments_continuation_token, self.built_comments_continuation_token = state
+
+        return Post.get_comment_count_from_data(data)
+
+    def load_stats(self, expire_after=0, deadline=None):
+        # The likes come with the post, the comment count with the first comments page. A post listed
+        # by the community tab has its channel_id, so its post page is never needed.
+        return {
+            "post_id": self.post_id,
+            "likes": self.get_vote_count(),
+            "comments": self.load_comment_count(expire_after=expire_after, deadline=deadline),
+        }
 
     def get_text(self):
         runs = safely_get_value_from_key(self.content_text, "runs", default=[])
@@ -239,6 +460,68 @@ class Post(object):
             return "\n".join([run["text"] for run in runs])
         return None
 
+    @staticmethod
+    def get_comments_continuation_token(post_id, channel_id):
+        # Same layout as Comment.get_fixed_comment_params, without the highlighted comment
+        post_id = post_id.encode()
+        channel_id = channel_id.encode()
+
+        section = [
+            b"0\x00\xD8\x01\x01\xEA\x01",
+            encode_varint(len(post_id)),
+            post_id,
+            b"\xF2\x01",
+            encode_varint(len(channel_id)),
+            channel_id,
+        ]
+        section = b"".join(section)
+
+        comments_section = [
+            b"\x22",
+            encode_varint(len(section)),
+            section,
+            b"B\x10comments-section",
+        ]
+        comments_section = b"".join(comments_section)
+
+        post = [
+            b"\xB2\x01",
+            encode_varint(len(post_id)),
+            post_id,
+        ]
+        post = b"".join(post)
+
+        part1 = [
+            b"\x12\tcommunity\xB8\x01\x00\xCA\x01",
+            encode_varint(len(post)),
+            post,
+            b"\xEA\x02\x04\x10\x01\x18\x01\xAA\x03",
+            encode_varint(len(comments_section)),
+            comments_section,
+        ]
+
+        part1 = urlsafe_b64encode(b"".join(part1)).replace(b"=", b"%3D")
+
+        browse = [
+            b"\x12",
+            encode_varint(len(channel_id)),
+            channel_id,
+            b"\x1A",
+            encode_varint(len(part1)),
+            part1,
+        ]
+        browse = b"".join(browse)
+
+        params = [
+            b"\xe2\xa9\x85\xb2\x02",
+            encode_varint(len(browse)),
+            browse,
+        ]
+
+        params = urlsafe_b64encode(b"".join(params)).decode().replace("=", "%3D")
+
+        return params
+
     def get_create_comment_params(self):
         if self.channel_id is None or self.post_id is None:
             return None
@@ -257,11 +540,20 @@ class Post(object):
         return params
 
     def create_comment(self, comment_text):
+        comment_id = Post.get_created_comment_id(self._create_comment(comment_text))
+        return Comment.from_ids(comment_id, self.post_id, self.channel_id, session=self.session)
+
+    @staticmethod
+    def get_created_comment_id(data):
+        return search_key("comment", data)[0][1]["commentRenderer"]["commentId"]
+
+    def _create_comment(self, comment_text):
+        # Sends the create request and returns its json, without loading the new comment
         headers = {
             "x-origin": "https://www.youtube.com",
         }
 
-        current_cookies = dict_from_cookiejar(requests_cache.cookies)
+        current_cookies = dict_from_cookiejar(self.session.cookies)
         if "SAPISID" in current_cookies:
             headers["Authorization"] = get_auth_header(current_cookies["SAPISID"])
 
@@ -276,45 +568,73 @@ class Post(object):
             "commentText": comment_text,
         }
 
-        r = requests_cache.post(
+        r = self.session.post(
             Post.FORMAT_URLS["CREATE_COMMENT_ENDPOINT"],
             json=json_body,
             headers=headers,
+            # Actions must never be answered from the cache
+            expire_after=0,
+            timeout=get_timeout(),
         )
 
-        try:
-            data = r.json()
-            comment_id = search_key("comment", data)[0][1]["commentRenderer"]["commentId"]
-
-            return Comment.from_ids(comment_id, self.post_id, self.channel_id)
-        except Exception as e:
-            raise e
+        return r.json()
 
     @staticmethod
-    def from_data(data):
+    def get_author_from_data(data, clean=True):
         # clean the author cause it's different here for some reason
-        for item in data["authorText"]["runs"]:
-            item["browseEndpoint"] = item["navigationEndpoint"]["browseEndpoint"]
-            item["browseEndpoint"]["url"] = item["navigationEndpoint"]["commandMetadata"]["webCommandMetadata"]["url"]
-            item.pop("navigationEndpoint")
-        data["authorEndpoint"]["browseId"] = data["authorEndpoint"]["browseEndpoint"]["browseId"]
-        author_url = data["authorEndpoint"]["commandMetadata"]["webCommandMetadata"]["url"]
-        data["authorEndpoint"]["url"] = author_url
-        for value in ["clickTrackingParams", "commandMetadata", "browseEndpoint"]:
-            data["authorEndpoint"].pop(value)
+        if clean:
+            for item in data["authorText"]["runs"]:
+                endpoint = item.pop("navigationEndpoint")
+                item["browseEndpoint"] = endpoint["browseEndpoint"]
+                item["browseEndpoint"]["url"] = endpoint["commandMetadata"]["webCommandMetadata"]["url"]
+            author_endpoint = data["authorEndpoint"]
+            author_endpoint["browseId"] = author_endpoint["browseEndpoint"]["browseId"]
+            author_endpoint["url"] = author_endpoint["commandMetadata"]["webCommandMetadata"]["url"]
+            for value in ["clickTrackingParams", "commandMetadata", "browseEndpoint"]:
+                author_endpoint.pop(value)
+
+        return {
+            "authorText": safely_get_value_from_key(data, "authorText"),
+            "authorThumbnail": safely_get_value_from_key(data, "authorThumbnail"),
+            "authorEndpoint": safely_get_value_from_key(data, "authorEndpoint"),
+        }
+
+    @staticmethod
+    def from_data(data, clean=True, lazy=False):
+        # clean=True cleans the author, content_text and backstage_attachment right away, clean="lazy"
+        # when they are first read and clean=False leaves them as YouTube sent them.
+        # lazy=True reads every field from data the first time it's accessed, so posts that are
+        # only listed by post_id cost almost nothing to build.
+        if clean not in (True, False, "lazy"):
+            raise ValueError(f"[clean must be True, False or 'lazy', not {clean}]")
+
+        def get_author():
+            return Post.get_author_from_data(data, clean=bool(clean))
+
+        def get_content_text():
+            content_text = safely_get_value_from_key(data, "contentText")
+            return clean_content_text(content_text) if clean else content_text
+
+        def get_backstage_attachment():
+            backstage_attachment = safely_get_value_from_key(data, "backstageAttachment", default=None)
+            return clean_backstage_attachement(backstage_attachment) if clean else backstage_attachment
+
+        def get_vote_count():
+            return safely_get_value_from_key(data, "voteCount")
+
+        def get_sponsor_only_badge():
+            return safely_get_value_from_key(data, "sponsorsOnlyBadge", default=None)
+
+        defer_cleaning = lazy or clean == "lazy"
 
         post = Post(
             data["postId"],
             channel_id=data["channelId"],
-            author={
-                "authorText": safely_get_value_from_key(data, "authorText"),
-                "authorThumbnail": safely_get_value_from_key(data, "authorThumbnail"),
-                "authorEndpoint": safely_get_value_from_key(data, "authorEndpoint"),
-            },
-            content_text=clean_content_text(safely_get_value_from_key(data, "contentText")),
-            backstage_attachment=clean_backstage_attachement(safely_get_value_from_key(data, "backstageAttachment", default=None)),
-            vote_count=safely_get_value_from_key(data, "voteCount"),
-            sponsor_only_badge=safely_get_value_from_key(data, "sponsorsOnlyBadge", default=None),
+            author=deferred_or_value(get_author, defer_cleaning),
+            content_text=deferred_or_value(get_content_text, defer_cleaning),
+            backstage_attachment=deferred_or_value(get_backstage_attachment, defer_cleaning),
+            vote_count=deferred_or_value(get_vote_count, lazy),
+            sponsor_only_badge=deferred_or_value(get_sponsor_only_badge, lazy),
         )
 
         post.raw_data = data
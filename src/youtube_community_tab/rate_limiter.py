@@ -0,0 +1,20 @@
+import threading
+import time
+
+
+class RateLimiter(object):
+    # Spaces out calls to acquire() by at least 1 / requests_per_second, across threads
+
+    def __init__(self, requests_per_second):
+        self.interval = 1 / requests_per_second if requests_per_second else 0
+        self._next_time = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+
+        if wait > 0:
+            time.sleep(wait)
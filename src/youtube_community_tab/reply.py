@@ -1,16 +1,29 @@
 import json
 
 from .helpers.utils import safely_get_value_from_key
+from .helpers.lazy import lazy_attribute, deferred_or_value
+from .helpers.projection import get_json_fields
 
 
 class Reply(object):
+    author = lazy_attribute()
+    content_text = lazy_attribute()
+    vote_count = lazy_attribute()
+
+    # Keys of as_json()
+    JSON_FIELDS = ("reply_id", "author", "content_text", "vote_count")
+
     def __init__(self, reply_id, author=None, content_text=None, vote_count=None):
         self.reply_id = reply_id
         self.author = author
         self.content_text = content_text
         self.vote_count = vote_count
 
-    def as_json(self):
+    def as_json(self, fields=None):
+        # Same fields as Post.as_json
+        if fields is not None:
+            return get_json_fields(self, Reply.JSON_FIELDS, fields)
+
         return {"reply_id": self.reply_id, "author": self.author, "content_text": self.content_text, "vote_count": self.vote_count}
 
     def __str__(self):
@@ -25,18 +38,23 @@ class Reply(object):
         return None
 
     @staticmethod
-    def from_data(data):
+    def get_author_from_data(data):
+        return {
+            "authorText": safely_get_value_from_key(data, "authorText"),
+            "authorThumbnail": safely_get_value_from_key(data, "authorThumbnail"),
+            "authorEndpoint": safely_get_value_from_key(data, "authorEndpoint", "browseEndpoint"),
+            "authorIsChannelOwner": safely_get_value_from_key(data, "authorIsChannelOwner"),
+            "sponsorCommentBadge": safely_get_value_from_key(data, "sponsorCommentBadge"),
+        }
+
+    @staticmethod
+    def from_data(data, lazy=False):
+        # lazy=True reads author, content_text and vote_count from data the first time they're accessed
         reply = Reply(
             data["commentId"],
-            content_text=safely_get_value_from_key(data, "contentText"),
-            author={
-                "authorText": safely_get_value_from_key(data, "authorText"),
-                "authorThumbnail": safely_get_value_from_key(data, "authorThumbnail"),
-                "authorEndpoint": safely_get_value_from_key(data, "authorEndpoint", "browseEndpoint"),
-                "authorIsChannelOwner": safely_get_value_from_key(data, "authorIsChannelOwner"),
-                "sponsorCommentBadge": safely_get_value_from_key(data, "sponsorCommentBadge"),
-            },
-            vote_count=safely_get_value_from_key(data, "voteCount"),
+            content_text=deferred_or_value(lambda: safely_get_value_from_key(data, "contentText"), lazy),
+            author=deferred_or_value(lambda: Reply.get_author_from_data(data), lazy),
+            vote_count=deferred_or_value(lambda: safely_get_value_from_key(data, "voteCount"), lazy),
         )
 
         reply.raw_data = data
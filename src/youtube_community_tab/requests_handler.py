@@ -1,7 +1,249 @@
 import os
-from requests_cache import CachedSession
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 
-dirname = os.path.dirname(__file__)
-CACHE_FILE_PATH = os.path.join(dirname, "requests_cache.sqlite")
+from .exceptions import DeadlineExceededError
+from .helpers.paths import get_data_path, make_parent_dirs
 
-requests_cache = CachedSession(allowable_methods=("GET", "POST"), cache_name=CACHE_FILE_PATH)
+CACHE_FILE_PATH = os.environ.get("YOUTUBE_COMMUNITY_TAB_CACHE_PATH", get_data_path("requests_cache.sqlite"))
+# Total size in bytes of the compressed responses, the least recently used ones are evicted past it
+CACHE_MAX_SIZE = int(os.environ.get("YOUTUBE_COMMUNITY_TAB_CACHE_MAX_SIZE", 512 * 1024 * 1024))
+# Connection pools of every session, see requests.adapters.HTTPAdapter
+POOL_CONNECTIONS = int(os.environ.get("YOUTUBE_COMMUNITY_TAB_POOL_CONNECTIONS", 10))
+POOL_MAXSIZE = int(os.environ.get("YOUTUBE_COMMUNITY_TAB_POOL_MAXSIZE", 10))
+# Seconds to connect to YouTube, and to wait for each read of a response
+CONNECT_TIMEOUT = float(os.environ.get("YOUTUBE_COMMUNITY_TAB_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("YOUTUBE_COMMUNITY_TAB_READ_TIMEOUT", 30))
+
+_session = None
+_provider = None
+_session_lock = threading.Lock()
+
+
+def create_session(cache_path=None, max_size=None, pool_connections=None, pool_maxsize=None):
+    from requests_cache import CachedSession
+
+    from .cache_backend import BoundedSQLiteCache
+    from .circuit_breaker import CircuitBreakerAdapter
+
+    cache_path = cache_path or CACHE_FILE_PATH
+    make_parent_dirs(cache_path)
+    # WAL, so reads from other threads and processes don't wait for writes
+    cache = BoundedSQLiteCache(cache_path, max_size=max_size or CACHE_MAX_SIZE, wal=True, busy_timeout=30000)
+    session = CachedSession(allowable_methods=("GET", "POST"), backend=cache)
+
+    # Fails fast while YouTube is down, see circuit_breaker.upstream_circuit_breaker
+    adapter = CircuitBreakerAdapter(pool_connections=pool_connections or POOL_CONNECTIONS, pool_maxsize=pool_maxsize or POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def get_timeout(deadline=None):
+    # (connect, read) timeouts of a request, cut to the time left until deadline (a time.monotonic()
+    # timestamp). Raises DeadlineExceededError when there's no time left.
+    if deadline is None:
+        return (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceededError(deadline)
+
+    return (min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining))
+
+
+def is_timeout(e):
+    # The deadline passed, before or during a request
+    from requests.exceptions import Timeout
+
+    return isinstance(e, (DeadlineExceededError, Timeout))
+
+
+def is_deadline_timeout(e, timeout):
+    # The request timed out because the deadline of the caller shortened its timeout, which says
+    # nothing about YouTube, so it's not a failure for the circuit breakers
+    if isinstance(e, DeadlineExceededError):
+        return True
+    return is_timeout(e) and timeout is not None and tuple(timeout) != (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+
+class SessionProvider(object):
+    # Gives every thread its own session, with its own connection pool and its own connection to the
+    # cache file. The cookies, headers and hooks are shared by all of them, so setting them from any
+    # thread (requests_cache.cookies = cookie_jar) applies to every thread. So do the adapters mounted
+    # with mount(), until unmount() puts back the default adapter of each session.
+
+    SHARED_ATTRIBUTES = ("cookies", "headers", "hooks")
+
+    def __init__(self, cache_path=None, max_size=None, pool_connections=None, pool_maxsize=None):
+        self.cache_path = cache_path
+        self.max_size = max_size
+        self.pool_connections = pool_connections or POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or POOL_MAXSIZE
+
+        self._local = threading.local()
+        self._sessions = weakref.WeakSet()
+        self._shared = {}
+        self._mounts = {}
+        self._default_adapters = weakref.WeakKeyDictionary()
+        self._created_sessions = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        session = getattr(self._local, "session", None)
+        if session is not None:
+            return session
+
+        session = create_session(cache_path=self.cache_path, max_size=self.max_size, pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+
+        with self._lock:
+            # The first session provides the shared objects
+            if not self._shared:
+                self._shared = {name: getattr(session, name) for name in SessionProvider.SHARED_ATTRIBUTES}
+            for name, value in self._shared.items():
+                setattr(session, name, value)
+
+            self._default_adapters[session] = dict(session.adapters)
+            for prefix, adapter in self._mounts.items():
+                session.mount(prefix, adapter)
+
+            self._sessions.add(session)
+            self._created_sessions += 1
+
+        self._local.session = session
+
+        return session
+
+    def set_shared(self, name, value):
+        with self._lock:
+            self._shared[name] = value
+            for session in self._sessions:
+                setattr(session, name, value)
+
+    def mount(self, prefix, adapter):
+        # Mounts adapter on the session of every thread, including the ones created later
+        with self._lock:
+            self._mounts[prefix] = adapter
+            for session in self._sessions:
+                session.mount(prefix, adapter)
+
+    def unmount(self, prefix):
+        with self._lock:
+            self._mounts.pop(prefix, None)
+            for session in self._sessions:
+                adapter = self._default_adapters.get(session, {}).get(prefix)
+                if adapter is None:
+                    session.adapters.pop(prefix, None)
+                else:
+                    session.mount(prefix, adapter)
+
+    def get_metrics(self):
+        with self._lock:
+            sessions = list(self._sessions)
+            metrics = {
+                "sessions": len(sessions),
+                "created_sessions": self._created_sessions,
+                "pool_connections": self.pool_connections,
+                "pool_maxsize": self.pool_maxsize,
+            }
+
+        # The metrics of the cache are shared by every session that uses the same file
+        metrics["cache"] = sessions[0].cache.get_metrics() if sessions else None
+
+        return metrics
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        with _session_lock:
+            if _provider is None:
+                _provider = SessionProvider()
+    return _provider
+
+
+def get_session():
+    # The session of the current thread, created on its first request. set_session() replaces them
+    # all with a single session.
+    if _session is not None:
+        return _session
+    return get_provider().get()
+
+
+def set_session(session):
+    # Replaces the sessions used by every CommunityTab, Post and Comment, None goes back to one per thread
+    global _session
+    with _session_lock:
+        _session = session
+
+
+def set_provider(provider):
+    # Replaces the SessionProvider, for example with one that uses another cache file
+    global _provider
+    with _session_lock:
+        _provider = provider
+
+
+def get_metrics():
+    return get_provider().get_metrics()
+
+
+@contextmanager
+def mounted(adapter, session=None):
+    # Sends the https and http requests of the session through adapter inside the with block. For the
+    # default session, that's the session of every thread.
+    session = requests_cache if session is None else session
+    prefixes = ("https://", "http://")
+
+    if isinstance(session, LazySession) and _session is None:
+        provider = get_provider()
+        for prefix in prefixes:
+            provider.mount(prefix, adapter)
+        try:
+            yield
+        finally:
+            for prefix in prefixes:
+                provider.unmount(prefix)
+        return
+
+    if isinstance(session, LazySession):
+        session = get_session()
+    adapters = dict(session.adapters)
+    for prefix in prefixes:
+        session.mount(prefix, adapter)
+    try:
+        yield
+    finally:
+        session.adapters.clear()
+        session.adapters.update(adapters)
+
+
+class LazySession(object):
+    # Stands in for the session until it's needed, every attribute is read from and written to get_session()
+
+    def __getattr__(self, name):
+        return getattr(get_session(), name)
+
+    def __setattr__(self, name, value):
+        if _session is None and name in SessionProvider.SHARED_ATTRIBUTES:
+            get_provider().get()
+            get_provider().set_shared(name, value)
+        else:
+            setattr(get_session(), name, value)
+
+    def mount(self, prefix, adapter):
+        if _session is None:
+            get_provider().mount(prefix, adapter)
+        else:
+            _session.mount(prefix, adapter)
+
+    def __repr__(self):
+        if _session is None and _provider is None:
+            return "<LazySession (not created yet)>"
+        return repr(get_session())
+
+
+requests_cache = LazySession()
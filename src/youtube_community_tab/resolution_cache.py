@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import threading
+import time
+
+from .helpers.paths import get_data_path, make_parent_dirs
+
+RESOLUTION_CACHE_FILE_PATH = os.environ.get("YOUTUBE_COMMUNITY_TAB_RESOLUTION_CACHE_PATH", get_data_path("resolution_cache.sqlite"))
+
+
+class ResolutionCache(object):
+    # Remembers which community tab url works for a channel name (handle, custom url or channel id)
+    # and the channel_id behind it. Names that could not be resolved are stored as negative entries
+    # with a shorter ttl, so repeated lookups of unknown channels don't download anything.
+
+    def __init__(self, path=RESOLUTION_CACHE_FILE_PATH, ttl=7 * 24 * 60 * 60, negative_ttl=60 * 60):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _get_connection(self):
+        # The database is only opened on first use
+        if self._connection is None:
+            make_parent_dirs(self.path)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            # Shared by every worker of the API
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS resolutions ("
+                "channel_name TEXT PRIMARY KEY, channel_id TEXT, community_url TEXT, expires REAL NOT NULL)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def get(self, channel_name):
+        # Returns None when there is no valid entry, otherwise a dict with channel_id and community_url,
+        # both None for negative entries
+        with self._lock:
+            row = (
+                self._get_connection()
+                .execute("SELECT channel_id, community_url, expires FROM resolutions WHERE channel_name = ?", (channel_name,))
+                .fetchone()
+            )
+
+        if row is None or row[2] < time.time():
+            return None
+
+        return {"channel_id": row[0], "community_url": row[1]}
+
+    def set(self, channel_name, channel_id, community_url):
+        self._set(channel_name, channel_id, community_url, self.ttl)
+
+    def set_not_found(self, channel_name):
+        self._set(channel_name, None, None, self.negative_ttl)
+
+    def _set(self, channel_name, channel_id, community_url, ttl):
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO resolutions (channel_name, channel_id, community_url, expires) VALUES (?, ?, ?, ?)",
+                (channel_name, channel_id, community_url, time.time() + ttl),
+            )
+            connection.commit()
+
+    def delete(self, channel_name):
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute("DELETE FROM resolutions WHERE channel_name = ?", (channel_name,))
+            connection.commit()
+
+    def clear(self):
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute("DELETE FROM resolutions")
+            connection.commit()
+
+
+resolution_cache = ResolutionCache()
@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+
+from .helpers.paths import get_data_path, make_parent_dirs
+
+SEARCH_INDEX_FILE_PATH = get_data_path("search_index.sqlite")
+
+
+class SearchIndex(object):
+    # Full-text index over the text of posts, comments and replies, backed by SQLite FTS5.
+    # Assign it to CommunityTab.search_index, Post.search_index or Comment.search_index and every
+    # parsed item is indexed as it's appended.
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS documents ("
+        "id INTEGER PRIMARY KEY, item_id TEXT NOT NULL UNIQUE, kind TEXT NOT NULL, post_id TEXT, channel_id TEXT, text TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS documents_post_id ON documents (post_id)",
+        "CREATE INDEX IF NOT EXISTS documents_channel_id ON documents (channel_id)",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5("
+        "text, content='documents', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS documents_insert AFTER INSERT ON documents BEGIN "
+        "INSERT INTO documents_fts (rowid, text) VALUES (new.id, new.text); END",
+        "CREATE TRIGGER IF NOT EXISTS documents_delete AFTER DELETE ON documents BEGIN "
+        "INSERT INTO documents_fts (documents_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+        "CREATE TRIGGER IF NOT EXISTS documents_update AFTER UPDATE OF text ON documents BEGIN "
+        "INSERT INTO documents_fts (documents_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+        "INSERT INTO documents_fts (rowid, text) VALUES (new.id, new.text); END",
+    ]
+
+    def __init__(self, path=SEARCH_INDEX_FILE_PATH):
+        self.path = path
+
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _get_connection(self):
+        if self._connection is None:
+            make_parent_dirs(self.path)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+
+            try:
+                for statement in SearchIndex.SCHEMA:
+                    connection.execute(statement)
+                connection.commit()
+            except sqlite3.OperationalError as e:
+                connection.close()
+                raise RuntimeError(f"[The sqlite3 module of this python build doesn't support FTS5: {e}]")
+
+            self._connection = connection
+        return self._connection
+
+    def _add(self, rows):
+        # rows: (item_id, kind, post_id, channel_id, text)
+        rows = [row for row in rows if row[4]]
+        if not rows:
+            return
+
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                connection.executemany(
+                    "INSERT INTO documents (item_id, kind, post_id, channel_id, text) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (item_id) DO UPDATE SET post_id = COALESCE(excluded.post_id, documents.post_id), "
+                    "channel_id = COALESCE(excluded.channel_id, documents.channel_id), text = excluded.text",
+                    rows,
+                )
+
+    def add_posts(self, posts):
+        self._add([(post.post_id, "post", post.post_id, post.channel_id, post.get_text()) for post in posts])
+
+    def add_comments(self, comments):
+        self._add([(comment.comment_id, "comment", comment.post_id, comment.channel_id, comment.get_text()) for comment in comments])
+
+    def add_replies(self, replies, post_id=None, channel_id=None):
+        self._add([(reply.reply_id, "reply", post_id, channel_id, reply.get_text()) for reply in replies])
+
+    @staticmethod
+    def _quote_query(query):
+        # Plain keyword search: every word must appear, FTS5 operators are not interpreted
+        return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+    def search(self, query, channel_id=None, post_id=None, kind=None, limit=20, offset=0, raw=False):
+        # Results are sorted by relevance (bm25), best match first. With raw=True the query is passed
+        # to FTS5 as is, so its syntax (OR, NEAR, prefix*, ...) can be used.
+        match = query if raw else SearchIndex._quote_query(query)
+        if not match:
+            return []
+
+        statement = (
+            "SELECT d.item_id, d.kind, d.post_id, d.channel_id, d.text, bm25(documents_fts) AS rank "
+            "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid WHERE documents_fts MATCH ?"
+        )
+        params = [match]
+
+        for column, value in [("channel_id", channel_id), ("post_id", post_id), ("kind", kind)]:
+            if value is not None:
+                statement += f" AND d.{column} = ?"
+                params.append(value)
+
+        statement += " ORDER BY rank LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+        with self._lock:
+            rows = self._get_connection().execute(statement, params).fetchall()
+
+        return [
+            {"item_id": row[0], "kind": row[1], "post_id": row[2], "channel_id": row[3], "text": row[4], "rank": row[5]}
+            for row in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
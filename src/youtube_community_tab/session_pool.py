@@ -0,0 +1,176 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha1
+from http import cookiejar
+
+import requests
+
+from .client_context import ClientContext
+from .rate_limiter import RateLimiter
+from .requests_handler import get_session, get_timeout
+
+
+def create_account_session(name):
+    # Own cookie jar, connection pool and cache backend. The backend uses the cache file of the
+    # default session, but its keys include the account, so a response fetched with the cookies of
+    # one account (a members-only post, for example) is never served to another one. The key
+    # function is a setting of the backend, which is why it isn't shared.
+    from requests_cache import CachedSession, create_key
+
+    from .cache_backend import BoundedSQLiteCache
+
+    account_key = sha1(name.encode()).hexdigest()[:16]
+
+    def key_fn(request, **kwargs):
+        return f"{account_key}-{create_key(request, **kwargs)}"
+
+    default_cache = get_session().cache
+    cache = BoundedSQLiteCache(default_cache.responses.db_path, max_size=default_cache.max_size, wal=True, busy_timeout=30000)
+    return CachedSession(allowable_methods=("GET", "POST"), backend=cache, key_fn=key_fn)
+
+
+def load_cookies(cookies):
+    # cookies can be a cookie jar or the path of a cookies.txt file
+    if isinstance(cookies, str):
+        cookie_jar = cookiejar.MozillaCookieJar(cookies)
+        cookie_jar.load()
+        return cookie_jar
+    return cookies
+
+
+class Account(object):
+    # One authenticated identity: its own session and cookie jar, with the ClientContext
+    # (session_index for X-Goog-AuthUser and visitor_data) that goes with it. It has get, post and cookies, so it can be
+    # passed as session to CommunityTab, Post, Comment and their static methods.
+    #
+    # Every request is rate limited, and 429, 5xx and connection errors put the account on a
+    # cooldown that doubles with every consecutive failure.
+
+    def __init__(self, name, cookies=None, session=None, session_index="0", visitor_data=None, requests_per_second=1, cooldown=60, max_cooldown=60 * 60):
+        self.name = name
+        self.session = create_account_session(name) if session is None else session
+        if cookies is not None:
+            self.session.cookies = load_cookies(cookies)
+        self.client_context = ClientContext(visitor_data=visitor_data, session_index=session_index)
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    @property
+    def visitor_data(self):
+        return self.client_context.visitor_data
+
+    @property
+    def session_index(self):
+        return self.client_context.session_index
+
+    @property
+    def cookies(self):
+        return self.session.cookies
+
+    @cookies.setter
+    def cookies(self, cookies):
+        self.session.cookies = load_cookies(cookies)
+
+    def request(self, method, url, **kwargs):
+        self.rate_limiter.acquire()
+        # Account sessions don't have the CircuitBreakerAdapter that adds it
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = get_timeout()
+
+        try:
+            r = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self._record_failure(str(e))
+            raise e
+
+        if r.status_code == 429 or r.status_code >= 500:
+            self._record_failure(f"[status_code={r.status_code}]")
+        else:
+            self._record_success()
+
+        return r
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def _record_success(self):
+        with self._lock:
+            self.requests += 1
+            self.consecutive_failures = 0
+
+    def _record_failure(self, error):
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            self.cooldown_until = time.monotonic() + min(self.cooldown * 2 ** (self.consecutive_failures - 1), self.max_cooldown)
+
+    def is_healthy(self):
+        return time.monotonic() >= self.cooldown_until
+
+    def get_stats(self):
+        return {
+            "name": self.name,
+            "healthy": self.is_healthy(),
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "cooldown": max(0, self.cooldown_until - time.monotonic()),
+            "last_error": self.last_error,
+        }
+
+
+class SessionPool(object):
+    # Spreads work across several accounts. acquire() hands out the healthy accounts in turn, and
+    # map() runs a function over many items with one thread per account.
+
+    def __init__(self, accounts=()):
+        self.accounts = list(accounts)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_cookie_files(paths, **kwargs):
+        # One account per cookies.txt file, kwargs are passed to every Account
+        return SessionPool([Account(path, cookies=path, **kwargs) for path in paths])
+
+    def add(self, account):
+        with self._lock:
+            self.accounts.append(account)
+
+    def acquire(self):
+        with self._lock:
+            if not self.accounts:
+                raise Exception("[The session pool has no accounts]")
+
+            healthy_accounts = [account for account in self.accounts if account.is_healthy()]
+            if not healthy_accounts:
+                account = min(self.accounts, key=lambda account: account.cooldown_until)
+                raise Exception(f"[Every account is cooling down, the first one is available in {account.get_stats()['cooldown']:.0f}s]")
+
+            return healthy_accounts[next(self._counter) % len(healthy_accounts)]
+
+    def map(self, function, items, max_workers=None):
+        # Returns [function(item, session=account) for item in items], in order
+        def call(item):
+            return function(item, session=self.acquire())
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(self.accounts)) as executor:
+            return list(executor.map(call, items))
+
+    def get_stats(self):
+        return [account.get_stats() for account in self.accounts]
@@ -0,0 +1,75 @@
+import json
+import threading
+
+from .comment import Comment
+from .post import Post
+from .reply import Reply
+
+# A sink is any callable that takes a Post, Comment or Reply. Assign it to CommunityTab.sink,
+# Post.sink or Comment.sink and every parsed item is passed to it instead of being appended to
+# posts, comments or replies, so nothing accumulates in memory during long crawls.
+
+
+def get_item_kind(item):
+    if isinstance(item, Post):
+        return "post"
+    elif isinstance(item, Comment):
+        return "comment"
+    elif isinstance(item, Reply):
+        return "reply"
+    raise Exception(f"[There is no implementation for items of type {type(item).__name__} yet]")
+
+
+class JsonLinesSink(object):
+    # Appends every item as a line of json, {"kind": "post" | "comment" | "reply", **item.as_json()}
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def __call__(self, item):
+        line = json.dumps({"kind": get_item_kind(item), **item.as_json()})
+
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class QueueSink(object):
+    # Puts every item in a queue.Queue (or anything with a put method). A bounded queue makes the
+    # crawl wait for the consumer.
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def __call__(self, item):
+        self.queue.put(item)
+
+
+def crawl_community_tab(community_tab, sink, expire_after=0, max_posts=None, comments=True, max_comments_per_post=None, replies=True, prefetch=0):
+    # Streams the posts of the community tab, and their comments and replies, to the sink. Only the
+    # page that is being parsed is kept in memory, plus the prefetch pages loaded ahead of it.
+    community_tab.sink = sink
+
+    for posts in community_tab.iter_post_pages(expire_after=expire_after, max_posts=max_posts, prefetch=prefetch):
+        for post in posts:
+            if not comments:
+                continue
+
+            for comments_page in post.iter_comment_pages(expire_after=expire_after, max_comments=max_comments_per_post, prefetch=prefetch):
+                if not replies:
+                    continue
+
+                for comment in comments_page:
+                    for _ in comment.iter_reply_pages(expire_after=expire_after, prefetch=prefetch):
+                        pass
@@ -0,0 +1,190 @@
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from .helpers.paths import get_data_path
+from .post import Post
+
+STATS_STORE_DIR_PATH = get_data_path("stats")
+
+
+def _encode_zigzag(value, out):
+    value = (value << 1) ^ (value >> 63)
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_record(record):
+    # The three deltas of a record, or None when it's malformed
+    deltas = []
+    value = 0
+    shift = 0
+
+    for byte in record:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+
+        deltas.append((value >> 1) ^ -(value & 1))
+        value = 0
+        shift = 0
+
+    if len(deltas) != 3 or shift:
+        return None
+    return deltas
+
+
+class StatsStore(object):
+    # Time series of (timestamp, likes, comments) per post. Every post has its own append-only file
+    # where each point is stored as the zigzag varint deltas from the previous one, which takes a few
+    # bytes per point for slowly changing counters. Queries decode into one array per column.
+    # Unknown counts are stored as -1.
+    #
+    # Every record starts with its length, so a write torn by a crash is detected: the points before
+    # it are read as usual, and the next append truncates it.
+
+    COLUMNS = ("timestamp", "likes", "comments")
+
+    def __init__(self, path=STATS_STORE_DIR_PATH):
+        self.path = path
+
+        self._last_points = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(self.path, exist_ok=True)
+
+    def _get_file_path(self, post_id):
+        return os.path.join(self.path, f"{post_id}.stats")
+
+    def _get_last_point(self, post_id):
+        if post_id not in self._last_points:
+            last_point = (0, 0, 0)
+            end = 0
+            for end, last_point in self._iter_records(post_id):
+                pass
+
+            file_path = self._get_file_path(post_id)
+            if os.path.exists(file_path) and os.path.getsize(file_path) > end:
+                with open(file_path, "r+b") as f:
+                    f.truncate(end)
+
+            self._last_points[post_id] = last_point
+        return self._last_points[post_id]
+
+    def append(self, post_id, likes, comments, timestamp=None):
+        self.append_many([(post_id, likes, comments)], timestamp=timestamp)
+
+    def append_many(self, points, timestamp=None):
+        # points: iterable of (post_id, likes, comments), all taken at the same timestamp
+        timestamp = int(time.time() if timestamp is None else timestamp)
+
+        with self._lock:
+            for post_id, likes, comments in points:
+                point = (timestamp, -1 if likes is None else likes, -1 if comments is None else comments)
+                last_point = self._get_last_point(post_id)
+
+                out = bytearray()
+                for value, last_value in zip(point, last_point):
+                    _encode_zigzag(value - last_value, out)
+
+                with open(self._get_file_path(post_id), "ab") as f:
+                    f.write(bytes([len(out)]) + out)
+
+                self._last_points[post_id] = point
+
+    def _iter_records(self, post_id):
+        # Yields (offset after the record, (timestamp, likes, comments)), reading the file in chunks.
+        # It stops at the first incomplete or malformed record.
+        file_path = self._get_file_path(post_id)
+        if not os.path.exists(file_path):
+            return
+
+        timestamp, likes, comments = 0, 0, 0
+        offset = 0
+        buffer = b""
+
+        with open(file_path, "rb") as f:
+            while True:
+                chunk = f.read(1 << 16)
+                if not chunk:
+                    break
+
+                buffer += chunk
+                position = 0
+                while position < len(buffer):
+                    size = buffer[position]
+                    record = buffer[position + 1 : position + 1 + size]
+                    if len(record) < size:
+                        break
+
+                    deltas = _decode_record(record)
+                    if deltas is None:
+                        return
+
+                    timestamp, likes, comments = timestamp + deltas[0], likes + deltas[1], comments + deltas[2]
+                    position += 1 + size
+                    offset += 1 + size
+                    yield offset, (timestamp, likes, comments)
+
+                buffer = buffer[position:]
+
+    def iter_points(self, post_id, start=None, end=None):
+        # Yields (timestamp, likes, comments)
+        for _, point in self._iter_records(post_id):
+            if end is not None and point[0] > end:
+                return
+            if start is None or point[0] >= start:
+                yield point
+
+    def query(self, post_id, start=None, end=None):
+        # Returns {"timestamp": array, "likes": array, "comments": array} for start <= timestamp <= end
+        columns = {column: array("q") for column in StatsStore.COLUMNS}
+        timestamps, likes, comments = (columns[column] for column in StatsStore.COLUMNS)
+
+        for point in self.iter_points(post_id, start=start, end=end):
+            timestamps.append(point[0])
+            likes.append(point[1])
+            comments.append(point[2])
+
+        return columns
+
+    def post_ids(self):
+        return [file_name[: -len(".stats")] for file_name in os.listdir(self.path) if file_name.endswith(".stats")]
+
+
+class StatsRecorder(object):
+    # Polls the like and comment counts of many posts and appends them to a StatsStore
+
+    def __init__(self, store, expire_after=0, max_workers=8):
+        self.store = store
+        self.expire_after = expire_after
+        self.max_workers = max_workers
+
+    def get_stats(self, post_id):
+        post = Post.from_post_id(post_id, expire_after=self.expire_after)
+        return post.get_vote_count(), post.load_comment_count(expire_after=self.expire_after)
+
+    def _get_stats_or_none(self, post_id):
+        try:
+            return self.get_stats(post_id)
+        except Exception as e:
+            print(f"[Can't get the stats of the post {post_id}: {e}]")
+            return None, None
+
+    def poll(self, post_ids, timestamp=None):
+        # One poll cycle, every post gets a point with the same timestamp
+        post_ids = list(post_ids)
+        timestamp = time.time() if timestamp is None else timestamp
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            stats = list(executor.map(self._get_stats_or_none, post_ids))
+
+        points = [(post_id, likes, comments) for post_id, (likes, comments) in zip(post_ids, stats)]
+        self.store.append_many(points, timestamp=timestamp)
+
+        return {post_id: {"likes": likes, "comments": comments} for post_id, likes, comments in points}
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .helpers.paths import get_data_path
+
+THUMBNAILS_DIR_PATH = get_data_path("thumbnails")
+
+CONTENT_TYPE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+
+class ThumbnailDownloader(object):
+    # Downloads one resolution of every image of a list of posts. Files are stored by the sha256 of
+    # their content and index.jsonl maps every downloaded url to its file, so urls shared by several
+    # posts, or already downloaded by a previous run, are only fetched once.
+
+    RESOLUTIONS = ("largest", "smallest", "closest")
+
+    def __init__(self, path=THUMBNAILS_DIR_PATH, resolution="largest", target_width=None, max_workers=8, timeout=30):
+        if resolution not in ThumbnailDownloader.RESOLUTIONS:
+            raise ValueError(f"[resolution must be one of {ThumbnailDownloader.RESOLUTIONS}, not {resolution}]")
+        if resolution == "closest" and target_width is None:
+            raise ValueError("[resolution='closest' needs a target_width]")
+
+        self.path = path
+        self.resolution = resolution
+        self.target_width = target_width
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        # Images are not worth keeping in the requests cache, so they get their own connection pool
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._index_path = os.path.join(self.path, "index.jsonl")
+        self._lock = threading.Lock()
+
+        os.makedirs(self.path, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        index = {}
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.decoder.JSONDecodeError:
+                        # Last line of an interrupted run
+                        continue
+                    index[entry["url"]] = entry["file"]
+        return index
+
+    @staticmethod
+    def pick_thumbnail(thumbnails, resolution="largest", target_width=None):
+        if not thumbnails:
+            return None
+
+        if resolution == "smallest":
+            return min(thumbnails, key=lambda thumbnail: thumbnail.get("width", 0))
+        elif resolution == "closest":
+            return min(thumbnails, key=lambda thumbnail: abs(thumbnail.get("width", 0) - target_width))
+        return max(thumbnails, key=lambda thumbnail: thumbnail.get("width", 0))
+
+    @staticmethod
+    def normalize_url(url):
+        if url.startswith("//"):
+            return "https:" + url
+        return url
+
+    def get_urls(self, posts):
+        # Unique urls, in order, of the chosen resolution of every image of the posts
+        urls = {}
+        for post in posts:
+            for thumbnails in post.get_thumbnails():
+                thumbnail = ThumbnailDownloader.pick_thumbnail(thumbnails, resolution=self.resolution, target_width=self.target_width)
+                if thumbnail is not None:
+                    urls[ThumbnailDownloader.normalize_url(thumbnail["url"])] = None
+        return list(urls)
+
+    def get_file_path(self, url):
+        file_name = self.index.get(url)
+        if file_name is None:
+            return None
+
+        file_path = os.path.join(self.path, file_name)
+        if os.path.exists(file_path):
+            return file_path
+        return None
+
+    def _download(self, url):
+        file_path = self.get_file_path(url)
+        if file_path is not None:
+            return file_path
+
+        r = self.session.get(url, timeout=self.timeout)
+        r.raise_for_status()
+
+        digest = sha256(r.content).hexdigest()
+        extension = CONTENT_TYPE_EXTENSIONS.get(r.headers.get("Content-Type", "").split(";")[0].strip(), "")
+        file_name = os.path.join(digest[:2], digest + extension)
+        file_path = os.path.join(self.path, file_name)
+
+        if not os.path.exists(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            tmp_file_path = f"{file_path}.{threading.get_ident()}.tmp"
+            with open(tmp_file_path, "wb") as f:
+                f.write(r.content)
+            os.replace(tmp_file_path, file_path)
+
+        with self._lock:
+            self.index[url] = file_name
+            with open(self._index_path, "a") as f:
+                f.write(json.dumps({"url": url, "file": file_name}) + "\n")
+
+        return file_path
+
+    def _download_or_none(self, url):
+        try:
+            return self._download(url)
+        except Exception as e:
+            print(f"[Can't download {url}: {e}]")
+            return None
+
+    def download(self, urls):
+        # Returns {url: file_path}, file_path is None when the download failed
+        urls = list(dict.fromkeys(ThumbnailDownloader.normalize_url(url) for url in urls))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            file_paths = list(executor.map(self._download_or_none, urls))
+
+        return dict(zip(urls, file_paths))
+
+    def download_posts(self, posts):
+        return self.download(self.get_urls(posts))
@@ -0,0 +1,86 @@
+# Fake sessions and YouTube pages shared by the tests, so they run without network access.
+# Imported as a plain module: pytest and python tests/test_*.py both put tests/ on sys.path.
+
+import json
+
+import requests
+
+from youtube_community_tab.client_context import ClientContext
+
+
+class FakeResponse(object):
+    # A response with the given text, or with data as its json
+    def __init__(self, text="", status_code=200, data=None, content=None, headers=None):
+        self.text = text
+        self.status_code = status_code
+        self.data = data
+        self.content = text.encode() if content is None else content
+        self.headers = {} if headers is None else headers
+
+    def json(self):
+        return json.loads(self.text) if self.data is None else self.data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"[{self.status_code}]", response=self)
+
+
+class FakeSession(object):
+    # Records every request as (method, url, kwargs) and answers it with respond(method, url, kwargs),
+    # which returns a FakeResponse or raises. Every session has its own client context.
+    def __init__(self, respond=None):
+        self.cookies = {}
+        self.client_context = ClientContext()
+        self.requests = []
+        if respond is not None:
+            self.respond = respond
+
+    def respond(self, method, url, kwargs):
+        return None
+
+    def get(self, url, **kwargs):
+        self.requests.append(("GET", url, kwargs))
+        return self.respond("GET", url, kwargs)
+
+    def post(self, url, **kwargs):
+        self.requests.append(("POST", url, kwargs))
+        return self.respond("POST", url, kwargs)
+
+
+class TimeoutSession(FakeSession):
+    # Every request times out
+    def respond(self, method, url, kwargs):
+        raise requests.exceptions.ReadTimeout("[Read timed out]")
+
+
+def make_page(initial_data):
+    # A YouTube page with initial_data as its ytInitialData
+    return "<script>var ytInitialData = {};</script>".replace("{}", json.dumps(initial_data))
+
+
+def make_post_page(comments_continuation_token, visitor_data="visitor-1", session_index=0):
+    # Post page whose comments section starts with comments_continuation_token
+    continuation_item = {"continuationItemRenderer": {"continuationEndpoint": {"clickTrackingParams": "click", "continuationCommand": {"token": comments_continuation_token}}}}
+    section_list = {"contents": [{}, {"itemSectionRenderer": {"contents": [continuation_item]}}]}
+
+    return make_page(
+        {
+            "responseContext": {"webResponseContextExtensionData": {"ytConfigData": {"visitorData": visitor_data, "sessionIndex": session_index}}},
+            "contents": {"twoColumnBrowseResultsRenderer": {"tabs": [{"tabRenderer": {"content": {"sectionListRenderer": section_list}}}]}},
+        }
+    )
+
+
+def make_comment_item(comment_id):
+    return {"commentThreadRenderer": {"commentViewModel": {"commentViewModel": {"commentId": comment_id}}}}
+
+
+def make_comments_page(items, continuation_token=None, first=True):
+    # Browse response with the comment items. The first page of a post reloads the comments
+    # section, the next ones are appended to it.
+    if continuation_token is not None:
+        items = items + [{"continuationItemRenderer": {"continuationEndpoint": {"continuationCommand": {"token": continuation_token}}}}]
+
+    if first:
+        return {"onResponseReceivedEndpoints": [{}, {"reloadContinuationItemsCommand": {"continuationItems": items}}], "trackingParams": ""}
+    return {"onResponseReceivedEndpoints": [{"appendContinuationItemsAction": {"continuationItems": items}}], "trackingParams": ""}
@@ -0,0 +1,109 @@
+import io
+import os
+import sqlite3
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3 import HTTPResponse
+
+from youtube_community_tab.cache_backend import BoundedSQLiteCache, CacheState
+
+
+class RandomContentAdapter(HTTPAdapter):
+    def send(self, request, **kwargs):
+        raw = HTTPResponse(body=io.BytesIO(os.urandom(1000)), status=200, preload_content=False, request_url=request.url)
+        return self.build_response(request, raw)
+
+
+def test_bounded_cache(tmp_path):
+    cache = BoundedSQLiteCache(str(tmp_path / "cache.sqlite"), max_size=7000)
+    session = CachedSession(backend=cache)
+    session.mount("https://", RandomContentAdapter())
+
+    for i in range(5):
+        session.get(f"https://www.youtube.com/post/post-{i}")
+    assert cache.responses.count() == 5
+
+    # post-0 is the oldest one but it was just read, so post-1 and post-2 are evicted instead
+    assert session.get("https://www.youtube.com/post/post-0").from_cache
+    session.get("https://www.youtube.com/post/post-5")
+
+    urls = sorted(response.url for response in cache.responses.values())
+    assert urls == [f"https://www.youtube.com/post/post-{i}" for i in [0, 3, 4, 5]]
+    assert cache.get_total_size() <= cache.max_size * cache.eviction_ratio
+
+    # The size is read back by a new cache
+    assert BoundedSQLiteCache(str(tmp_path / "cache.sqlite"), max_size=7000).get_total_size() == cache.get_total_size()
+
+
+def test_cache_shared_between_processes(tmp_path):
+    sessions = []
+    for _ in range(2):
+        # A new CacheState, as if every cache was opened by another worker
+        CacheState._states.clear()
+        session = CachedSession(backend=BoundedSQLiteCache(str(tmp_path / "cache.sqlite"), max_size=7000))
+        session.mount("https://", RandomContentAdapter())
+        sessions.append(session)
+
+    for i in range(3):
+        sessions[0].get(f"https://www.youtube.com/post/post-{i}")
+    for i in range(3, 6):
+        sessions[1].get(f"https://www.youtube.com/post/post-{i}")
+
+    # The second worker counted the responses of the first one, so both together stay under max_size
+    assert sessions[1].get("https://www.youtube.com/post/post-0").from_cache is False
+    assert sessions[0].cache.get_total_size() == sessions[1].cache.get_total_size() <= 7000
+    assert sessions[0].cache.responses.count() < 6
+
+
+def test_cache_initialized_once(tmp_path):
+    CacheState._states.clear()
+    db_path = str(tmp_path / "cache.sqlite")
+    cache = BoundedSQLiteCache(db_path)
+
+    # A response that isn't in the lru table yet
+    with sqlite3.connect(db_path) as con:
+        con.execute(f"INSERT INTO {cache.responses.table_name} (key, value) VALUES ('key-1', x'00')")
+
+    # The caches of the other threads only open a connection
+    BoundedSQLiteCache(db_path)
+    with sqlite3.connect(db_path) as con:
+        assert con.execute("SELECT COUNT(*) FROM lru").fetchone()[0] == 0
+
+    # Another process backfills it
+    CacheState._states.clear()
+    BoundedSQLiteCache(db_path)
+    with sqlite3.connect(db_path) as con:
+        assert con.execute("SELECT COUNT(*) FROM lru").fetchone()[0] == 1
+
+
+def test_compressed_responses(tmp_path):
+    cache = BoundedSQLiteCache(str(tmp_path / "cache.sqlite"))
+    session = CachedSession(backend=cache)
+
+    response = requests.Response()
+    response.status_code = 200
+    response.url = "https://www.youtube.com/post/post-1"
+    response.request = requests.Request("GET", response.url).prepare()
+    response.raw = HTTPResponse(body=io.BytesIO(b""), status=200, request_url=response.url)
+    response._content = b"<html>" + b"ytInitialData" * 1000 + b"</html>"
+
+    session.cache.save_response(response)
+
+    assert cache.get_total_size() < 1000
+    assert session.cache.get_response(session.cache.create_key(response.request)).content == response._content
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_bounded_cache(Path(tmp) / "bounded")
+        os.makedirs(Path(tmp) / "shared")
+        test_cache_shared_between_processes(Path(tmp) / "shared")
+        os.makedirs(Path(tmp) / "initialized")
+        test_cache_initialized_once(Path(tmp) / "initialized")
+        os.makedirs(Path(tmp) / "compressed")
+        test_compressed_responses(Path(tmp) / "compressed")
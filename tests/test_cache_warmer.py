@@ -0,0 +1,82 @@
+import time
+
+from youtube_community_tab.cache_warmer import CacheWarmer, RefreshSession
+from youtube_community_tab.exceptions import ChannelNotFoundError
+
+from fakes import FakeSession
+
+
+def test_refresh_session():
+    session = FakeSession()
+    refresh_session = RefreshSession(session)
+
+    refresh_session.get("https://www.youtube.com/", expire_after=10)
+    refresh_session.post("https://www.youtube.com/youtubei/v1/browse", json={})
+
+    assert session.requests == [
+        ("GET", "https://www.youtube.com/", {"force_refresh": True, "expire_after": 10}),
+        ("POST", "https://www.youtube.com/youtubei/v1/browse", {"force_refresh": True, "json": {}}),
+    ]
+    assert refresh_session.cookies is session.cookies
+
+
+def test_cache_warmer():
+    refreshed = []
+
+    def warm_channel(channel_name, expire_after, session):
+        if channel_name == "@removed":
+            raise ChannelNotFoundError(channel_name)
+        refreshed.append(channel_name)
+
+    warmer = CacheWarmer(ttl=0.2, refresh_ahead=0.5, max_items=2, refreshes_per_minute=60, session=FakeSession())
+    warmer.WARMERS = {"channel": warm_channel}
+
+    for channel_name in ["@cold", "@hot", "@hot", "@hot", "@warm", "@warm"]:
+        warmer.record("channel", channel_name)
+
+    assert [key for key, _ in warmer.get_hot_items()] == [("channel", "@hot"), ("channel", "@warm")]
+
+    # Nothing is due before refresh_ahead of the ttl is left
+    assert warmer.run_once() == 0
+    time.sleep(0.15)
+    assert warmer.get_due_items() == [("channel", "@hot"), ("channel", "@warm")]
+    assert warmer.run_once() == 2
+    assert refreshed == ["@hot", "@warm"]
+    assert warmer.get_due_items() == []
+
+    # The budget limits the refreshes, the hottest items go first
+    warmer._budget = 1
+    time.sleep(0.15)
+    assert warmer.run_once() == 1
+    assert refreshed == ["@hot", "@warm", "@hot"]
+    assert warmer.stats["skipped_for_budget"] == 1
+
+    # Items that don't exist anymore are forgotten
+    for _ in range(5):
+        warmer.record("channel", "@removed")
+    warmer._budget = 10
+    time.sleep(0.15)
+    warmer.run_once()
+    assert ("channel", "@removed") not in [key for key, _ in warmer.get_hot_items()]
+
+
+def test_cache_warmer_leader(tmp_path):
+    lock_path = str(tmp_path / "warmer.lock")
+    warmers = [CacheWarmer(lock_path=lock_path, session=FakeSession()) for _ in range(2)]
+
+    assert [warmer._is_leader() for warmer in warmers] == [True, False]
+
+    # The lock is released when the leader stops
+    warmers[0].stop()
+    assert warmers[1]._is_leader()
+    warmers[1].stop()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_refresh_session()
+    test_cache_warmer()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_warmer_leader(Path(tmp))
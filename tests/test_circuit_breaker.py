@@ -0,0 +1,135 @@
+import time
+
+import requests
+
+from youtube_community_tab.circuit_breaker import CircuitBreaker, CircuitBreakerAdapter, NegativeCache, item_circuit_breaker, post_negative_cache
+from youtube_community_tab.community_tab import CommunityTab
+from youtube_community_tab.exceptions import ChannelNotFoundError, CircuitOpenError, PostNotFoundError, UpstreamError
+from youtube_community_tab.post import Post
+from youtube_community_tab.resolution_cache import ResolutionCache
+
+from fakes import FakeResponse, FakeSession
+
+
+def get_session(status_code, text=""):
+    # Answers every request with the same status code
+    return FakeSession(lambda method, url, kwargs: FakeResponse(text, status_code=status_code))
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=2, cooldown=0.1)
+
+    breaker.before_call("key")
+    breaker.record_failure("key")
+    breaker.before_call("key")
+    breaker.record_failure("key")
+    assert breaker.is_open("key") and not breaker.is_open("other-key")
+
+    try:
+        breaker.before_call("key")
+        assert False
+    except CircuitOpenError as e:
+        assert e.key == "key" and 0 < e.retry_after <= 0.1
+
+    # After the cooldown one call goes through, and its failure opens the circuit for twice as long
+    time.sleep(0.15)
+    breaker.before_call("key")
+    breaker.record_failure("key")
+    assert 0.1 < breaker.get_stats()["open"]["key"] <= 0.2
+
+    time.sleep(0.25)
+    breaker.before_call("key")
+    breaker.record_success("key")
+    assert not breaker.is_open("key") and breaker.get_stats() == {"failing": 0, "open": {}}
+
+
+def test_negative_cache():
+    cache = NegativeCache(ttl=0.1, max_size=2)
+
+    for key in ["a", "b", "c"]:
+        cache.set(key, key.upper())
+    assert cache.get("a") is None and cache.get("c") == "C"
+
+    time.sleep(0.15)
+    assert cache.get("c") is None
+
+
+def test_circuit_breaker_adapter():
+    breaker = CircuitBreaker("upstream", failure_threshold=2, cooldown=60)
+    session = requests.Session()
+    session.mount("http://", CircuitBreakerAdapter(breaker))
+
+    for _ in range(2):
+        try:
+            session.get("http://127.0.0.1:9", timeout=1)
+            assert False
+        except requests.exceptions.ConnectionError:
+            pass
+
+    # Fails without trying to connect
+    try:
+        session.get("http://127.0.0.1:9", timeout=1)
+        assert False
+    except CircuitOpenError as e:
+        assert e.key is None
+
+
+def test_channel_not_found(tmp_path):
+    session = get_session(404)
+    community_tab = CommunityTab("@this-channel-does-not-exist", session=session)
+    community_tab.resolution_cache = ResolutionCache(path=str(tmp_path / "resolution_cache.sqlite"))
+
+    for cached in [False, True]:
+        try:
+            community_tab.load_posts()
+            assert False
+        except ChannelNotFoundError as e:
+            assert e.cached is cached
+
+    # The second time nothing is downloaded
+    assert len(session.requests) == 2
+
+
+def test_failing_post():
+    post_id = "UgkxFailingPostForTheCircuitBreaker"
+    session = get_session(503)
+
+    for _ in range(item_circuit_breaker.failure_threshold):
+        try:
+            Post.from_post_id(post_id, session=session)
+            assert False
+        except UpstreamError as e:
+            assert e.status_code == 503
+
+    try:
+        Post.from_post_id(post_id, session=session)
+        assert False
+    except CircuitOpenError:
+        pass
+    assert len(session.requests) == item_circuit_breaker.failure_threshold
+
+    item_circuit_breaker.record_success(post_id)
+
+    # Removed posts are cached negatively
+    session = get_session(200, 'var ytInitialData = {"alerts": [{"alertRenderer": {}}]};</script>')
+    for cached in [False, True]:
+        try:
+            Post.from_post_id(post_id, session=session)
+            assert False
+        except PostNotFoundError as e:
+            assert e.cached is cached
+    assert len(session.requests) == 1
+
+    post_negative_cache.delete(post_id)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_circuit_breaker()
+    test_negative_cache()
+    test_circuit_breaker_adapter()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_channel_not_found(Path(tmp))
+    test_failing_post()
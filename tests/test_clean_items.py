@@ -0,0 +1,109 @@
+import copy
+
+from youtube_community_tab.helpers.clean_items import clean_backstage_attachement, clean_content_text
+from youtube_community_tab.post import Post
+
+CONTENT_TEXT = {
+    "runs": [
+        {"text": "RIGHT NOW: subscribe with code \"BEST\"\n"},
+        {
+            "text": "https://www.curiositybox.com",
+            "navigationEndpoint": {
+                "clickTrackingParams": "CA0Q",
+                "urlEndpoint": {"url": "https://www.youtube.com/redirect?event=backstage&q=https%3A%2F%2Fwww.curiositybox.com%2F&v=1", "target": "TARGET_NEW_WINDOW"},
+            },
+            "loggingDirectives": {"trackingParams": "CA0Q"},
+        },
+        {
+            "text": "#vsauce",
+            "navigationEndpoint": {
+                "clickTrackingParams": "CA0Q",
+                "commandMetadata": {"webCommandMetadata": {"url": "/hashtag/vsauce"}},
+                "browseEndpoint": {"browseId": "FEhashtag", "params": "6gUI"},
+            },
+            "loggingDirectives": {"trackingParams": "CA0Q"},
+        },
+    ]
+}
+
+VIDEO_ATTACHMENT = {
+    "videoRenderer": {
+        "videoId": "dQw4w9WgXcQ",
+        "navigationEndpoint": {
+            "commandMetadata": {"webCommandMetadata": {"url": "/watch?v=dQw4w9WgXcQ"}},
+            "watchEndpoint": {"videoId": "dQw4w9WgXcQ", "watchEndpointSupportedOnesieConfig": {}},
+        },
+        "longBylineText": {"runs": [{"text": "Vsauce", "navigationEndpoint": {"browseEndpoint": {"browseId": "UC6nSFpj9HTCZ5t-N3Rm3-HA"}}}]},
+        "ownerText": {"runs": [{"text": "Vsauce", "navigationEndpoint": {"browseEndpoint": {"browseId": "UC6nSFpj9HTCZ5t-N3Rm3-HA"}}}]},
+        "trackingParams": "CA0Q",
+        "menu": {},
+    }
+}
+
+POST_DATA = {
+    "postId": "UgkxzeM19x_He9LEoerdLOHwZJsqIwamUnTj",
+    "channelId": "UC6nSFpj9HTCZ5t-N3Rm3-HA",
+    "authorText": {
+        "runs": [
+            {
+                "text": "Vsauce",
+                "navigationEndpoint": {
+                    "browseEndpoint": {"browseId": "UC6nSFpj9HTCZ5t-N3Rm3-HA"},
+                    "commandMetadata": {"webCommandMetadata": {"url": "/c/vsauce1"}},
+                },
+            }
+        ]
+    },
+    "authorEndpoint": {
+        "clickTrackingParams": "CA0Q",
+        "commandMetadata": {"webCommandMetadata": {"url": "/c/vsauce1"}},
+        "browseEndpoint": {"browseId": "UC6nSFpj9HTCZ5t-N3Rm3-HA"},
+    },
+    "contentText": CONTENT_TEXT,
+    "backstageAttachment": VIDEO_ATTACHMENT,
+    "voteCount": {"simpleText": "1.7K"},
+}
+
+
+def test_clean_content_text():
+    content_text = clean_content_text(copy.deepcopy(CONTENT_TEXT))
+
+    assert content_text["runs"][0] == CONTENT_TEXT["runs"][0]
+    assert content_text["runs"][1] == {
+        "text": "https://www.curiositybox.com",
+        "loggingDirectives": {"trackingParams": "CA0Q"},
+        "urlEndpoint": {"url": "https://www.curiositybox.com/"},
+    }
+    assert content_text["runs"][2] == {"text": "#vsauce", "browseEndpoint": {"browseId": "FEhashtag", "url": "/hashtag/vsauce"}}
+    assert clean_content_text(None) is None
+
+
+def test_clean_backstage_attachement():
+    video = clean_backstage_attachement(copy.deepcopy(VIDEO_ATTACHMENT))["videoRenderer"]
+
+    assert video["watchEndpoint"] == {"videoId": "dQw4w9WgXcQ", "url": "/watch?v=dQw4w9WgXcQ"}
+    assert video["longBylineText"]["runs"][0] == {"text": "Vsauce", "browseEndpoint": {"browseId": "UC6nSFpj9HTCZ5t-N3Rm3-HA"}}
+    assert "navigationEndpoint" in video["ownerText"]["runs"][0]
+    assert not any(key in video for key in ["navigationEndpoint", "trackingParams", "menu"])
+    assert clean_backstage_attachement(None) is None
+
+
+def test_from_data_clean_options():
+    post = Post.from_data(copy.deepcopy(POST_DATA))
+    lazy_post = Post.from_data(copy.deepcopy(POST_DATA), clean="lazy")
+    raw_post = Post.from_data(copy.deepcopy(POST_DATA), clean=False)
+
+    # Nothing is cleaned until it's read
+    assert "navigationEndpoint" in lazy_post.raw_data["contentText"]["runs"][1]
+    assert lazy_post.as_json() == post.as_json()
+    assert "navigationEndpoint" not in lazy_post.raw_data["contentText"]["runs"][1]
+
+    assert post.author["authorEndpoint"] == {"browseId": "UC6nSFpj9HTCZ5t-N3Rm3-HA", "url": "/c/vsauce1"}
+    assert raw_post.author["authorEndpoint"] == POST_DATA["authorEndpoint"]
+    assert raw_post.content_text == CONTENT_TEXT
+
+
+if __name__ == "__main__":
+    test_clean_content_text()
+    test_clean_backstage_attachement()
+    test_from_data_clean_options()
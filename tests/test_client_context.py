@@ -0,0 +1,82 @@
+import time
+
+import requests
+
+from youtube_community_tab.client_context import ClientContext, client_context, get_client_context
+from youtube_community_tab.post import Post
+from youtube_community_tab.exceptions import DeadlineExceededError
+from youtube_community_tab.requests_handler import requests_cache
+
+from fakes import FakeResponse, FakeSession, TimeoutSession, make_page
+
+HOME_PAGE = make_page({"responseContext": {"webResponseContextExtensionData": {"ytConfigData": {"visitorData": "visitor-1", "sessionIndex": 1}}}})
+
+
+class HomePageSession(FakeSession):
+    def respond(self, method, url, kwargs):
+        if method == "GET":
+            return FakeResponse(HOME_PAGE)
+        # An accepted comments page, so the locally built token isn't retried with the post page
+        return FakeResponse(data={"responseContext": {"visitorData": "visitor-2"}, "onResponseReceivedEndpoints": []})
+
+
+def test_client_context():
+    context = ClientContext(ttl=60)
+    assert context.is_expired()
+
+    context.update_from_data({"responseContext": {"visitorData": "visitor-1"}})
+    assert context.visitor_data == "visitor-1" and context.session_index == "0" and not context.is_expired()
+
+    context.update_from_data({"responseContext": {"webResponseContextExtensionData": {"ytConfigData": {"visitorData": "visitor-2", "sessionIndex": 2}}}})
+    assert context.visitor_data == "visitor-2" and context.session_index == "2"
+
+    assert get_client_context(requests_cache) is client_context
+    session = HomePageSession()
+    assert get_client_context(session) is session.client_context
+
+
+def test_posts_reuse_the_context():
+    session = HomePageSession()
+
+    posts = [Post(post_id, channel_id="UC6nSFpj9HTCZ5t-N3Rm3-HA", session=session) for post_id in ["post-1", "post-2"]]
+    for post in posts:
+        post.load_comments()
+
+    # The home page is downloaded once for both posts, the comments need no post page
+    assert [(method, url) for method, url, _ in session.requests] == [
+        ("GET", ClientContext.BOOTSTRAP_URL),
+        ("POST", Post.FORMAT_URLS["BROWSE_ENDPOINT"]),
+        ("POST", Post.FORMAT_URLS["BROWSE_ENDPOINT"]),
+    ]
+    assert session.requests[1][2]["json"]["context"]["client"]["visitorData"] == "visitor-1"
+
+    # Browse responses keep it up to date
+    assert session.client_context.visitor_data == "visitor-2"
+    assert session.client_context.bootstraps == 1
+
+
+def test_bootstrap_deadline():
+    session = TimeoutSession()
+
+    # Without a deadline the browse requests go on without visitorData
+    assert session.client_context.get_visitor_data(session) is None
+
+    # With one, the bootstrap gets the time left and its timeout reaches the caller
+    try:
+        session.client_context.get_visitor_data(session, deadline=time.monotonic() + 2)
+        assert False
+    except requests.exceptions.ReadTimeout:
+        pass
+    assert all(value <= 2 for value in session.requests[-1][2]["timeout"])
+
+    try:
+        session.client_context.get_visitor_data(session, deadline=time.monotonic() - 1)
+        assert False
+    except DeadlineExceededError:
+        pass
+
+
+if __name__ == "__main__":
+    test_client_context()
+    test_posts_reuse_the_context()
+    test_bootstrap_deadline()
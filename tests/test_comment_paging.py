@@ -0,0 +1,125 @@
+from youtube_community_tab.post import Post
+
+from fakes import FakeResponse, FakeSession, make_comment_item, make_comments_page, make_post_page
+
+
+class PagesSession(FakeSession):
+    # Browse responses for the tokens page-0 ... page-{pages - 1}
+    def __init__(self, pages=5, comments_per_page=2):
+        super().__init__()
+        self.pages = pages
+        self.comments_per_page = comments_per_page
+
+    def respond(self, method, url, kwargs):
+        page = int(kwargs["json"]["continuation"].split("-")[1])
+        items = [make_comment_item(f"comment-{page}-{i}") for i in range(self.comments_per_page)]
+        return FakeResponse(data=make_comments_page(items, f"page-{page + 1}" if page + 1 < self.pages else None, first=page == 0))
+
+    @property
+    def tokens(self):
+        return [kwargs["json"]["continuation"] for _, _, kwargs in self.requests]
+
+
+def get_post(session):
+    post = Post("post-id", channel_id="channel-id", session=session)
+    post.visitor_data = "visitor-data"
+    post.comments_continuation_token = "page-0"
+    return post
+
+
+def test_max_comments():
+    session = PagesSession()
+    post = get_post(session)
+
+    # Pages are never cut, so the second one goes over max_comments
+    post.load_comments(internal=False, max_comments=3)
+    assert [comment.comment_id for comment in post.comments] == ["comment-0-0", "comment-0-1", "comment-1-0", "comment-1-1"]
+    assert session.tokens == ["page-0", "page-1"]
+    assert post.comments_continuation_token == "page-2" and not post.truncated
+
+
+def test_max_pages():
+    session = PagesSession()
+    post = get_post(session)
+
+    pages = list(post.iter_comment_pages(max_pages=2))
+    assert [[comment.comment_id for comment in comments] for comments in pages] == [["comment-0-0", "comment-0-1"], ["comment-1-0", "comment-1-1"]]
+    assert post.comments_continuation_token == "page-2"
+
+    # The token left behind resumes where it stopped, until the last page
+    post.load_comments(internal=False)
+    assert session.tokens == ["page-0", "page-1", "page-2", "page-3", "page-4"]
+    assert len(post.comments) == 10
+    assert post.comments_continuation_token is False
+
+
+class RejectingSession(PagesSession):
+    # Rejects the locally built token, the post page has page-0
+    def respond(self, method, url, kwargs):
+        if method == "GET":
+            return FakeResponse(make_post_page("page-0"))
+        if not kwargs["json"]["continuation"].startswith("page-"):
+            return FakeResponse(data={"responseContext": {}})
+
+        response = super().respond(method, url, kwargs)
+        if kwargs["json"]["continuation"] == "page-0":
+            header = {"commentsHeaderRenderer": {"countText": {"runs": [{"text": "1.2K"}]}}}
+            response.data["onResponseReceivedEndpoints"][0] = {"reloadContinuationItemsCommand": {"continuationItems": [header]}}
+        return response
+
+    @property
+    def tokens(self):
+        return [kwargs["json"]["continuation"] for method, _, kwargs in self.requests if method == "POST"]
+
+
+def test_rejected_token():
+    session = RejectingSession()
+    post = Post("post-id", channel_id="channel-id", session=session)
+    post.visitor_data = "visitor-data"
+    built_token = Post.get_comments_continuation_token("post-id", "channel-id")
+
+    # The count comes from the first page of the post page token
+    assert post.load_comment_count() == 1200
+    assert session.tokens == [built_token, "page-0"]
+
+    # Also once the comments were loaded, which keep their token
+    post.comments_continuation_token = None
+    post.load_comments(internal=False, max_pages=2)
+    assert post.comments_continuation_token == "page-2" and not post.first
+    assert post.load_comment_count() == 1200
+    assert session.tokens[-2:] == [built_token, "page-0"]
+    assert post.comments_continuation_token == "page-2" and not post.first
+
+
+class CountSession(FakeSession):
+    # Accepts the locally built token, the first page has the count
+    def respond(self, method, url, kwargs):
+        if method == "GET":
+            return FakeResponse(make_post_page("page-0"))
+
+        response = FakeResponse(data=make_comments_page([make_comment_item("comment-0")]))
+        header = {"commentsHeaderRenderer": {"countText": {"runs": [{"text": "1.2K"}]}}}
+        response.data["onResponseReceivedEndpoints"][0] = {"reloadContinuationItemsCommand": {"continuationItems": [header]}}
+        return response
+
+
+def test_listed_post_stats():
+    session = CountSession()
+    # As listed by the community tab, with its channel_id and votes
+    post = Post.from_data({"postId": "post-id", "channelId": "channel-id", "voteCount": {"simpleText": "3.4K"}}, lazy=True)
+    post.session = session
+    post.visitor_data = "visitor-data"
+
+    # The stats need no post page, only the first comments page of the built token
+    assert post.load_stats() == {"post_id": "post-id", "likes": 3400, "comments": 1200}
+    assert [(method, kwargs["json"]["continuation"]) for method, _, kwargs in session.requests] == [
+        ("POST", Post.get_comments_continuation_token("post-id", "channel-id"))
+    ]
+    assert not any(url.startswith("https://www.youtube.com/post/") for _, url, _ in session.requests)
+
+
+if __name__ == "__main__":
+    test_max_comments()
+    test_max_pages()
+    test_rejected_token()
+    test_listed_post_stats()
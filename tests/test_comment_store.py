@@ -0,0 +1,171 @@
+import random
+
+import pytest
+
+from youtube_community_tab import comment_store
+from youtube_community_tab.client_context import ClientContext
+from youtube_community_tab.comment_store import CommentStore
+from youtube_community_tab.helpers.utils import parse_count_texts
+from youtube_community_tab.post import Post
+
+from fakes import FakeResponse, FakeSession, make_post_page
+
+
+def make_comment_item(comment_id, author, votes, replies=0):
+    return {
+        "commentThreadRenderer": {
+            "commentViewModel": {
+                "commentViewModel": {
+                    "commentId": comment_id,
+                    "authorEndpoint": {"browseEndpoint": {"browseId": author}},
+                    "voteCount": {"simpleText": votes},
+                    "replyCount": replies,
+                }
+            }
+        }
+    }
+
+
+def make_page(items, token=None):
+    if token is not None:
+        items = items + [{"continuationItemRenderer": {"continuationEndpoint": {"continuationCommand": {"token": token}}}}]
+    return {"onResponseReceivedEndpoints": [{"appendContinuationItemsAction": {"continuationItems": items}}]}
+
+
+def make_mutation(comment_id, author, likes, replies):
+    return {
+        "payload": {
+            "commentEntityPayload": {
+                "properties": {"commentId": comment_id},
+                "author": {"channelId": author},
+                "toolbar": {"likeCountNotliked": likes, "replyCount": replies},
+            }
+        }
+    }
+
+
+def test_parse_count_texts():
+    assert parse_count_texts(["1.7K", "12", "1.7K", None, "", 3, "2M"]) == [1700, 12, 1700, 0, 0, 3, 2000000]
+
+
+def test_comment_store():
+    store = CommentStore()
+
+    token = store.add_page(
+        make_page(
+            [make_comment_item("c1", "UC-a", "1.2K", 2), make_comment_item("c2", "UC-b", "7"), make_comment_item("c3", "UC-a", "30")],
+            token="next-page",
+        )
+    )
+    assert token == "next-page"
+
+    # Newer responses, with the comments in the entity mutations
+    token = store.add_page(
+        {
+            "frameworkUpdates": {
+                "entityBatchUpdate": {
+                    "mutations": [make_mutation("c1.r1", "UC-b", "5", ""), make_mutation("c4", "UC-c", "2K", "10"), make_mutation("c9.r1", "UC-c", "", "")]
+                }
+            }
+        }
+    )
+    assert token is None
+
+    assert len(store) == 6
+    assert store.authors == ["UC-a", "UC-b", "UC-c"]
+    assert list(store.vote_counts) == [1200, 7, 30, 5, 2000, 0]
+    assert list(store.reply_counts) == [2, 0, 0, 0, 10, 0]
+    assert list(store.parents) == [-1, -1, -1, 0, -1, -2]
+    assert store.get_row("c1.r1") == {"comment_id": "c1.r1", "author": "UC-b", "vote_count": 5, "reply_count": 0, "parent_id": "c1"}
+
+    # Comments loaded again are updated in place
+    store.add_page(make_page([make_comment_item("c2", "UC-b", "8")]))
+    assert len(store) == 6 and store.vote_counts[1] == 8
+
+    real_get_numpy = comment_store.get_numpy
+    for get_numpy in [real_get_numpy, lambda: None]:
+        comment_store.get_numpy = get_numpy
+        try:
+            assert store.group_by_author() == {"UC-a": (2, 1230), "UC-b": (2, 13), "UC-c": (2, 2000)}
+            assert store.top_k(3) == ["c4", "c1", "c3"]
+            assert store.top_k(2, replies=False, column="reply_counts") == ["c4", "c1"]
+            assert store.top_k(10, replies=False) == ["c4", "c1", "c3", "c2"]
+            assert store.top_authors(1) == [("UC-c", 2, 2000)]
+        finally:
+            comment_store.get_numpy = real_get_numpy
+
+
+def test_comment_store_numpy():
+    numpy = pytest.importorskip("numpy")
+
+    # Few distinct vote counts, so the top rows tie
+    generator = random.Random(0)
+    store = CommentStore()
+    for page in range(5):
+        items = []
+        for i in range(100):
+            comment_id = f"c{page}-{i}"
+            items.append(make_comment_item(comment_id, f"UC-{generator.randrange(20)}", str(generator.randrange(10)), generator.randrange(5)))
+            if generator.random() < 0.3:
+                items.append(make_comment_item(f"{comment_id}.r1", f"UC-{generator.randrange(20)}", str(generator.randrange(10))))
+        store.add_page(make_page(items))
+
+    columns = store.to_numpy()
+    assert set(columns) == set(CommentStore.COLUMNS)
+    assert columns["vote_counts"].dtype == numpy.int64 and columns["vote_counts"].tolist() == list(store.vote_counts)
+    del columns
+
+    # The numpy queries give the same results as the plain python ones
+    def run_queries():
+        return (
+            store.group_by_author(),
+            [store.top_k(k) for k in (1, 5, 50, 1000)],
+            [store.top_k(k, replies=False, column="reply_counts") for k in (1, 5, 50)],
+            store.top_authors(5),
+            store.top_authors(5, by="comments"),
+        )
+
+    results = run_queries()
+    real_get_numpy = comment_store.get_numpy
+    comment_store.get_numpy = lambda: None
+    try:
+        assert run_queries() == results
+    finally:
+        comment_store.get_numpy = real_get_numpy
+
+
+class RejectingSession(FakeSession):
+    # Rejects the locally built token, the one from the post page works
+    PAGES = {"first-page": make_page([make_comment_item("c1", "UC-a", "3")], token="second-page"), "second-page": make_page([make_comment_item("c2", "UC-b", "4")])}
+
+    def respond(self, method, url, kwargs):
+        if method == "GET":
+            return FakeResponse(make_post_page("first-page"))
+        return FakeResponse(data=RejectingSession.PAGES.get(kwargs["json"]["continuation"], {"responseContext": {}}))
+
+    @property
+    def urls_and_tokens(self):
+        return [url if method == "GET" else kwargs["json"]["continuation"] for method, url, kwargs in self.requests]
+
+
+def test_load_post_comments_rejected_token():
+    session = RejectingSession()
+    post = Post("post-1", channel_id="UC6nSFpj9HTCZ5t-N3Rm3-HA", session=session)
+    store = CommentStore()
+
+    assert store.load_post_comments(post) == 2
+    # After the home page bootstrap and the rejected token
+    assert session.urls_and_tokens[0] == ClientContext.BOOTSTRAP_URL
+    assert session.urls_and_tokens[2:] == [Post.FORMAT_URLS["POST"].format("post-1"), "first-page", "second-page"]
+    assert store.get_row("c2")["vote_count"] == 4
+    assert post.comments_continuation_token is False
+
+
+if __name__ == "__main__":
+    test_parse_count_texts()
+    test_comment_store()
+    try:
+        test_comment_store_numpy()
+    except pytest.skip.Exception:
+        pass
+    test_load_post_comments_rejected_token()
@@ -0,0 +1,98 @@
+from base64 import urlsafe_b64decode
+
+from youtube_community_tab.comment import Comment
+from youtube_community_tab.post import Post
+
+POST_ID = "UgkxzeM19x_He9LEoerdLOHwZJsqIwamUnTj"
+CHANNEL_ID = "UC6nSFpj9HTCZ5t-N3Rm3-HA"
+COMMENT_ID = "UgxKREWxIgDrw8w2e8Z4AaABAg"
+# Post.get_comments_continuation_token(POST_ID, CHANNEL_ID), checked field by field below
+TOKEN = (
+    "4qmFsgL1ARIYVUM2blNGcGo5SFRDWjV0LU4zUm0zLUhBGtgBRWdsamIyMXRkVzVwZEhtNEFRREtBU2V5QVNSVloydDRlbVZOTVRsNFgwaGxPVXhGYjJWeVpFeFBTSGRhU25OeFNYZGhiVlZ1VkdycUFn"
+    "UVFBUmdCcWdOYklrY3dBTmdCQWVvQkpGVm5hM2g2WlUweE9YaGZTR1U1VEVWdlpYSmtURTlJZDFwS2MzRkpkMkZ0Vlc1VWF2SUJHRlZETm01VFJuQnFPVWhVUTFvMWRDMU9NMUp0TXkxSVFVSVFZMjl0"
+    "YldWdWRITXRjMlZqZEdsdmJnJTNEJTNE"
+)
+
+# Messages inside the token, by the path of fields that leads to them
+MESSAGES = {(), (25,), (53,), (53, 4)}
+
+
+def b64decode(text):
+    text = text.decode() if isinstance(text, bytes) else text
+    return urlsafe_b64decode(text.replace("%3D", "="))
+
+
+def read_varint(data, i):
+    value = shift = 0
+    while True:
+        byte = data[i]
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        i += 1
+        if byte < 0x80:
+            return value, i
+
+
+def parse(data, path=()):
+    # [(field, value)] of a protobuf message, only varints and length-delimited fields
+    fields = []
+    i = 0
+    while i < len(data):
+        key, i = read_varint(data, i)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, i = read_varint(data, i)
+        else:
+            assert wire_type == 2
+            length, i = read_varint(data, i)
+            value = data[i : i + length]
+            i += length
+            if path + (field,) in MESSAGES:
+                value = parse(value, path + (field,))
+        fields.append((field, value))
+    return fields
+
+
+def decode_token(token):
+    # (channel_id, fields of the community tab message)
+    (browse,) = [value for field, value in parse_outer(b64decode(token)) if field == 80226972]
+    browse = dict(parse_outer(browse))
+    return browse[2], parse(b64decode(browse[3]))
+
+
+def parse_outer(data):
+    fields = []
+    i = 0
+    while i < len(data):
+        key, i = read_varint(data, i)
+        length, i = read_varint(data, i)
+        fields.append((key >> 3, data[i : i + length]))
+        i += length
+    return fields
+
+
+def drop_field(fields, dropped):
+    return [(field, drop_field(value, dropped) if isinstance(value, list) else value) for field, value in fields if field != dropped]
+
+
+def test_comments_continuation_token():
+    token = Post.get_comments_continuation_token(POST_ID, CHANNEL_ID)
+    assert token == TOKEN
+    channel_id, fields = decode_token(token)
+
+    # The same message as the token of a highlighted comment, without the comment (field 16)
+    fixed_channel_id, fixed_fields = decode_token(Comment.get_fixed_comment_params(COMMENT_ID, POST_ID, CHANNEL_ID))
+    assert channel_id == fixed_channel_id == CHANNEL_ID.encode()
+    assert fields == drop_field(fixed_fields, 16)
+
+    assert fields == [
+        (2, b"community"),
+        (23, 0),
+        (25, [(22, POST_ID.encode())]),
+        (45, b"\x10\x01\x18\x01"),
+        (53, [(4, [(6, 0), (27, 1), (29, POST_ID.encode()), (30, CHANNEL_ID.encode())]), (8, b"comments-section")]),
+    ]
+
+
+if __name__ == "__main__":
+    test_comments_continuation_token()
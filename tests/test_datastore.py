@@ -0,0 +1,111 @@
+from youtube_community_tab.comment import Comment
+from youtube_community_tab.community_tab import CommunityTab
+from youtube_community_tab.datastore import DataStore
+from youtube_community_tab.post import Post
+from youtube_community_tab.reply import Reply
+from youtube_community_tab.sinks import crawl_community_tab
+
+from fakes import FakeResponse, FakeSession, make_comment_item, make_comments_page
+
+CHANNEL_ID = "UC6nSFpj9HTCZ5t-N3Rm3-HA"
+
+
+def make_post(post_id, channel_id="UC6nSFpj9HTCZ5t-N3Rm3-HA", text="Vsauce is 11 years old today!!!!"):
+    post = Post(post_id, channel_id=channel_id, content_text={"runs": [{"text": text}]}, vote_count={"simpleText": "1.7K"})
+
+    comment = Comment(post_id, f"{post_id}-comment", channel_id=channel_id, content_text={"runs": [{"text": "Happy birthday"}]})
+    comment.replies.append(Reply(f"{post_id}-comment.reply", content_text={"runs": [{"text": "Hey a heart"}]}))
+    post.comments.append(comment)
+
+    return post
+
+
+def test_datastore(tmp_path):
+    store = DataStore(path=str(tmp_path / "datastore.sqlite"))
+
+    with store.batch():
+        store.save_post(make_post("post-1"))
+        store.save_post(make_post("post-2"))
+        store.save_post(make_post("post-3", channel_id="UCevD0wKzJFpfIkvHOiQsfLQ"))
+
+    assert [post["post_id"] for post in store.get_posts(channel_id="UC6nSFpj9HTCZ5t-N3Rm3-HA")] == ["post-1", "post-2"]
+    assert [post["post_id"] for post in store.get_posts(limit=1, offset=2)] == ["post-3"]
+    assert store.get_post_ids("UCevD0wKzJFpfIkvHOiQsfLQ") == {"post-3"}
+
+    comments = store.get_comments(post_id="post-1")
+
+    assert len(comments) == 1
+    assert comments[0]["comment_id"] == "post-1-comment"
+
+    replies = store.get_replies("post-1-comment")
+
+    assert len(replies) == 1
+    assert replies[0]["reply_id"] == "post-1-comment.reply"
+
+    # Upserts replace the stored data, keeping the original order
+    store.upsert_posts([make_post("post-1", text="Edited")])
+
+    assert store.get_post("post-1")["content_text"]["runs"][0]["text"] == "Edited"
+    assert [post["post_id"] for post in store.get_posts()] == ["post-1", "post-2", "post-3"]
+    assert store.get_post("missing") is None
+
+    store.close()
+
+
+class CrawlSession(FakeSession):
+    # A page of 3 posts, and a page of 2 comments for each post
+    def __init__(self):
+        super().__init__()
+        self.comments_pages = {}
+
+        post_items = []
+        for i in range(3):
+            post_id = f"post-{i}"
+            post_items.append({"backstagePostThreadRenderer": {"post": {"backstagePostRenderer": {"postId": post_id}}}})
+
+            comment_items = [make_comment_item(f"{post_id}-comment-{j}") for j in range(2)]
+            self.comments_pages[Post.get_comments_continuation_token(post_id, CHANNEL_ID)] = make_comments_page(comment_items)
+
+        self.posts_page = {"onResponseReceivedEndpoints": [{"appendContinuationItemsAction": {"continuationItems": post_items}, "clickTrackingParams": ""}]}
+
+    def respond(self, method, url, kwargs):
+        if kwargs["json"]["continuation"] == "posts-token":
+            return FakeResponse(data=self.posts_page)
+        return FakeResponse(data=self.comments_pages[kwargs["json"]["continuation"]])
+
+
+def test_datastore_sink(tmp_path):
+    community_tab = CommunityTab("vsauce1", session=CrawlSession())
+    community_tab.channel_id = CHANNEL_ID
+    community_tab.posts_continuation_token = "posts-token"
+    community_tab.visitor_data = "visitor-data"
+    community_tab.clean = False
+
+    with DataStore(path=str(tmp_path / "datastore.sqlite"), batch_size=4) as store:
+        crawl_community_tab(community_tab, store)
+
+        # Nothing was kept in memory, and only the last batch wasn't written yet
+        assert community_tab.posts == []
+        assert store._pending_count == 9 % 4
+
+        # Replies get the post_id of their comment
+        comment = Comment("post-0", "post-0-comment-0")
+        comment.sink = store
+        comment.append_replies_from_items([{"commentRenderer": {"commentId": "post-0-comment-0.reply-1"}}])
+
+    store = DataStore(path=str(tmp_path / "datastore.sqlite"))
+    assert [post["post_id"] for post in store.get_posts(channel_id=CHANNEL_ID)] == ["post-0", "post-1", "post-2"]
+    assert [comment["comment_id"] for comment in store.get_comments(post_id="post-2")] == ["post-2-comment-0", "post-2-comment-1"]
+    assert store._fetch("SELECT post_id, channel_id FROM replies WHERE comment_id = ?", ("post-0-comment-0",)) == [("post-0", CHANNEL_ID)]
+    store.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_datastore(Path(tmp))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_datastore_sink(Path(tmp))
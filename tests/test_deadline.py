@@ -0,0 +1,160 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from youtube_community_tab.circuit_breaker import CircuitBreaker, CircuitBreakerAdapter, item_circuit_breaker
+from youtube_community_tab.comment import Comment
+from youtube_community_tab.community_tab import CommunityTab
+from youtube_community_tab.exceptions import DeadlineExceededError
+from youtube_community_tab.post import Post
+from youtube_community_tab import requests_handler
+from youtube_community_tab.requests_handler import CONNECT_TIMEOUT, READ_TIMEOUT, get_timeout
+
+from fakes import FakeResponse, FakeSession, TimeoutSession, make_comment_item, make_comments_page
+
+
+class PagesSession(FakeSession):
+    # Answers with pages until they run out, then times out
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = list(pages)
+
+    def respond(self, method, url, kwargs):
+        if not self.pages:
+            raise requests.exceptions.ReadTimeout("[Read timed out]")
+        return FakeResponse(data=self.pages.pop(0))
+
+    @property
+    def timeouts(self):
+        return [kwargs["timeout"] for _, _, kwargs in self.requests]
+
+
+def test_get_timeout():
+    assert get_timeout() == (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+    connect_timeout, read_timeout = get_timeout(time.monotonic() + 1)
+    assert 0 < connect_timeout <= 1 and 0 < read_timeout <= 1
+
+    try:
+        get_timeout(time.monotonic() - 1)
+        assert False
+    except DeadlineExceededError:
+        pass
+
+
+def test_iter_comment_pages_truncated():
+    session = PagesSession([make_comments_page([make_comment_item("comment-1"), make_comment_item("comment-2")], "token-2")])
+    post = Post("post-id", channel_id="channel-id", session=session)
+    post.visitor_data = "visitor-data"
+
+    post.load_comments(internal=False, deadline=time.monotonic() + 10)
+
+    # The first page is kept, the second one timed out
+    assert [comment.comment_id for comment in post.comments] == ["comment-1", "comment-2"]
+    assert post.truncated
+    assert post.comments_continuation_token == "token-2"
+    assert all(read_timeout <= 10 for _, read_timeout in session.timeouts)
+
+    # Without a deadline the requests still have timeouts, and the error isn't swallowed
+    try:
+        post.load_comments(internal=False)
+        assert False
+    except requests.exceptions.ReadTimeout:
+        pass
+    assert session.timeouts[-1] == (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+
+def test_deadline_passed():
+    session = PagesSession([])
+
+    comment = Comment("post-id", "comment-id", replies_continuation_token="token", session=session)
+    assert list(comment.iter_reply_pages(deadline=time.monotonic() - 1)) == []
+    assert comment.truncated
+
+    community_tab = CommunityTab("channel", session=session)
+    community_tab.posts_continuation_token = "token"
+    assert list(community_tab.iter_post_pages(deadline=time.monotonic() - 1)) == []
+    assert community_tab.truncated
+
+    # Stopped before any request
+    assert session.timeouts == []
+
+    # The limits aren't a truncation
+    assert list(comment.iter_reply_pages(max_pages=0)) == []
+    assert not comment.truncated
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(0.5)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_deadline_timeouts_are_not_failures():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    breaker = CircuitBreaker("test", failure_threshold=2, cooldown=30)
+    session = requests.Session()
+    session.mount("http://", CircuitBreakerAdapter(breaker))
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    try:
+        # Timeouts cut by the deadline of the caller don't open the circuit
+        for _ in range(3):
+            try:
+                session.get(url, timeout=get_timeout(time.monotonic() + 0.1))
+                assert False
+            except requests.exceptions.ReadTimeout:
+                pass
+        assert not breaker.is_open()
+
+        assert session.get(url, timeout=get_timeout(time.monotonic() + 5)).text == "ok"
+
+        # The configured timeouts do
+        requests_handler.READ_TIMEOUT = 0.1
+        for _ in range(2):
+            try:
+                session.get(url)
+                assert False
+            except requests.exceptions.ReadTimeout:
+                pass
+        assert breaker.is_open()
+    finally:
+        requests_handler.READ_TIMEOUT = READ_TIMEOUT
+        server.shutdown()
+        server.server_close()
+
+    # The same for the circuit of each post
+    post_id = "deadline-post-id"
+    for _ in range(item_circuit_breaker.failure_threshold):
+        try:
+            Post.from_post_id(post_id, session=TimeoutSession(), deadline=time.monotonic() + 5)
+            assert False
+        except requests.exceptions.ReadTimeout:
+            pass
+    assert not item_circuit_breaker.is_open(post_id)
+
+    for _ in range(item_circuit_breaker.failure_threshold):
+        try:
+            Post.from_post_id(post_id, session=TimeoutSession())
+            assert False
+        except requests.exceptions.ReadTimeout:
+            pass
+    assert item_circuit_breaker.is_open(post_id)
+    item_circuit_breaker.record_success(post_id)
+
+
+if __name__ == "__main__":
+    test_get_timeout()
+    test_iter_comment_pages_truncated()
+    test_deadline_passed()
+    test_deadline_timeouts_are_not_failures()
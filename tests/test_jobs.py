@@ -0,0 +1,163 @@
+import json
+
+import requests
+
+from youtube_community_tab.jobs import JobRunner
+from youtube_community_tab.post import Post
+
+from fakes import FakeResponse, FakeSession
+
+
+def test_job_runner(tmp_path):
+    journal_path = str(tmp_path / "jobs.jsonl")
+    calls = []
+
+    def flaky_like(comment_id, value=True):
+        calls.append(comment_id)
+        if calls.count(comment_id) == 1:
+            raise requests.exceptions.ConnectionError("Connection reset by peer")
+        return {"actionResults": [{"status": "STATUS_SUCCEEDED"}]}
+
+    def rejected_like(comment_id, value=True):
+        return {"actionResults": [{"status": "STATUS_FAILED"}]}
+
+    runner = JobRunner(journal_path=journal_path, requests_per_second=0, retry_delay=0)
+    runner.actions["like"] = (flaky_like, True)
+    runner.actions["rejected_like"] = (rejected_like, True)
+
+    job_ids = [runner.add("like", comment_id=f"comment-{i}") for i in range(10)]
+    failed_job_id = runner.add("rejected_like", comment_id="comment-0")
+
+    # Jobs are deduplicated
+    assert runner.add("like", comment_id="comment-0") == job_ids[0]
+
+    assert runner.run() == {"done": 10, "failed": 1}
+    assert len(calls) == 20
+    assert runner.jobs[failed_job_id]["error"] == "[The action failed with status=STATUS_FAILED]"
+
+    # Everything is in the journal
+    runner = JobRunner(journal_path=journal_path)
+    runner.actions["like"] = (flaky_like, True)
+    runner.actions["rejected_like"] = (rejected_like, True)
+
+    assert runner.get_summary() == {"done": 10, "failed": 1}
+    assert runner.run() == {"done": 10, "failed": 1}
+    assert len(calls) == 20
+
+
+def test_job_runner_repeated_actions(tmp_path):
+    journal_path = str(tmp_path / "jobs.jsonl")
+    calls = []
+
+    def like(comment_id, post_id, channel_id, value=True):
+        calls.append((comment_id, value))
+        return {"actionResults": [{"status": "STATUS_SUCCEEDED"}]}
+
+    runner = JobRunner(journal_path=journal_path, requests_per_second=0)
+    runner.actions["set_like_comment"] = (like, True)
+
+    # Like, unlike and like again: the second like is a new job once the first one is done
+    first_like_job_id = runner.set_like_comment("comment-1", "post", "channel")
+    runner.run()
+    runner.set_like_comment("comment-1", "post", "channel", value=False)
+    runner.run()
+    second_like_job_id = runner.set_like_comment("comment-1", "post", "channel")
+    assert second_like_job_id != first_like_job_id
+    assert runner.run() == {"done": 3}
+    assert calls == [("comment-1", True), ("comment-1", False), ("comment-1", True)]
+
+    # With an idempotency_key it's the same job, also after loading the journal again
+    job_id = runner.set_like_comment("comment-2", "post", "channel", idempotency_key="like-comment-2")
+    runner.run()
+    runner = JobRunner(journal_path=journal_path, requests_per_second=0)
+    runner.actions["set_like_comment"] = (like, True)
+    assert runner.set_like_comment("comment-2", "post", "channel", idempotency_key="like-comment-2") == job_id
+    assert runner.run() == {"done": 4}
+    assert len(calls) == 4
+
+
+def test_job_runner_resume(tmp_path):
+    journal_path = str(tmp_path / "jobs.jsonl")
+    calls = []
+
+    def like(comment_id, value=True):
+        calls.append(comment_id)
+        return {"actionResults": [{"status": "STATUS_SUCCEEDED"}]}
+
+    runner = JobRunner(journal_path=journal_path)
+    like_job_id = runner.add("set_like_comment", comment_id="comment-1", post_id="post", channel_id="channel")
+    create_job_id = runner.create_comment("post", "channel", "Hey a heart")
+
+    # Simulate a crash while both jobs were running
+    with open(journal_path, "a") as f:
+        f.write(json.dumps({"event": "started", "job_id": like_job_id}) + "\n")
+        f.write(json.dumps({"event": "started", "job_id": create_job_id}) + "\n")
+        f.write('{"event": "done", "job_')
+
+    runner = JobRunner(journal_path=journal_path, requests_per_second=0)
+    runner.actions["set_like_comment"] = (lambda comment_id, post_id, channel_id, value=True: like(comment_id), True)
+
+    assert runner.run() == {"done": 1, "unknown": 1}
+    assert calls == ["comment-1"]
+    assert runner.jobs[create_job_id]["state"] == "unknown"
+
+
+CREATE_RESPONSE = {
+    "actionResult": {"status": "STATUS_SUCCEEDED"},
+    "actions": [{"createCommentAction": {"contents": {"commentThreadRenderer": {"comment": {"commentRenderer": {"commentId": "new-comment"}}}}}}],
+}
+
+
+class CreateCommentSession(FakeSession):
+    # Creates the comment, every other request times out
+    def __init__(self, create_response):
+        super().__init__()
+        self.create_response = create_response
+
+    def respond(self, method, url, kwargs):
+        if url == Post.FORMAT_URLS["CREATE_COMMENT_ENDPOINT"]:
+            return self.create_response
+        raise requests.exceptions.ReadTimeout("[Read timed out]")
+
+
+class SingleSessionPool(object):
+    def __init__(self, session):
+        self.session = session
+
+    def acquire(self):
+        return self.session
+
+
+def test_job_runner_create_comment(tmp_path):
+    session = CreateCommentSession(FakeResponse(data=CREATE_RESPONSE))
+    runner = JobRunner(journal_path=str(tmp_path / "jobs.jsonl"), requests_per_second=0, session_pool=SingleSessionPool(session))
+
+    # The comment id comes from the create response, the comment isn't loaded again
+    job_id = runner.create_comment("post", "channel", "Hey a heart")
+    assert runner.run() == {"done": 1}
+    assert runner.jobs[job_id]["result"] == {"comment_id": "new-comment"}
+    assert [url for _, url, _ in session.requests] == [Post.FORMAT_URLS["CREATE_COMMENT_ENDPOINT"]]
+
+    # A response that can't be read may or may not have created it, so it's never retried
+    session.create_response = FakeResponse("<html>Too many requests</html>", status_code=429)
+    job_id = runner.create_comment("post", "channel", "Hey another heart")
+    assert runner.run(retry_failed=True) == {"done": 1, "unknown": 1}
+    assert runner.run(retry_failed=True) == {"done": 1, "unknown": 1}
+    assert len(session.requests) == 2
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_job_runner(Path(tmp))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_job_runner_repeated_actions(Path(tmp))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_job_runner_resume(Path(tmp))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_job_runner_create_comment(Path(tmp))
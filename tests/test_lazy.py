@@ -0,0 +1,70 @@
+import copy
+
+from youtube_community_tab.comment import Comment
+from youtube_community_tab.helpers.lazy import Deferred
+from youtube_community_tab.post import Post
+from youtube_community_tab.reply import Reply
+
+POST_DATA = {
+    "postId": "UgkxzeM19x_He9LEoerdLOHwZJsqIwamUnTj",
+    "channelId": "UC6nSFpj9HTCZ5t-N3Rm3-HA",
+    "authorText": {
+        "runs": [
+            {
+                "text": "Vsauce",
+                "navigationEndpoint": {
+                    "browseEndpoint": {"browseId": "UC6nSFpj9HTCZ5t-N3Rm3-HA"},
+                    "commandMetadata": {"webCommandMetadata": {"url": "/c/vsauce1"}},
+                },
+            }
+        ]
+    },
+    "authorEndpoint": {
+        "clickTrackingParams": "CA0Q",
+        "commandMetadata": {"webCommandMetadata": {"url": "/c/vsauce1"}},
+        "browseEndpoint": {"browseId": "UC6nSFpj9HTCZ5t-N3Rm3-HA"},
+    },
+    "contentText": {"runs": [{"text": "Hey Vsauce"}]},
+    "voteCount": {"simpleText": "1.7K"},
+}
+
+COMMENT_DATA = {
+    "commentId": "UgwXDrwL2mq2ZX8wGQN4AaABAg",
+    "authorText": {"simpleText": "@Michael"},
+    "authorEndpoint": {"browseEndpoint": {"browseId": "UCXDrwL2mq2ZX8wGQN4AaABA"}},
+    "contentText": {"runs": [{"text": "Or is it?"}]},
+    "voteCount": {"simpleText": "12"},
+}
+
+
+def test_lazy_post():
+    post = Post.from_data(copy.deepcopy(POST_DATA), lazy=True)
+
+    # Only post_id and channel_id are read right away
+    for name in ["author", "content_text", "backstage_attachment", "vote_count", "sponsor_only_badge"]:
+        assert isinstance(post.__dict__[name], Deferred)
+
+    assert post.vote_count == {"simpleText": "1.7K"}
+    assert not isinstance(post.__dict__["vote_count"], Deferred)
+    assert isinstance(post.__dict__["author"], Deferred)
+
+    assert post.as_json() == Post.from_data(copy.deepcopy(POST_DATA)).as_json()
+
+
+def test_lazy_comment_and_reply():
+    comment = Comment.from_data(COMMENT_DATA, "UgkxzeM19x_He9LEoerdLOHwZJsqIwamUnTj", None, None, None, None, "0", lazy=True)
+    reply = Reply.from_data(COMMENT_DATA, lazy=True)
+
+    for item in [comment, reply]:
+        assert isinstance(item.__dict__["author"], Deferred)
+        assert item.get_text() == "Or is it?"
+        assert isinstance(item.__dict__["author"], Deferred)
+        assert item.author["authorEndpoint"] == {"browseId": "UCXDrwL2mq2ZX8wGQN4AaABA"}
+
+    assert comment.as_json()["author"] == Comment.from_data(COMMENT_DATA, None, None, None, None, None, "0").author
+    assert reply.as_json() == Reply.from_data(COMMENT_DATA).as_json()
+
+
+if __name__ == "__main__":
+    test_lazy_post()
+    test_lazy_comment_and_reply()
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from youtube_community_tab.comment import Comment
+from youtube_community_tab.helpers.prefetch import read_ahead
+
+
+def test_read_ahead():
+    loaded = []
+
+    def pages():
+        for i in range(10):
+            loaded.append(i)
+            yield i
+
+    iterator = read_ahead(pages(), 2)
+    assert next(iterator) == 0
+    time.sleep(0.2)
+
+    # The page that was consumed plus 2 ahead of it
+    assert loaded == [0, 1, 2]
+    assert list(iterator) == list(range(1, 10))
+
+
+def test_read_ahead_overlaps_with_the_consumer():
+    def pages():
+        for i in range(5):
+            time.sleep(0.05)
+            yield i
+
+    start = time.monotonic()
+    for _ in read_ahead(pages(), 1):
+        time.sleep(0.05)
+
+    # 5 * (0.05 + 0.05) without the read ahead
+    assert time.monotonic() - start < 0.4
+
+
+def test_read_ahead_errors_and_early_exit():
+    def failing_pages():
+        yield 0
+        raise ValueError("[Unexpected page]")
+
+    try:
+        list(read_ahead(failing_pages(), 1))
+        assert False
+    except ValueError as e:
+        assert str(e) == "[Unexpected page]"
+
+    closed = threading.Event()
+
+    def endless_pages():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    for page in read_ahead(endless_pages(), 3):
+        if page == 5:
+            break
+
+    # Leaving the loop stops the thread and closes the pages
+    assert closed.is_set()
+
+
+def test_iter_reply_pages_without_replies():
+    comment = Comment("post-id", "comment-id", replies_continuation_token=None)
+    threads = threading.active_count()
+
+    assert list(comment.iter_reply_pages(prefetch=2)) == []
+    assert threading.active_count() == threads
+
+
+if __name__ == "__main__":
+    test_read_ahead()
+    test_read_ahead_overlaps_with_the_consumer()
+    test_read_ahead_errors_and_early_exit()
+    test_iter_reply_pages_without_replies()
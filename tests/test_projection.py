@@ -0,0 +1,75 @@
+import copy
+
+from youtube_community_tab.comment import Comment
+from youtube_community_tab.helpers.lazy import Deferred
+from youtube_community_tab.helpers.projection import check_fields, parse_fields, project
+from youtube_community_tab.post import Post
+from youtube_community_tab.reply import Reply
+
+POST_DATA = {
+    "postId": "UgkxzeM19x_He9LEoerdLOHwZJsqIwamUnTj",
+    "channelId": "UC6nSFpj9HTCZ5t-N3Rm3-HA",
+    "authorText": {"runs": [{"text": "Vsauce", "navigationEndpoint": {"browseEndpoint": {"browseId": "UC6nSFpj9HTCZ5t-N3Rm3-HA"}}}]},
+    "authorThumbnail": {"thumbnails": [{"url": "https://yt3.ggpht.com/a", "width": 88, "height": 88}]},
+    "contentText": {"runs": [{"text": "Hey "}, {"text": "Vsauce", "bold": True}]},
+    "voteCount": {"simpleText": "1.7K"},
+}
+
+
+def test_parse_fields():
+    assert parse_fields("post_id, author.authorText,author.authorThumbnail.thumbnails.url") == {
+        "post_id": None,
+        "author": {"authorText": None, "authorThumbnail": {"thumbnails": {"url": None}}},
+    }
+    # A field selected whole wins over its nested fields, whatever the order
+    assert parse_fields(["author", "author.authorText"]) == {"author": None}
+    assert parse_fields(["author.authorText", "author"]) == {"author": None}
+    assert parse_fields("") == {}
+
+    assert check_fields("post_id,author.authorText", Post.JSON_FIELDS, "Post") == {"post_id": None, "author": {"authorText": None}}
+    try:
+        check_fields("post_id,postId", Post.JSON_FIELDS, "Post")
+        assert False
+    except ValueError as e:
+        assert "postId" in str(e)
+
+
+def test_project():
+    value = {"runs": [{"text": "Hey ", "bold": True}, {"text": "Vsauce"}], "accessibility": {}}
+
+    assert project(value, parse_fields("runs.text")) == {"runs": [{"text": "Hey "}, {"text": "Vsauce"}]}
+    assert project(value, parse_fields("runs.missing,other")) == {"runs": [{}, {}]}
+    assert project(value, None) is value
+
+
+def test_as_json_fields():
+    post = Post.from_data(copy.deepcopy(POST_DATA), clean=False, lazy=True)
+
+    assert post.as_json(fields="post_id,content_text.runs.text,author.authorThumbnail.thumbnails.url") == {
+        "post_id": "UgkxzeM19x_He9LEoerdLOHwZJsqIwamUnTj",
+        "content_text": {"runs": [{"text": "Hey "}, {"text": "Vsauce"}]},
+        "author": {"authorThumbnail": {"thumbnails": [{"url": "https://yt3.ggpht.com/a"}]}},
+    }
+    # Attributes that were not selected are not parsed
+    assert isinstance(post.__dict__["vote_count"], Deferred)
+
+    assert post.as_json(fields=Post.JSON_FIELDS) == post.as_json()
+
+    try:
+        post.as_json(fields="post_id,likes")
+        assert False
+    except ValueError as e:
+        assert "likes" in str(e)
+
+    comment_data = {"commentId": "comment-id", "authorText": {"simpleText": "@Michael"}, "contentText": {"runs": [{"text": "Or is it?"}]}}
+    comment = Comment.from_data(comment_data, "post-id", None, None, None, None, "0")
+    reply = Reply.from_data(comment_data)
+
+    assert comment.as_json(fields="comment_id,author.authorText") == {"comment_id": "comment-id", "author": {"authorText": {"simpleText": "@Michael"}}}
+    assert reply.as_json(fields=["reply_id", "content_text"]) == {"reply_id": "comment-id", "content_text": {"runs": [{"text": "Or is it?"}]}}
+
+
+if __name__ == "__main__":
+    test_parse_fields()
+    test_project()
+    test_as_json_fields()
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import requests
+
+from youtube_community_tab import requests_handler
+from youtube_community_tab.requests_handler import get_session, requests_cache, set_session
+
+
+def test_import_is_lazy():
+    # Nothing is imported or created until it's used
+    code = "import sys, youtube_community_tab; assert 'requests_cache' not in sys.modules; assert 'youtube_community_tab.post' not in sys.modules"
+    src_path = os.path.dirname(os.path.dirname(requests_handler.__file__))
+    subprocess.run([sys.executable, "-c", code], check=True, env={**os.environ, "PYTHONPATH": src_path})
+
+
+def test_default_paths(tmp_path):
+    # Every default data file lives in YOUTUBE_COMMUNITY_TAB_DATA_DIR, never in the package directory
+    data_dir = str(tmp_path / "data")
+    code = "\n".join(
+        [
+            "import os",
+            "from youtube_community_tab import archive, datastore, jobs, requests_handler, search_index, stats_store, thumbnails",
+            "from youtube_community_tab.resolution_cache import RESOLUTION_CACHE_FILE_PATH, resolution_cache",
+            "paths = [archive.ARCHIVE_DIR_PATH, datastore.DATASTORE_FILE_PATH, jobs.JOBS_JOURNAL_FILE_PATH, requests_handler.CACHE_FILE_PATH,",
+            "    RESOLUTION_CACHE_FILE_PATH, search_index.SEARCH_INDEX_FILE_PATH, stats_store.STATS_STORE_DIR_PATH, thumbnails.THUMBNAILS_DIR_PATH]",
+            f"assert all(path.startswith({data_dir!r}) for path in paths), paths",
+            "resolution_cache.get('channel')",
+            f"assert os.path.exists(os.path.join({data_dir!r}, 'resolution_cache.sqlite'))",
+        ]
+    )
+    src_path = os.path.dirname(os.path.dirname(requests_handler.__file__))
+    env = {**os.environ, "PYTHONPATH": src_path, "YOUTUBE_COMMUNITY_TAB_DATA_DIR": data_dir}
+    for name in ["YOUTUBE_COMMUNITY_TAB_CACHE_PATH", "YOUTUBE_COMMUNITY_TAB_RESOLUTION_CACHE_PATH"]:
+        env.pop(name, None)
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+
+def test_set_session():
+    previous_session = requests_handler._session
+    session = requests.Session()
+
+    try:
+        set_session(session)
+        assert get_session() is session
+
+        # requests_cache reads and writes the attributes of the current session
+        requests_cache.headers = {"Referer": "https://www.youtube.com"}
+        assert session.headers == {"Referer": "https://www.youtube.com"}
+        assert requests_cache.get == session.get
+    finally:
+        set_session(previous_session)
+
+
+if __name__ == "__main__":
+    test_import_is_lazy()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_default_paths(Path(tmp_dir))
+    test_set_session()
@@ -0,0 +1,46 @@
+import time
+
+from youtube_community_tab.resolution_cache import ResolutionCache
+
+
+def test_resolution_cache(tmp_path):
+    cache = ResolutionCache(path=str(tmp_path / "resolution_cache.sqlite"), ttl=60, negative_ttl=60)
+
+    assert cache.get("vsauce1") is None
+
+    cache.set("vsauce1", "UC6nSFpj9HTCZ5t-N3Rm3-HA", "https://www.youtube.com/c/vsauce1/community")
+    resolution = cache.get("vsauce1")
+
+    assert resolution["channel_id"] == "UC6nSFpj9HTCZ5t-N3Rm3-HA"
+    assert resolution["community_url"] == "https://www.youtube.com/c/vsauce1/community"
+
+    cache.set_not_found("@this-channel-does-not-exist")
+    resolution = cache.get("@this-channel-does-not-exist")
+
+    assert resolution is not None
+    assert resolution["community_url"] is None
+
+    # Entries are kept on disk
+    assert ResolutionCache(path=cache.path).get("vsauce1") == cache.get("vsauce1")
+
+
+def test_resolution_cache_expiration(tmp_path):
+    cache = ResolutionCache(path=str(tmp_path / "resolution_cache.sqlite"), ttl=0.1, negative_ttl=0.1)
+
+    cache.set("vsauce1", "UC6nSFpj9HTCZ5t-N3Rm3-HA", "https://www.youtube.com/c/vsauce1/community")
+    cache.set_not_found("@this-channel-does-not-exist")
+    time.sleep(0.2)
+
+    assert cache.get("vsauce1") is None
+    assert cache.get("@this-channel-does-not-exist") is None
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_resolution_cache(Path(tmp))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_resolution_cache_expiration(Path(tmp))
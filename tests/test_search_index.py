@@ -0,0 +1,49 @@
+from youtube_community_tab.comment import Comment
+from youtube_community_tab.post import Post
+from youtube_community_tab.search_index import SearchIndex
+
+
+def test_search_index(tmp_path):
+    index = SearchIndex(path=str(tmp_path / "search_index.sqlite"))
+
+    index.add_posts(
+        [
+            Post("post-1", channel_id="UC6nSFpj9HTCZ5t-N3Rm3-HA", content_text={"runs": [{"text": "We raised money for the Alzheimer's Association"}]}),
+            Post("post-2", channel_id="UCevD0wKzJFpfIkvHOiQsfLQ", content_text={"runs": [{"text": "Alzheimer's research update"}]}),
+        ]
+    )
+
+    comment = Comment("post-1", "comment-1", channel_id="UC6nSFpj9HTCZ5t-N3Rm3-HA")
+    comment.search_index = index
+    comment.append_replies_from_items(
+        [
+            {"commentRenderer": {"commentId": "comment-1.reply-1", "contentText": {"runs": [{"text": "My grandparents have alzheimer's disease"}]}}},
+            {"commentRenderer": {"commentId": "comment-1.reply-2", "contentText": {"runs": [{"text": "Hey a heart"}]}}},
+        ]
+    )
+
+    results = index.search("alzheimer's")
+
+    assert set(result["item_id"] for result in results) == {"post-1", "post-2", "comment-1.reply-1"}
+    assert all(results[i]["rank"] <= results[i + 1]["rank"] for i in range(len(results) - 1))
+
+    results = index.search("alzheimer's", channel_id="UC6nSFpj9HTCZ5t-N3Rm3-HA", kind="reply")
+
+    assert [result["item_id"] for result in results] == ["comment-1.reply-1"]
+    assert results[0]["post_id"] == "post-1"
+
+    # Re-indexing an item replaces its text
+    index.add_posts([Post("post-2", channel_id="UCevD0wKzJFpfIkvHOiQsfLQ", content_text={"runs": [{"text": "Edited"}]})])
+
+    assert [result["item_id"] for result in index.search("alzheimer's", post_id="post-2")] == []
+    assert index.search("alz*", raw=True)
+
+    index.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_search_index(Path(tmp))
@@ -0,0 +1,101 @@
+import io
+import tempfile
+from pathlib import Path
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from youtube_community_tab.community_tab import CommunityTab
+from youtube_community_tab import requests_handler
+from youtube_community_tab.post import Post
+from youtube_community_tab.requests_handler import create_session, set_session
+from youtube_community_tab.session_pool import Account, SessionPool
+
+
+class StatusAdapter(HTTPAdapter):
+    def __init__(self, statuses):
+        super().__init__()
+        self.statuses = list(statuses)
+
+    def send(self, request, **kwargs):
+        raw = HTTPResponse(body=io.BytesIO(b"{}"), status=self.statuses.pop(0), preload_content=False, request_url=request.url)
+        return self.build_response(request, raw)
+
+
+def make_account(name, statuses, **kwargs):
+    session = requests.Session()
+    session.mount("https://", StatusAdapter(statuses))
+    return Account(name, session=session, requests_per_second=None, **kwargs)
+
+
+def test_account_health():
+    account = make_account("account-1", [200, 429, 500, 200], cooldown=60)
+
+    account.get("https://www.youtube.com")
+    assert account.is_healthy()
+
+    account.post("https://www.youtube.com/youtubei/v1/browse")
+    assert not account.is_healthy()
+    first_cooldown = account.get_stats()["cooldown"]
+
+    # Consecutive failures double the cooldown, a success resets the count
+    account.get("https://www.youtube.com")
+    assert account.get_stats()["cooldown"] > first_cooldown + 50
+    account.get("https://www.youtube.com")
+    assert account.get_stats()["consecutive_failures"] == 0
+    assert account.get_stats()["failures"] == 2
+    assert account.get_stats()["requests"] == 4
+
+
+def test_session_pool():
+    accounts = [make_account(f"account-{i}", [200] * 10, session_index=str(i), visitor_data=f"visitor-{i}") for i in range(3)]
+    pool = SessionPool(accounts)
+
+    assert [pool.acquire() for _ in range(6)] == accounts + accounts
+
+    # Accounts cooling down are skipped
+    accounts[1].cooldown_until = float("inf")
+    assert {pool.acquire().name for _ in range(4)} == {"account-0", "account-2"}
+
+    # The models use the account they are given, with its session_index and visitor_data
+    post = Post("UgkxzeM19x_He9LEoerdLOHwZJsqIwamUnTj", session=accounts[2])
+    assert post.session is accounts[2] and post.session_index == "2" and post.visitor_data == "visitor-2"
+    assert CommunityTab("vsauce1", session=accounts[0]).session is accounts[0]
+
+    results = pool.map(lambda item, session: (item, session.name), range(5))
+    assert [item for item, _ in results] == list(range(5))
+    assert {name for _, name in results} == {"account-0", "account-2"}
+
+    for account in accounts:
+        account.cooldown_until = float("inf")
+    with pytest.raises(Exception):
+        pool.acquire()
+
+
+def test_account_caches(tmp_path):
+    previous_session = requests_handler._session
+    set_session(create_session(str(tmp_path / "requests_cache.sqlite")))
+
+    try:
+        accounts = [Account(f"account-{i}", requests_per_second=None) for i in range(2)]
+        adapters = [StatusAdapter([200] * 10) for _ in accounts]
+        for account, adapter in zip(accounts, adapters):
+            account.session.mount("https://", adapter)
+
+        # Both accounts share the cache file, but each one only gets its own responses
+        for account in accounts + accounts:
+            account.get("https://www.youtube.com/post/members-only")
+        assert [len(adapter.statuses) for adapter in adapters] == [9, 9]
+        assert accounts[0].session.cache is not accounts[1].session.cache
+        assert accounts[0].session.cache.responses.db_path == accounts[1].session.cache.responses.db_path
+    finally:
+        set_session(previous_session)
+
+
+if __name__ == "__main__":
+    test_account_health()
+    test_session_pool()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_account_caches(Path(tmp_dir))
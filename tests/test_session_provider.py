@@ -0,0 +1,38 @@
+import threading
+from http import cookiejar
+
+from youtube_community_tab.requests_handler import SessionProvider
+
+
+def test_session_provider(tmp_path):
+    provider = SessionProvider(cache_path=str(tmp_path / "cache.sqlite"), pool_maxsize=4)
+    main_session = provider.get()
+    assert provider.get() is main_session
+
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(provider.get()))
+    thread.start()
+    thread.join()
+
+    # Each thread has its own session and connection pool, but they share the cookies
+    assert sessions[0] is not main_session
+    assert sessions[0].get_adapter("https://www.youtube.com") is not main_session.get_adapter("https://www.youtube.com")
+    assert sessions[0].get_adapter("https://www.youtube.com")._pool_maxsize == 4
+    assert sessions[0].cookies is main_session.cookies
+
+    cookie_jar = cookiejar.MozillaCookieJar()
+    provider.set_shared("cookies", cookie_jar)
+    assert sessions[0].cookies is cookie_jar and main_session.cookies is cookie_jar
+
+    metrics = provider.get_metrics()
+    assert metrics["created_sessions"] == 2
+    assert metrics["pool_maxsize"] == 4
+    assert metrics["cache"]["writes"] == 0 and metrics["cache"]["total_size"] == 0
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_session_provider(Path(tmp))
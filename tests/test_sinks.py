@@ -0,0 +1,48 @@
+import json
+import queue
+
+from youtube_community_tab.comment import Comment
+from youtube_community_tab.sinks import JsonLinesSink, QueueSink
+
+REPLY_ITEMS = [
+    {"commentRenderer": {"commentId": "comment-1.reply-1", "contentText": {"runs": [{"text": "Hey a heart"}]}}},
+    {"commentRenderer": {"commentId": "comment-1.reply-2", "contentText": {"runs": [{"text": "Thank you"}]}}},
+    {"continuationItemRenderer": {"continuationEndpoint": {"continuationCommand": {"token": "token"}}}},
+]
+
+
+def test_queue_sink():
+    items = queue.Queue()
+
+    comment = Comment("post-1", "comment-1")
+    comment.sink = QueueSink(items)
+    replies = comment.append_replies_from_items(REPLY_ITEMS)
+
+    assert [reply.reply_id for reply in replies] == ["comment-1.reply-1", "comment-1.reply-2"]
+    assert comment.replies == []
+    assert comment.replies_continuation_token == "token"
+    assert [items.get().reply_id for _ in range(items.qsize())] == ["comment-1.reply-1", "comment-1.reply-2"]
+
+
+def test_json_lines_sink(tmp_path):
+    path = str(tmp_path / "items.jsonl")
+
+    with JsonLinesSink(path) as sink:
+        comment = Comment("post-1", "comment-1")
+        comment.sink = sink
+        comment.append_replies_from_items(REPLY_ITEMS)
+
+    with open(path, "r") as f:
+        lines = [json.loads(line) for line in f]
+
+    assert [(line["kind"], line["reply_id"]) for line in lines] == [("reply", "comment-1.reply-1"), ("reply", "comment-1.reply-2")]
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_queue_sink()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_json_lines_sink(Path(tmp))
@@ -0,0 +1,104 @@
+import os
+
+from youtube_community_tab.helpers.utils import parse_count_text
+from youtube_community_tab.post import Post
+from youtube_community_tab.stats_store import StatsStore
+
+from fakes import FakeResponse, FakeSession, make_post_page
+
+
+def test_stats_store(tmp_path):
+    store = StatsStore(path=str(tmp_path / "stats"))
+
+    for i in range(1000):
+        store.append_many([("post-1", 1000 + i, 10 + i // 10), ("post-2", 5000 - i, None)], timestamp=1700000000 + 60 * i)
+
+    columns = store.query("post-1")
+
+    assert len(columns["timestamp"]) == 1000
+    assert columns["likes"][-1] == 1999
+    assert columns["comments"][-1] == 109
+
+    columns = store.query("post-2", start=1700000000 + 60 * 10, end=1700000000 + 60 * 19)
+
+    assert list(columns["timestamp"]) == [1700000000 + 60 * i for i in range(10, 20)]
+    assert list(columns["likes"]) == [5000 - i for i in range(10, 20)]
+    assert set(columns["comments"]) == {-1}
+
+    # A new store keeps appending after the last point on disk
+    store = StatsStore(path=store.path)
+    store.append("post-1", 2500, 500, timestamp=1800000000)
+
+    assert list(store.iter_points("post-1", start=1700000000 + 60 * 999)) == [(1700000000 + 60 * 999, 1999, 109), (1800000000, 2500, 500)]
+    assert sorted(store.post_ids()) == ["post-1", "post-2"]
+    assert list(store.iter_points("missing")) == []
+
+
+def test_torn_write(tmp_path):
+    store = StatsStore(path=str(tmp_path / "stats"))
+    store.append("post-1", 10, 1, timestamp=1700000000)
+    store.append("post-1", 12, 1, timestamp=1700000060)
+
+    # The process died halfway through the next record
+    file_path = store._get_file_path("post-1")
+    size = os.path.getsize(file_path)
+    with open(file_path, "ab") as f:
+        f.write(bytes([6, 0xF0]))
+    assert list(store.iter_points("post-1")) == [(1700000000, 10, 1), (1700000060, 12, 1)]
+
+    # A new store drops it before appending
+    store = StatsStore(path=store.path)
+    store.append("post-1", 15, 2, timestamp=1700000120)
+    assert os.path.getsize(file_path) > size
+    assert list(store.iter_points("post-1")) == [(1700000000, 10, 1), (1700000060, 12, 1), (1700000120, 15, 2)]
+
+
+COMMENTS_PAGE = {
+    "onResponseReceivedEndpoints": [
+        {"reloadContinuationItemsCommand": {"continuationItems": [{"commentsHeaderRenderer": {"countText": {"runs": [{"text": "1.5K"}]}}}]}}
+    ]
+}
+
+
+class PostPageSession(FakeSession):
+    def respond(self, method, url, kwargs):
+        if method == "GET":
+            return FakeResponse(make_post_page("first-page"))
+        return FakeResponse(data=COMMENTS_PAGE)
+
+
+def test_comment_count_without_channel_id():
+    session = PostPageSession()
+    post = Post("post-1", session=session)
+    post.first = False
+    post.comments_continuation_token = "next-page"
+
+    # There is no channel id to build the token, so it comes from the post page
+    assert post.load_comment_count() == 1500
+    assert session.requests[0][1] == Post.FORMAT_URLS["POST"].format("post-1")
+    assert [kwargs["json"]["continuation"] for _, _, kwargs in session.requests[1:]] == ["first-page"]
+
+    # The next comments page is still the one that was due
+    assert post.comments_continuation_token == "next-page"
+
+
+def test_parse_count_text():
+    assert parse_count_text("1.7K") == 1700
+    assert parse_count_text("3.5\xa0M") == 3500000
+    assert parse_count_text("1,234") == 1234
+    assert parse_count_text("10") == 10
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(Path(tmp) / "store")
+        test_stats_store(Path(tmp) / "store")
+        os.makedirs(Path(tmp) / "torn")
+        test_torn_write(Path(tmp) / "torn")
+
+    test_comment_count_without_channel_id()
+
+    test_parse_count_text()
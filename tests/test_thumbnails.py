@@ -0,0 +1,110 @@
+import json
+import os
+from hashlib import sha256
+
+from youtube_community_tab.post import Post
+from youtube_community_tab.thumbnails import ThumbnailDownloader
+
+from fakes import FakeResponse, FakeSession
+
+THUMBNAILS = [
+    {"url": "//yt3.ggpht.com/image=s288", "width": 288, "height": 288},
+    {"url": "//yt3.ggpht.com/image=s400", "width": 400, "height": 400},
+    {"url": "//yt3.ggpht.com/image=s462", "width": 462, "height": 462},
+]
+
+
+def test_pick_thumbnail():
+    assert ThumbnailDownloader.pick_thumbnail(THUMBNAILS)["width"] == 462
+    assert ThumbnailDownloader.pick_thumbnail(THUMBNAILS, resolution="smallest")["width"] == 288
+    assert ThumbnailDownloader.pick_thumbnail(THUMBNAILS, resolution="closest", target_width=380)["width"] == 400
+    assert ThumbnailDownloader.pick_thumbnail([]) is None
+
+
+def test_thumbnail_downloader(tmp_path):
+    downloader = ThumbnailDownloader(path=str(tmp_path / "thumbnails"))
+
+    posts = [
+        Post("post-1", backstage_attachment={"backstageImageRenderer": {"image": {"thumbnails": THUMBNAILS}}}),
+        Post(
+            "post-2",
+            backstage_attachment={
+                "postMultiImageRenderer": {
+                    "images": [
+                        {"backstageImageRenderer": {"image": {"thumbnails": THUMBNAILS}}},
+                        {"backstageImageRenderer": {"image": {"thumbnails": [{"url": "https://yt3.ggpht.com/other", "width": 100}]}}},
+                    ]
+                }
+            },
+        ),
+        Post("post-3"),
+    ]
+
+    assert downloader.get_urls(posts) == ["https://yt3.ggpht.com/image=s462", "https://yt3.ggpht.com/other"]
+
+    # Urls already on disk are not downloaded again
+    os.makedirs(os.path.join(downloader.path, "ab"))
+    for url in downloader.get_urls(posts):
+        file_name = os.path.join("ab", f"ab{len(downloader.index)}.jpg")
+        with open(os.path.join(downloader.path, file_name), "wb") as f:
+            f.write(b"")
+        downloader.index[url] = file_name
+
+    file_paths = downloader.download_posts(posts)
+
+    assert file_paths == {
+        "https://yt3.ggpht.com/image=s462": os.path.join(downloader.path, "ab", "ab0.jpg"),
+        "https://yt3.ggpht.com/other": os.path.join(downloader.path, "ab", "ab1.jpg"),
+    }
+
+
+class ImageSession(FakeSession):
+    # Every image is its url, the ones with "missing" in it are not found
+    def respond(self, method, url, kwargs):
+        if "missing" in url:
+            return FakeResponse(status_code=404)
+        return FakeResponse(content=url.encode(), headers={"Content-Type": "image/png; charset=binary"})
+
+
+def test_thumbnail_download(tmp_path):
+    downloader = ThumbnailDownloader(path=str(tmp_path / "thumbnails"), resolution="closest", target_width=380, max_workers=4)
+    downloader.session = ImageSession()
+
+    image = {"backstageImageRenderer": {"image": {"thumbnails": THUMBNAILS}}}
+    missing_image = {"backstageImageRenderer": {"image": {"thumbnails": [{"url": "https://yt3.ggpht.com/missing", "width": 100}]}}}
+    posts = [Post(f"post-{i}", backstage_attachment=image) for i in range(5)]
+    posts.append(Post("post-5", backstage_attachment={"postMultiImageRenderer": {"images": [image, missing_image]}}))
+
+    file_paths = downloader.download_posts(posts)
+
+    # One request per unique url, of the resolution closest to target_width
+    url = "https://yt3.ggpht.com/image=s400"
+    assert sorted(request_url for _, request_url, _ in downloader.session.requests) == [url, "https://yt3.ggpht.com/missing"]
+    assert downloader.session.requests[0][2]["timeout"] == downloader.timeout
+
+    digest = sha256(url.encode()).hexdigest()
+    assert file_paths == {url: os.path.join(downloader.path, digest[:2], digest + ".png"), "https://yt3.ggpht.com/missing": None}
+    with open(file_paths[url], "rb") as f:
+        assert f.read() == url.encode()
+
+    with open(os.path.join(downloader.path, "index.jsonl")) as f:
+        assert [json.loads(line) for line in f] == [{"url": url, "file": os.path.join(digest[:2], digest + ".png")}]
+
+    # A new run finds it in the index, only the failed one is tried again
+    downloader = ThumbnailDownloader(path=downloader.path, resolution="closest", target_width=380)
+    downloader.session = ImageSession()
+    assert downloader.download_posts(posts)[url] == file_paths[url]
+    assert [request_url for _, request_url, _ in downloader.session.requests] == ["https://yt3.ggpht.com/missing"]
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_pick_thumbnail()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(Path(tmp) / "cached")
+        test_thumbnail_downloader(Path(tmp) / "cached")
+        os.makedirs(Path(tmp) / "download")
+        test_thumbnail_download(Path(tmp) / "download")